@@ -0,0 +1,143 @@
+"""
+Time and memory of building a sessions DataFrame from row tuples against
+the columnar (Arrow) path used by db_conn.fetch_dataframe.
+
+Both paths go through db_conn.fetch_dataframe. Without --env/--db it is
+given fake connections over a synthetic --rows-row sessions result: one
+without fetch_df_all, whose cursor materialises one Python tuple per row
+the way cursor.fetchall() does, and one whose fetch_df_all fills one Arrow
+array per column the way the driver does. With --env/--db both paths run
+the real sessions page query against that database (network time included).
+
+Usage:
+    python bench_fetch_dataframe.py [--rows 50000] [--repeat 3] [--env Development --db rundb1]
+"""
+import argparse
+import datetime
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pyarrow
+
+from db_conn import fetch_dataframe
+
+COLUMNS = ["SID", "SERIAL#", "USERNAME", "STATUS", "OSUSER", "MACHINE", "PROGRAM", "MODULE",
+           "ACTION", "LOGON_TIME", "HOURS_CONNECTED", "BLOCKING_SESSION", "SQL_ID",
+           "PREV_SQL_ID", "MEMORY_MB", "LOGON_SORT"]
+
+def make_columns(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    logon = datetime.datetime(2026, 1, 1) + pd.to_timedelta(rng.integers(0, 86400 * 30, rows), unit="s")
+    users = np.array([f"APP_USER_{i:02d}" for i in range(40)], dtype=object)
+    sql_ids = np.array([f"{i:013x}" for i in range(500)], dtype=object)
+    return {
+        "SID": np.arange(1, rows + 1),
+        "SERIAL#": rng.integers(1, 65535, rows),
+        "USERNAME": users[rng.integers(0, len(users), rows)],
+        "STATUS": np.where(rng.random(rows) < 0.3, "ACTIVE", "INACTIVE").astype(object),
+        "OSUSER": np.full(rows, "oracle", dtype=object),
+        "MACHINE": np.array([f"apphost{i % 64:02d}.example.com" for i in range(rows)], dtype=object),
+        "PROGRAM": np.full(rows, "JDBC Thin Client", dtype=object),
+        "MODULE": np.full(rows, "JDBC Thin Client", dtype=object),
+        "ACTION": np.full(rows, None, dtype=object),
+        "LOGON_TIME": logon.strftime("%d-%b-%Y %H:%M:%S").str.upper().to_numpy(dtype=object),
+        "HOURS_CONNECTED": rng.uniform(0, 720, rows).round(2),
+        "BLOCKING_SESSION": np.where(rng.random(rows) < 0.01, rng.integers(1, rows, rows), np.nan),
+        "SQL_ID": sql_ids[rng.integers(0, len(sql_ids), rows)],
+        "PREV_SQL_ID": sql_ids[rng.integers(0, len(sql_ids), rows)],
+        "MEMORY_MB": rng.uniform(1, 200, rows).round(2),
+        "LOGON_SORT": logon.to_numpy(),
+    }
+
+class SyntheticCursor:
+    """Cursor whose fetchall() builds row tuples of Python objects, as the driver does."""
+
+    description = [(name,) for name in COLUMNS]
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def execute(self, sql, params):
+        pass
+
+    def fetchall(self):
+        values = [self.columns[name].tolist() for name in COLUMNS]
+        return list(zip(*values))
+
+    def close(self):
+        pass
+
+class SyntheticRowConnection:
+    """Connection without fetch_df_all, so fetch_dataframe takes the row path."""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def cursor(self):
+        return SyntheticCursor(self.columns)
+
+class SyntheticColumnarConnection(SyntheticRowConnection):
+    def fetch_df_all(self, sql, params=None, arraysize=None):
+        # What the driver hands back: one Arrow array per column
+        return pyarrow.table({name: pyarrow.array(self.columns[name], from_pandas=True) for name in COLUMNS})
+
+def measure(repeat, fn):
+    timings, peak = [], 0
+    for _ in range(repeat):
+        gc.collect()
+        arrow_before = pyarrow.total_allocated_bytes()
+        tracemalloc.start()
+        start = time.perf_counter()
+        df = fn()
+        timings.append(time.perf_counter() - start)
+        # Arrow buffers still alive are allocated outside tracemalloc's view
+        arrow_held = pyarrow.total_allocated_bytes() - arrow_before
+        peak = max(peak, tracemalloc.get_traced_memory()[1] + max(arrow_held, 0))
+        tracemalloc.stop()
+    return min(timings), peak, df
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--env")
+    parser.add_argument("--db")
+    args = parser.parse_args()
+
+    if args.env and args.db:
+        from db_conn import _fetch_rows, FETCH_ARRAYSIZE, get_oracle_connection
+        from sessions_data import build_sessions_page_query
+
+        sql, binds = build_sessions_page_query(None, None, 0, args.rows)
+        conn = get_oracle_connection(args.env, args.db)
+        try:
+            row_path = lambda: _fetch_rows(conn, sql, binds, FETCH_ARRAYSIZE)
+            columnar_path = lambda: fetch_dataframe(conn, sql, binds)
+            label = f"{args.env}/{args.db}"
+            rows_time, rows_peak, df_rows = measure(args.repeat, row_path)
+            arrow_time, arrow_peak, df_arrow = measure(args.repeat, columnar_path)
+        finally:
+            conn.close()
+    else:
+        columns = make_columns(args.rows)
+        label = "synthetic"
+        row_conn = SyntheticRowConnection(columns)
+        columnar_conn = SyntheticColumnarConnection(columns)
+        rows_time, rows_peak, df_rows = measure(args.repeat, lambda: fetch_dataframe(row_conn, "synthetic"))
+        arrow_time, arrow_peak, df_arrow = measure(args.repeat, lambda: fetch_dataframe(columnar_conn, "synthetic"))
+
+    assert len(df_rows) == len(df_arrow)
+
+    print(f"Sessions result: {len(df_rows):,} rows x {len(df_rows.columns)} columns ({label}, best of {args.repeat})")
+    print(f"{'':<12}{'time':>10}{'peak mem':>12}{'frame size':>12}")
+    for name, elapsed, peak, df in (("row tuples", rows_time, rows_peak, df_rows),
+                                    ("columnar", arrow_time, arrow_peak, df_arrow)):
+        frame_mb = df.memory_usage(deep=True).sum() / 2**20
+        print(f"{name:<12}{elapsed * 1000:>8.1f}ms{peak / 2**20:>10.1f}MB{frame_mb:>10.1f}MB")
+    print(f"Speed-up {rows_time / arrow_time:.1f}x, peak memory {rows_peak / arrow_peak:.1f}x lower")
+
+if __name__ == "__main__":
+    main()
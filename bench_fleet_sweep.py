@@ -0,0 +1,80 @@
+"""
+Timing comparison of the serial host loop against sweep_hosts() on a
+simulated inventory. No network is used: each host sleeps for a simulated
+SSH handshake plus three probe round trips, and dead hosts sleep for the
+full 7 s connect timeout.
+
+Usage:
+    python bench_fleet_sweep.py [--hosts 500] [--workers 32] [--time-scale 0.1]
+"""
+import argparse
+import random
+import time
+
+from server_collector import sweep_hosts
+
+CONNECT_TIMEOUT = 7.0
+
+def build_inventory(n_hosts, dead_ratio, seed=42):
+    rng = random.Random(seed)
+    inventory = []
+    for i in range(n_hosts):
+        inventory.append({
+            "Host": f"10.145.{i // 250}.{i % 250 + 1}",
+            "User": "monitor",
+            "Password": "secret",
+            "dead": rng.random() < dead_ratio,
+            "handshake": rng.uniform(0.04, 0.15),
+            "probes": [rng.uniform(0.01, 0.05) for _ in range(3)],
+        })
+    return inventory
+
+def make_collector(time_scale):
+    def collect(cred):
+        if cred["dead"]:
+            time.sleep(CONNECT_TIMEOUT * time_scale)
+            return {"host": cred["Host"], "status": "DOWN", "status_level": 4}
+        time.sleep(cred["handshake"] * time_scale)
+        for latency in cred["probes"]:
+            time.sleep(latency * time_scale)
+        return {"host": cred["Host"], "status": "UP", "status_level": 2}
+    return collect
+
+def run_serial(inventory, collect):
+    return [collect(cred) for cred in inventory]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hosts", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--dead-ratio", type=float, default=0.01)
+    parser.add_argument("--time-scale", type=float, default=0.1,
+                        help="Multiply every simulated latency by this factor")
+    args = parser.parse_args()
+
+    inventory = build_inventory(args.hosts, args.dead_ratio)
+    collect = make_collector(args.time_scale)
+    dead = sum(1 for cred in inventory if cred["dead"])
+    slowest = max(
+        CONNECT_TIMEOUT if cred["dead"] else cred["handshake"] + sum(cred["probes"])
+        for cred in inventory
+    ) * args.time_scale
+
+    print(f"Simulated hosts: {args.hosts} ({dead} dead), time scale: {args.time_scale}")
+    print(f"Slowest single host: {slowest:.2f}s")
+
+    start = time.perf_counter()
+    serial = run_serial(inventory, collect)
+    serial_elapsed = time.perf_counter() - start
+    print(f"Serial loop:           {serial_elapsed:8.2f}s")
+
+    start = time.perf_counter()
+    parallel = sweep_hosts(inventory, collect, max_workers=args.workers)
+    parallel_elapsed = time.perf_counter() - start
+    print(f"sweep_hosts({args.workers:>3} workers): {parallel_elapsed:6.2f}s")
+
+    assert [r["host"] for r in serial] == [r["host"] for r in parallel]
+    print(f"Speed-up: {serial_elapsed / parallel_elapsed:.1f}x")
+
+if __name__ == "__main__":
+    main()
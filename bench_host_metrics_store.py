@@ -0,0 +1,98 @@
+"""
+Ingest and window-query cost of HostMetricsStore for a synthetic fleet,
+the points a 30-day chart reads from the rollups, and the memory the
+store settles at once every ring is full. The hourly level is seeded
+from 31 days of archived rollups first, as a restart would, so the
+30-day chart reads a full level rather than the last couple of hours.
+
+Usage:
+    python bench_host_metrics_store.py [--hosts 2000] [--mounts 4] [--interval 30] [--retention 7200]
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from host_metrics_store import ARCHIVE_KIND, CPU, HostMetricsStore
+from metric_archive import ROLLUP_FILE_SECONDS, MetricArchive, empty_rollup
+
+def make_snapshot(hosts, mounts, collected_at, rng):
+    servers = []
+    for i in range(hosts):
+        servers.append({
+            "host": f"10.0.{i // 256}.{i % 256}",
+            "cpu": float(rng.uniform(0, 100)),
+            "mem": (16384, int(rng.integers(1000, 15000)), 512, 2048),
+            "fs": [{"Use%": f"{rng.integers(1, 100)}%", "Mounted on": f"/u{m:02d}"} for m in range(mounts)],
+            "status": "UP",
+        })
+    return {"collected_at": collected_at, "servers": servers}
+
+def archive_hourly_rollups(archive, keys, until, days, rng):
+    """Write `days` of synthetic hourly CPU rollups for every key, ending at until."""
+    per_day = ROLLUP_FILE_SECONDS // 3600
+    for day_start in range(until - days * ROLLUP_FILE_SECONDS, until, ROLLUP_FILE_SECONDS):
+        fields = empty_rollup(len(keys), per_day)
+        low = rng.uniform(0, 50, fields["min"].shape).astype(np.float32)
+        fields["min"][:] = low
+        fields["max"][:] = low + 40
+        fields["count"][:] = 3600 // 30
+        fields["sum"][:] = (low + 20) * fields["count"]
+        fields["last"][:] = low + 10
+        archive.add_rollup(ARCHIVE_KIND, 3600, keys, day_start // 3600, fields)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hosts", type=int, default=2000)
+    parser.add_argument("--mounts", type=int, default=4)
+    parser.add_argument("--interval", type=int, default=30)
+    parser.add_argument("--retention", type=int, default=7200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    store = HostMetricsStore(retention=args.retention, resolution=args.interval)
+    sweeps = store.capacity + 10  # enough to fill and wrap every ring
+    snapshots = [make_snapshot(args.hosts, args.mounts, 0, rng) for _ in range(4)]
+    base = 1_700_000_000 - 1_700_000_000 % ROLLUP_FILE_SECONDS
+
+    ingest_times = []
+    for sweep in range(sweeps):
+        snapshot = dict(snapshots[sweep % len(snapshots)], collected_at=float(base + sweep * args.interval))
+        start = time.perf_counter()
+        store.ingest_snapshot(snapshot)
+        ingest_times.append(time.perf_counter() - start)
+
+    now = base + (sweeps - 1) * args.interval
+
+    with tempfile.TemporaryDirectory() as directory:
+        archive = MetricArchive(directory)
+        keys = [f"{server['host']}\t{CPU}" for server in snapshots[0]["servers"]]
+        archive_hourly_rollups(archive, keys, base, 31, rng)
+        start = time.perf_counter()
+        store.archive = archive
+        seeded = store.seed_rollups(3600, now - 31 * 86400)
+        seed_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fleet = store.fleet_stats(CPU, 3600, now=now)
+    fleet_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store.frame(fleet.index[0], [CPU], args.retention, now=now)
+    frame_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    month = store.history(fleet.index[0], CPU, 30 * 86400, now=now)
+    month_time = time.perf_counter() - start
+
+    print(f"Hosts: {args.hosts:,}, series: {len(store):,}, samples per series: {store.capacity:,}")
+    print(f"Ingest one sweep      {np.median(ingest_times) * 1000:>8.1f}ms (median of {sweeps})")
+    print(f"Fleet CPU stats (1h)  {fleet_time * 1000:>8.1f}ms")
+    print(f"One host trend frame  {frame_time * 1000:>8.2f}ms")
+    print(f"Seed hourly rollups   {seed_time * 1000:>8.0f}ms ({seeded:,} series, 31 days)")
+    print(f"30-day CPU history    {month_time * 1000:>8.2f}ms ({len(month):,} points at {month.attrs['resolution']}s buckets)")
+    print(f"Memory                {store.nbytes / 1024 / 1024:>8.1f}MB (fixed once rings are full)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Disk use per host-day of the compressed metric archive, and how long a
+fresh dashboard process takes to restore its in-memory history from it
+(the last hour of raw samples plus the archived rollups) and to draw the
+longest trend range afterwards.
+
+Usage:
+    python bench_metric_archive.py [--hosts 500] [--mounts 4] [--interval 30] [--hours 24]
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from host_metrics_store import ARCHIVE_KIND, ARCHIVE_ROLLUP_WIDTHS, CPU, RESTORE_SECONDS, HostMetricsStore
+from metric_archive import MetricArchive, rollup_fields
+
+def synthetic_series(rng, hosts, mounts, n):
+    """Per host: a CPU random walk, slowly drifting memory, near-constant Use% per mount."""
+    series = {}
+    for i in range(hosts):
+        host = f"10.0.{i // 256}.{i % 256}"
+        cpu = np.clip(np.cumsum(rng.normal(0, 2, n)) + rng.uniform(10, 60), 0, 100).round(2)
+        used = (8000 + np.cumsum(rng.integers(-20, 21, n))).astype(float)
+        series[(host, CPU)] = cpu
+        series[(host, "mem_used")] = used
+        series[(host, "mem_free")] = 16384 - used - 2048
+        series[(host, "mem_buff_cache")] = np.full(n, 2048.0)
+        for m in range(mounts):
+            series[(host, f"fs:/u{m:02d}")] = (rng.uniform(20, 90) + np.floor(np.arange(n) / (n / 3))).round()
+    return series
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hosts", type=int, default=500)
+    parser.add_argument("--mounts", type=int, default=4)
+    parser.add_argument("--interval", type=int, default=30)
+    parser.add_argument("--hours", type=int, default=24)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    n = args.hours * 3600 // args.interval
+    start = 1_700_000_000 - 1_700_000_000 % 3600
+    ts = start + np.arange(n) * float(args.interval)
+    series = synthetic_series(rng, args.hosts, args.mounts, n)
+
+    with tempfile.TemporaryDirectory() as directory:
+        archive = MetricArchive(directory)
+        write_start = time.perf_counter()
+        for hour in range(args.hours):
+            span = slice(hour * 3600 // args.interval, (hour + 1) * 3600 // args.interval)
+            keyed = {f"{host}\t{name}": (ts[span], values[span]) for (host, name), values in series.items()}
+            archive.write_chunk(ARCHIVE_KIND, start + hour * 3600, keyed)
+            for width in ARCHIVE_ROLLUP_WIDTHS:
+                first = (start + hour * 3600) // width
+                fields = rollup_fields(list(keyed.values()), width, first, max(1, 3600 // width))
+                archive.add_rollup(ARCHIVE_KIND, width, list(keyed), first, fields)
+        write_time = time.perf_counter() - write_start
+
+        samples = len(series) * n
+        size = archive.disk_usage(ARCHIVE_KIND)
+        per_host_day = size / args.hosts * 24 / args.hours
+
+        now = ts[-1] + args.interval
+        restore_start = time.perf_counter()
+        store = HostMetricsStore(archive=archive)
+        restored = store.restore_from_archive(now=now)
+        restore_time = time.perf_counter() - restore_start
+
+        # What get_store() does: the first render only waits for the thread
+        # to start, and live samples go in while the restore runs
+        background = HostMetricsStore(archive=archive)
+        start_time = time.perf_counter()
+        thread = background.restore_in_background(now=now)
+        start_time = time.perf_counter() - start_time
+        append_times = []
+        while background.restoring:
+            append_start = time.perf_counter()
+            background.append("live-host", CPU, time.time(), 1.0)
+            append_times.append(time.perf_counter() - append_start)
+            time.sleep(0.01)
+        thread.join()
+
+        host = next(iter(series))[0]
+        history_start = time.perf_counter()
+        trend = store.history(host, CPU, args.hours * 3600, now=now)
+        history_time = time.perf_counter() - history_start
+
+        read_start = time.perf_counter()
+        day = archive.read_series(ARCHIVE_KIND, f"{host}\t{CPU}", start, now)
+        read_time = time.perf_counter() - read_start
+
+    print(f"Hosts: {args.hosts:,}, series: {len(series):,}, samples: {samples:,} over {args.hours}h")
+    print(f"Write {args.hours} chunks        {write_time * 1000:>8.0f}ms")
+    print(f"Disk                   {size / 1024 / 1024:>8.1f}MB ({size / samples:.2f} bytes/sample vs 12 raw)")
+    print(f"Per host-day           {per_host_day / 1024:>8.1f}KB")
+    print(f"Dashboard restore      {restore_time * 1000:>8.0f}ms ({restored:,} samples, last {RESTORE_SECONDS // 60} min)")
+    print(f"get_store() returns    {start_time * 1000:>8.1f}ms (restore in background, "
+          f"live append max {max(append_times, default=0) * 1000:.1f}ms while it runs)")
+    print(f"History, {args.hours}h         {history_time * 1000:>8.1f}ms ({len(trend):,} points, "
+          f"{trend.attrs['resolution']}s buckets, from memory)")
+    print(f"One series, {args.hours}h      {read_time * 1000:>8.1f}ms ({len(day[0]):,} samples)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Rerun latency of combinedapp.py measured with Streamlit's AppTest.
+
+Oracle is replaced by a fake connection whose every execute() sleeps for
+--query-latency seconds, and the server view reads a synthetic snapshot of
+--hosts hosts, so the numbers show how much work each interaction triggers.
+
+Usage:
+    python bench_rerun_latency.py [--hosts 500] [--query-latency 0.2]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import db_conn
+
+SESSIONS_VIEW = "👥 Sessions Monitoring"
+
+class FakeCursor:
+    def __init__(self, stats, latency):
+        self.stats = stats
+        self.latency = latency
+        self.description = [("COL",)]
+
+    def execute(self, sql, *args, **kwargs):
+        self.stats["queries"] += 1
+        time.sleep(self.latency)
+
+    def fetchone(self):
+        return ("FAKEDB",)
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    def __init__(self, stats, latency):
+        self.stats = stats
+        self.latency = latency
+
+    def cursor(self):
+        return FakeCursor(self.stats, self.latency)
+
+    def close(self):
+        pass
+
+def write_fake_snapshot(path, n_hosts):
+    servers = []
+    for i in range(n_hosts):
+        servers.append({
+            "host": f"10.145.{i // 250}.{i % 250 + 1}",
+            "cpu": float(i % 100),
+            "mem": [16000, 8000, 4000, 4000],
+            "fs": [{"Filesystem": "/dev/sda2", "Size": "50G", "Used": "30G",
+                    "Available": "20G", "Use%": "60%", "Mounted on": "/"}],
+            "status": "UP",
+            "status_level": 2,
+        })
+    with open(path, "w") as snapshot_file:
+        json.dump({"collected_at": time.time(), "duration": 1.0, "servers": servers}, snapshot_file)
+
+def timed(stats, action):
+    stats["queries"] = 0
+    start = time.perf_counter()
+    at = action()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return elapsed, stats["queries"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hosts", type=int, default=500)
+    parser.add_argument("--query-latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    snapshot_path = os.path.join(tempfile.mkdtemp(), "server_snapshot.json")
+    write_fake_snapshot(snapshot_path, args.hosts)
+    os.environ["SERVER_SNAPSHOT_PATH"] = snapshot_path
+    os.environ["SNAPSHOT_CACHE_PATH"] = os.path.join(os.path.dirname(snapshot_path), "snapshot_cache.db")
+
+    stats = {"queries": 0}
+    db_conn.get_oracle_connection = lambda env, db: FakeConnection(stats, args.query_latency)
+
+    from streamlit.testing.v1 import AppTest
+
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "combinedapp.py")
+    at = AppTest.from_file(app_path, default_timeout=600)
+
+    results = [("Initial page load", timed(stats, at.run))]
+
+    views = [r for r in at.radio if r.key == "active_view"]
+    if views:
+        results.append(("Open Sessions view", timed(stats, lambda: views[0].set_value(SESSIONS_VIEW).run())))
+
+    sessions_db = next(s for s in at.selectbox if s.key == "sessions_db")
+    results.append(("Change Sessions DB", timed(stats, lambda: sessions_db.set_value("rundb2").run())))
+
+    sessions_env = next(s for s in at.selectbox if s.key == "sessions_env")
+    results.append(("Change Sessions env", timed(stats, lambda: sessions_env.set_value("Testing").run())))
+
+    print(f"Snapshot hosts: {args.hosts}, simulated query latency: {args.query_latency}s")
+    for label, (elapsed, queries) in results:
+        print(f"{label:<22} {elapsed * 1000:8.0f} ms  {queries:3d} queries")
+
+if __name__ == "__main__":
+    main()
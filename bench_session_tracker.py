@@ -0,0 +1,94 @@
+"""
+Diff cost of SessionTracker.update() on synthetic v$session snapshots,
+against a row-by-row dict comparison, plus how many rows actually change
+between refreshes.
+
+Usage:
+    python bench_session_tracker.py [--sessions 20000] [--churn 0.02] [--repeat 5]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from session_tracker import SessionTracker
+
+def make_snapshot(sessions, seed=1):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "SID": np.arange(1, sessions + 1),
+        "SERIAL#": rng.integers(1, 65535, sessions),
+        "USERNAME": rng.choice([f"APP_USER_{i:02d}" for i in range(40)], sessions),
+        "STATUS": rng.choice(["ACTIVE", "INACTIVE"], sessions, p=[0.2, 0.8]),
+        "SQL_ID": rng.choice([f"{i:013x}" for i in range(500)] + [None], sessions),
+        "MEMORY_MB": rng.uniform(1, 200, sessions).round(2),
+    })
+
+def next_snapshot(df, churn, seed=2):
+    """Log off/on churn of the sessions, and change status and PGA of about 10%."""
+    rng = np.random.default_rng(seed)
+    df = df.copy()
+    n = len(df)
+    relogged = rng.random(n) < churn
+    df.loc[relogged, "SERIAL#"] += 1  # same SID, new session
+    flipped = rng.random(n) < 0.05
+    df.loc[flipped, "STATUS"] = np.where(df.loc[flipped, "STATUS"] == "ACTIVE", "INACTIVE", "ACTIVE")
+    grown = rng.random(n) < 0.10
+    df.loc[grown, "MEMORY_MB"] = (df.loc[grown, "MEMORY_MB"] + rng.uniform(0.1, 50, grown.sum())).round(2)
+    ended = rng.random(n) < churn
+    return df[~ended]
+
+def dict_diff(previous, current, columns=("STATUS", "SQL_ID", "MEMORY_MB")):
+    before = {(r["SID"], r["SERIAL#"]): r for r in previous.to_dict("records")}
+    after = {(r["SID"], r["SERIAL#"]): r for r in current.to_dict("records")}
+    added = [k for k in after if k not in before]
+    removed = [k for k in before if k not in after]
+    changed, pga_delta = [], {}
+    for key, row in after.items():
+        old = before.get(key)
+        if old is None:
+            continue
+        pga_delta[key] = row["MEMORY_MB"] - old["MEMORY_MB"]
+        if any(row[c] != old[c] and not (pd.isna(row[c]) and pd.isna(old[c])) for c in columns):
+            changed.append(key)
+    return added, removed, changed, pga_delta
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--churn", type=float, default=0.02)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    first = make_snapshot(args.sessions)
+    second = next_snapshot(first, args.churn)
+
+    trackers = []
+    for _ in range(args.repeat):
+        trackers.append(SessionTracker())
+        trackers[-1].update(first, 1)  # baseline snapshot, not timed
+    tracker_time, diff = best_of(args.repeat, lambda: trackers.pop().update(second, 2))
+    dict_time, (added, removed, changed, _) = best_of(args.repeat, lambda: dict_diff(first, second))
+
+    assert len(diff["added"]) == len(added)
+    assert len(diff["removed"]) == len(removed)
+    assert len(diff["changed"]) == len(changed)
+
+    moved = len(diff["added"]) + len(diff["changed"])
+    print(f"Sessions: {len(first):,} -> {len(second):,} (best of {args.repeat})")
+    print(f"New {len(diff['added']):,}, ended {len(diff['removed']):,}, changed {len(diff['changed']):,}")
+    print(f"Row-by-row dict diff   {dict_time * 1000:>8.1f}ms")
+    print(f"SessionTracker.update  {tracker_time * 1000:>8.1f}ms  ({dict_time / tracker_time:.0f}x faster)")
+    print(f"Rows to re-render: {moved:,} of {len(second):,} ({moved / len(second):.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compare TABLESPACE_QUERY with the DBA_TABLESPACE_USAGE_METRICS fast path on
+a live database: both must return the same columns and tablespaces, and the
+numbers should agree (the metrics view is refreshed by MMON, so Used/Free MB
+can lag by a few minutes of growth).
+
+Usage:
+    python bench_tablespace_queries.py --env Development --db rundb1 [--repeat 3] [--tolerance 1.0]
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from db_conn import fetch_dataframe, get_oracle_connection
+from tablespace_queries import TABLESPACE_METRICS_QUERY, TABLESPACE_QUERY
+
+def timed_fetch(conn, sql, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = fetch_dataframe(conn, sql)
+        timings.append(time.perf_counter() - start)
+    return min(timings), df
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--env", required=True)
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=1.0,
+                        help="Largest acceptable difference in percentage points")
+    args = parser.parse_args()
+
+    conn = get_oracle_connection(args.env, args.db)
+    try:
+        full_time, full = timed_fetch(conn, TABLESPACE_QUERY, args.repeat)
+        fast_time, fast = timed_fetch(conn, TABLESPACE_METRICS_QUERY, args.repeat)
+    finally:
+        conn.close()
+
+    print(f"{args.env}/{args.db}: {len(full)} tablespaces (best of {args.repeat})")
+    print(f"TABLESPACE_QUERY          {full_time * 1000:>9.1f}ms")
+    print(f"TABLESPACE_METRICS_QUERY  {fast_time * 1000:>9.1f}ms  ({full_time / fast_time:.1f}x faster)")
+
+    ok = True
+    if list(full.columns) != list(fast.columns):
+        print(f"Column mismatch:\n  full: {list(full.columns)}\n  fast: {list(fast.columns)}")
+        return 1
+
+    names_full = set(full["Tablespace Name"])
+    names_fast = set(fast["Tablespace Name"])
+    if names_full != names_fast:
+        ok = False
+        print(f"Only in full query: {sorted(names_full - names_fast)}")
+        print(f"Only in fast query: {sorted(names_fast - names_full)}")
+
+    merged = pd.merge(full, fast, on="Tablespace Name", suffixes=("_full", "_fast"))
+    print(f"\n{'Column':<24}{'max abs diff':>14}")
+    for column in full.columns.drop("Tablespace Name"):
+        diff = (merged[f"{column}_full"].astype(float) - merged[f"{column}_fast"].astype(float)).abs()
+        print(f"{column:<24}{diff.max():>14.2f}")
+
+    drift = (merged["Percentage Used_full"].astype(float) - merged["Percentage Used_fast"].astype(float)).abs()
+    worst = merged.loc[drift > args.tolerance, "Tablespace Name"].tolist()
+    if worst:
+        ok = False
+        print(f"\nPercentage Used differs by more than {args.tolerance} points for: {worst}")
+
+    print("\nOK" if ok else "\nMISMATCH")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark: row-wise get_status/highlight_status against the
+vectorised tablespace_status/highlight_tablespaces on a synthetic frame.
+
+Usage:
+    python bench_tablespace_status.py [--rows 100000] [--repeat 3]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from tablespace_status import highlight_tablespaces, tablespace_status
+
+def get_status(row):
+    max_mb = row["Max MB"]
+    pct_free = row["Percentage Free"]
+    if pct_free <= (10 if max_mb < 1000 else 5):
+        return "Needs Extension"
+    return "Normal"
+
+def highlight_status(row):
+    max_mb = row["Max MB"]
+    pct_free = row["Percentage Free"]
+    avail_ext = row["Available Extension MB"]
+
+    if avail_ext < 10000:
+        if max_mb >= 1000 and pct_free <= 5:
+            color = "#ffcccc"
+        elif max_mb < 1000 and pct_free <= 10:
+            color = "#fff5cc"
+        else:
+            color = ""
+    else:
+        color = ""
+
+    return [f"background-color: {color}"] * len(row)
+
+def make_frame(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    max_mb = rng.choice([512.0, 2048.0, 32768.0, 65536.0], rows)
+    allocated = max_mb * rng.uniform(0.2, 1.0, rows)
+    free = allocated * rng.uniform(0.0, 0.5, rows)
+    return pd.DataFrame({
+        "Tablespace Name": [f"TS_{i:06d}" for i in range(rows)],
+        "Max MB": max_mb.round(2),
+        "Allocated MB": allocated.round(2),
+        "Free MB": free.round(2),
+        "Used MB": (allocated - free).round(2),
+        "Percentage Used": ((allocated - free) / allocated * 100).round(2),
+        "Available Extension MB": (max_mb - allocated).round(2),
+        "Percentage Free": (free / allocated * 100).round(2),
+    })
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    with_status = df.assign(Status=tablespace_status(df))
+
+    rowwise_status = best_of(args.repeat, lambda: df.apply(get_status, axis=1))
+    vector_status = best_of(args.repeat, lambda: tablespace_status(df))
+    rowwise_callback = best_of(args.repeat, lambda: with_status.apply(highlight_status, axis=1, result_type="expand"))
+    vector_callback = best_of(args.repeat, lambda: highlight_tablespaces(with_status))
+    # _compute() runs the style callbacks the way st.dataframe does when rendering
+    rowwise_style = best_of(args.repeat, lambda: with_status.style.apply(highlight_status, axis=1)._compute())
+    vector_style = best_of(args.repeat, lambda: with_status.style.apply(highlight_tablespaces, axis=None)._compute())
+
+    assert (df.apply(get_status, axis=1).to_numpy() == tablespace_status(df)).all()
+
+    print(f"Rows: {args.rows:,} (best of {args.repeat})")
+    print(f"{'':<18}{'row-wise':>12}{'vectorised':>12}{'speed-up':>10}")
+    print(f"{'Status':<18}{rowwise_status * 1000:>10.1f}ms{vector_status * 1000:>10.1f}ms{rowwise_status / vector_status:>9.0f}x")
+    print(f"{'Style callback':<18}{rowwise_callback * 1000:>10.1f}ms{vector_callback * 1000:>10.1f}ms{rowwise_callback / vector_callback:>9.0f}x")
+    print(f"{'Styler.apply':<18}{rowwise_style * 1000:>10.1f}ms{vector_style * 1000:>10.1f}ms{rowwise_style / vector_style:>9.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Columns of the root-blocker table, most waiters first
+ROOT_COLUMNS = ["ROOT_SID", "TOTAL_WAITERS", "DIRECT_WAITERS", "MAX_DEPTH"]
+
+def _blocker_map(df):
+    sids = df["SID"].to_numpy()
+    blockers = df["BLOCKING_SESSION"].to_numpy(dtype=float, na_value=np.nan)
+    waiting = ~np.isnan(blockers)
+    return dict(zip(sids[waiting].tolist(), blockers[waiting].astype(np.int64).tolist()))
+
+def resolve_chains(blocked_by):
+    """
+    Walk every wait-for edge once and find each waiter's root blocker and depth.
+
+    Each session is resolved at most once: the walk stops at the first
+    session whose root is already known, so the total work is linear in
+    the number of sessions. A walk that comes back to a session on its own
+    path has found a cycle.
+
+    Args:
+        blocked_by (dict): Waiting SID -> blocking SID
+
+    Returns:
+        tuple: ({sid: root sid, or None when the chain ends in a cycle},
+                {sid: depth, 0 for roots},
+                [cycles as lists of SIDs])
+    """
+    root, depth = {}, {}
+    cycles = []
+    for start in blocked_by:
+        if start in root:
+            continue
+        path, on_path = [], {}
+        node = start
+        while node not in root:
+            if node in on_path:
+                # Everything from the first visit of node onwards is a cycle
+                cycle = path[on_path[node]:]
+                cycles.append(cycle)
+                for member in cycle:
+                    root[member], depth[member] = None, 0
+                path = path[:on_path[node]]
+                break
+            if node not in blocked_by:
+                root[node], depth[node] = node, 0  # blocks others, waits on nobody
+                break
+            on_path[node] = len(path)
+            path.append(node)
+            node = blocked_by[node]
+        # Unwind: every session on the path inherits the root below it
+        below = node
+        for member in reversed(path):
+            root[member] = root[below]
+            depth[member] = depth[below] + 1
+            below = member
+    return root, depth, cycles
+
+def analyse_blocking(df):
+    """
+    Build the wait-for graph of a sessions frame and rank its root blockers.
+
+    Args:
+        df (DataFrame): SID and BLOCKING_SESSION columns, plus any session
+            details to carry into the root table (USERNAME, SQL_ID, ...)
+
+    Returns:
+        dict with
+            roots: DataFrame, one row per root blocker with TOTAL_WAITERS
+                (every session behind it), DIRECT_WAITERS (fan-out),
+                MAX_DEPTH (longest chain) and its session details,
+                sorted by TOTAL_WAITERS
+            sessions: df plus ROOT_SID and DEPTH columns
+            cycles: list of SID lists that block each other in a loop
+    """
+    blocked_by = _blocker_map(df)
+    root, depth, cycles = resolve_chains(blocked_by)
+
+    direct = Counter(blocked_by.values())
+    total, max_depth = Counter(), Counter()
+    for sid in blocked_by:
+        top = root[sid]
+        if top is None:
+            continue
+        total[top] += 1
+        max_depth[top] = max(max_depth[top], depth[sid])
+
+    roots = pd.DataFrame(
+        [(sid, total[sid], direct[sid], max_depth[sid]) for sid in total],
+        columns=ROOT_COLUMNS,
+    )
+    details = df.drop_duplicates("SID").set_index("SID").drop(columns=["BLOCKING_SESSION"])
+    roots = roots.join(details, on="ROOT_SID")
+    roots = roots.sort_values(["TOTAL_WAITERS", "MAX_DEPTH"], ascending=False, ignore_index=True)
+
+    sids = df["SID"].tolist()
+    sessions = df.assign(
+        ROOT_SID=pd.array([root.get(sid) for sid in sids], dtype="Int64"),
+        DEPTH=[depth.get(sid, 0) for sid in sids],
+    )
+    return {"roots": roots, "sessions": sessions, "cycles": cycles}
@@ -0,0 +1,150 @@
+"""
+Background SSH collector for the monitoring dashboards.
+
+Polls every host in credentials.csv on its own schedule and publishes the
+latest results to server_snapshot.json. app.py and combinedapp.py only read
+that snapshot, so rendering a page never triggers an SSH sweep.
+
+Every sweep is also kept in a HostMetricsStore, which writes each closed
+hour to the compressed metric archive the dashboards reload on startup.
+This daemon is the archive's only writer.
+
+Every database in cred.json also gets a tablespace usage sample each
+--tablespace-interval seconds, so the days-to-full forecasts do not
+depend on someone having the Tablespace view open.
+
+Usage:
+    python collector_daemon.py [--interval 60] [--csv credentials.csv]
+                               [--snapshot server_snapshot.json] [--workers 32]
+                               [--archive metric_archive] [--tablespace-interval 900] [--once]
+"""
+import argparse
+import logging
+import threading
+import time
+
+from db_conn import get_oracle_connection, load_db_config
+from db_fleet import FLEET_QUERY_TIMEOUT, call_timeout_ms, run_on_all_databases
+from host_metrics_store import ARCHIVE_KIND, HostMetricsStore
+from metric_archive import ARCHIVE_DIR, MetricArchive
+from server_collector import (
+    CSV_PATH,
+    SNAPSHOT_PATH,
+    SSH_SWEEP_WORKERS,
+    load_inventory,
+    sweep_hosts,
+    write_snapshot,
+)
+from tablespace_history import HISTORY_DB_PATH, MIN_SAMPLE_INTERVAL, record_tablespace_snapshot
+from tablespace_queries import query_tablespace_usage
+
+log = logging.getLogger("collector")
+
+def run_sweep(csv_path, snapshot_path, workers, store=None):
+    start = time.monotonic()
+    credentials = load_inventory(csv_path)
+    server_data = sweep_hosts(credentials, max_workers=workers)
+    duration = round(time.monotonic() - start, 2)
+    snapshot = write_snapshot(server_data, snapshot_path, duration=duration)
+    down = sum(1 for data in server_data if data["status"] == "DOWN")
+    log.info("Polled %d hosts (%d down) in %.2fs", len(server_data), down, duration)
+    if store is not None:
+        archive_sweep(store, snapshot)
+    return duration
+
+def archive_sweep(store, snapshot):
+    """Keep the sweep in the store and archive any hour that has closed; never fails the sweep."""
+    store.ingest_snapshot(snapshot)
+    store.prune()  # hosts gone from the inventory
+    try:
+        written = store.archive_pending()
+        store.archive.prune(ARCHIVE_KIND)
+    except OSError:
+        log.exception("Could not write the metric archive")
+        return
+    if written:
+        log.info("Archived %d chunk(s) to %s", written, store.archive.directory)
+
+def sample_tablespaces(db_configs=None, timeout=FLEET_QUERY_TIMEOUT, path=HISTORY_DB_PATH):
+    """
+    Record one tablespace usage sample for every database ({env: [db, ...]},
+    default: all of cred.json); a database that fails is logged and skipped.
+
+    Returns:
+        int: Number of tablespace rows written
+    """
+    if db_configs is None:
+        db_configs = {env: list(dbs) for env, dbs in load_db_config().items()}
+
+    def query(env, db):
+        conn = get_oracle_connection(env, db)
+        try:
+            conn.call_timeout = call_timeout_ms(timeout)
+            df = query_tablespace_usage(conn, key=(env, db))
+        finally:
+            conn.call_timeout = 0
+            conn.close()
+        # Half the usual spacing, so scheduling jitter never skips every other sample
+        return record_tablespace_snapshot(env, db, df, min_interval=MIN_SAMPLE_INTERVAL // 2, path=path)
+
+    results, errors = run_on_all_databases(db_configs, query, timeout=timeout)
+    for (env, db), message in errors.items():
+        log.warning("Tablespace sample of %s/%s failed: %s", env, db, message)
+    written = sum(results.values())
+    log.info("Sampled tablespaces of %d database(s), %d row(s) written", len(results), written)
+    return written
+
+def sample_tablespaces_forever(interval, stop):
+    """Run sample_tablespaces() every interval seconds until stop is set; never raises."""
+    while not stop.is_set():
+        started = time.monotonic()
+        try:
+            sample_tablespaces()
+        except Exception:
+            log.exception("Tablespace sampling failed")
+        stop.wait(max(0.0, interval - (time.monotonic() - started)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Background SSH collector for the monitoring dashboards")
+    parser.add_argument("--interval", type=float, default=60, help="Seconds between sweep starts")
+    parser.add_argument("--csv", default=CSV_PATH, help="Host inventory (Host, User, Password)")
+    parser.add_argument("--snapshot", default=SNAPSHOT_PATH, help="Where to publish the latest snapshot")
+    parser.add_argument("--workers", type=int, default=SSH_SWEEP_WORKERS, help="Concurrent SSH sessions")
+    parser.add_argument("--archive", default=ARCHIVE_DIR, help="Directory of the compressed metric archive")
+    parser.add_argument("--tablespace-interval", type=float, default=MIN_SAMPLE_INTERVAL,
+                        help="Seconds between tablespace usage samples (0 to disable)")
+    parser.add_argument("--once", action="store_true", help="Run a single sweep and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    # Only the raw rings are needed to write chunks; rollups are the dashboards' business
+    store = HostMetricsStore(levels=[], archive=MetricArchive(args.archive))
+    try:
+        store.restore_from_archive()
+    except OSError:
+        log.exception("Could not read the metric archive; starting empty")
+
+    # Database samples run beside the SSH sweeps, so a slow database never delays them
+    sample_tablespace_usage = args.tablespace_interval > 0
+    if sample_tablespace_usage and not args.once:
+        threading.Thread(target=sample_tablespaces_forever, args=(args.tablespace_interval, threading.Event()),
+                         name="tablespace-sampler", daemon=True).start()
+
+    while True:
+        started = time.monotonic()
+        try:
+            run_sweep(args.csv, args.snapshot, args.workers, store)
+        except Exception:
+            log.exception("Sweep failed; keeping the previous snapshot")
+        if args.once:
+            if sample_tablespace_usage:
+                try:
+                    sample_tablespaces()
+                except Exception:
+                    log.exception("Tablespace sampling failed")
+            break
+        time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,87 @@
 import streamlit as st
 import pandas as pd
-import paramiko
-import re
 import base64
 import os
-from streamlit_autorefresh import st_autorefresh
 from pathlib import Path
 from db_conn import get_oracle_connection
+from tablespace_history import (
+    forecast_days_to_full,
+    load_db_load_history,
+    load_tablespace_history,
+    record_db_load_sample,
+    record_tablespace_snapshot,
+)
+from tablespace_queries import query_tablespace_usage
+from tablespace_status import (
+    FORECAST_HORIZON_DAYS,
+    NEEDS_EXTENSION,
+    NEEDS_EXTENSION_SOON,
+    forecast_status,
+    highlight_tablespaces,
+    tablespace_status,
+)
+from db_fleet import FLEET_QUERY_TIMEOUT, call_timeout_ms, run_on_all_databases
+from server_collector import read_snapshot, snapshot_age_text
+from host_metrics_store import CPU, MEM_USED, get_store
+from snapshot_cache import cache_key, get_cache
+from sessions_data import (
+    DEFAULT_PAGE_SIZE,
+    PAGE_SIZES,
+    query_blocking_sessions,
+    query_filtered_summary,
+    query_sessions_page,
+    query_sessions_state,
+    query_sessions_summary,
+)
+from session_tracker import annotate_sessions, get_tracker
+from blocking_chains import analyse_blocking
+from session_sampler import SAMPLE_INTERVAL, WINDOWS, get_sampler
+from db_load import DB_LOAD_COLUMNS, query_db_load
 import socket
+import sqlite3
+import time
 
 # File paths 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOGO_PATH = os.path.join(BASE_DIR, 'SAIL_Logo.png')
-CSV_PATH = os.path.join(BASE_DIR, 'credentials.csv')
+
+# Row backgrounds per server status
+STATUS_ROW_STYLES = {
+    "CRITICAL": 'background: linear-gradient(145deg, #D32F2F, #F44336);',
+    "NEED ATTENTION": 'background: linear-gradient(145deg, #F57C00, #FF9800);',
+    "UP": 'background: linear-gradient(145deg, #388E3C, #4CAF50);',
+    "UNKNOWN": 'background: linear-gradient(145deg, #616161, #757575);',
+    "DOWN": 'background: linear-gradient(145deg, #8B0000, #B71C1C);',
+}
+
+# Warn when the collector has not published a snapshot for this long (seconds)
+SNAPSHOT_STALE_AFTER = 600
+
+# Upstream DB results are shared by every viewer and Streamlit worker on the
+# host through snapshot_cache, and refreshed at most this often (seconds)
+DB_CACHE_TTL = 300
+
+# Older results are still shown while a background refresh runs, up to this
+# age; past it viewers wait for the database again (seconds)
+DB_CACHE_MAX_STALE = 1800
+
+# Database load figures are 60-second v$sysmetric rates: refresh them that
+# often, and stop showing them once they are this old (seconds)
+DB_LOAD_TTL = 60
+DB_LOAD_MAX_STALE = 300
+
+# Metrics drawn as sparklines on the Database Load view
+DB_LOAD_TRENDS = ["Host CPU %", "DB Time/s", "Redo MB/s"]
+
+# How often the active session history panel redraws from the sampler (seconds)
+ASH_REFRESH_INTERVAL = 15
+
+# How often the server view re-reads the collector snapshot (seconds)
+SERVER_REFRESH_INTERVAL = 60
+
+# Trend windows offered on the server view (label -> seconds). Long ranges
+# are read from the store's rollups, so every window is a few hundred points.
+TREND_WINDOWS = {"15 min": 900, "1 h": 3600, "6 h": 21600, "1 day": 86400, "7 days": 604800, "30 days": 2592000}
 
 # Target filesystems to highlight
 TARGET_FS = ["/dev/sdal", "tmpfs", "/dev/sda2", "/dev/sda4"]
@@ -24,77 +93,6 @@ DB_CONFIGS = {
     "Production": ["ProdDB1", "ProdDB2"]
 }
 
-# Tablespace SQL Query
-TABLESPACE_QUERY = """
-WITH ts_alloc AS (
-  SELECT
-    tablespace_name,
-    SUM(bytes) / 1024 / 1024 AS allocated_mb,
-    SUM(DECODE(autoextensible, 'YES', maxbytes, bytes)) / 1024 / 1024 AS max_mb
-  FROM dba_data_files
-  GROUP BY tablespace_name
-),
-ts_free AS (
-  SELECT
-    tablespace_name,
-    SUM(bytes) / 1024 / 1024 AS free_mb
-  FROM dba_free_space
-  GROUP BY tablespace_name
-),
-ts_autoextend AS (
-  SELECT
-    tablespace_name,
-    SUM(DECODE(autoextensible, 'YES', maxbytes - bytes, 0)) / 1024 / 1024 AS available_extension_mb
-  FROM dba_data_files
-  GROUP BY tablespace_name
-)
-SELECT
-  a.tablespace_name AS "Tablespace Name",
-  ROUND(a.max_mb, 2) AS "Max MB",
-  ROUND(a.allocated_mb, 2) AS "Allocated MB",
-  ROUND(NVL(f.free_mb, 0), 2) AS "Free MB",
-  ROUND((a.allocated_mb - NVL(f.free_mb, 0)), 2) AS "Used MB",
-  CASE
-    WHEN a.allocated_mb = 0 THEN 0
-    ELSE ROUND(((a.allocated_mb - NVL(f.free_mb, 0)) / a.allocated_mb) * 100, 2)
-  END AS "Percentage Used",
-  ROUND(NVL(x.available_extension_mb, 0), 2) AS "Available Extension MB",
-  CASE
-    WHEN a.allocated_mb = 0 THEN 0
-    ELSE ROUND((NVL(f.free_mb, 0) / a.allocated_mb) * 100, 2)
-  END AS "Percentage Free"
-FROM ts_alloc a
-LEFT JOIN ts_free f ON a.tablespace_name = f.tablespace_name
-LEFT JOIN ts_autoextend x ON a.tablespace_name = x.tablespace_name
-ORDER BY a.tablespace_name
-"""
-
-# Sessions SQL Query
-SESSIONS_QUERY = """
-SELECT 
-    s.sid,
-    s.serial#,
-    s.username,
-    s.status,
-    s.osuser,
-    s.machine,
-    s.program,
-    s.module,
-    s.action,
-    TO_CHAR(s.logon_time, 'DD-MON-YYYY HH24:MI:SS') AS logon_time,
-    ROUND((SYSDATE - s.logon_time) * 24, 2) AS hours_connected,
-    s.blocking_session,
-    s.sql_id,
-    s.prev_sql_id,
-    ROUND(st.value/1024/1024, 2) AS memory_mb
-FROM v$session s
-LEFT JOIN v$sesstat st ON s.sid = st.sid AND st.statistic# = (
-    SELECT statistic# FROM v$statname WHERE name = 'session pga memory'
-)
-WHERE s.type = 'USER'
-ORDER BY s.status DESC, s.logon_time DESC
-"""
-
 # === Enhanced Styling ===
 def apply_custom_style():
     st.markdown("""
@@ -218,104 +216,6 @@ def encode_image(image_path):
         return None
 
 # === Server Monitoring Functions ===
-def read_credentials(path):
-    try:
-        df = pd.read_csv(path)
-        required_cols = ["Host", "User", "Password"]
-        if not all(col in df.columns for col in required_cols):
-            st.error(f"CSV must contain: {required_cols}")
-            return []
-        return df.to_dict(orient="records")
-    except Exception as e:
-        st.error(f"Error reading CSV: {e}")
-        return []
-
-def ssh_exec(client, cmd):
-    stdin, stdout, stderr = client.exec_command(cmd)
-    return stdout.read().decode()
-
-def parse_cpu_linux(client):
-    try:
-        output = ssh_exec(client, "uname")
-        if "HP-UX" in output:
-            output = ssh_exec(client, "sar 1 1 | tail -1")
-            parts = output.split()
-            if len(parts) >= 5:
-                idle = float(parts[-1])
-                return round(100 - idle, 2)
-        elif "AIX" in output or "SunOS" in output:
-            output = ssh_exec(client, "vmstat 1 2 | tail -1")
-            parts = output.split()
-            if len(parts) >= 15:
-                idle = float(parts[14])
-                return round(100 - idle, 2)
-        else:
-            output = ssh_exec(client, "top -bn1 | grep '%Cpu' || mpstat 1 1")
-            idle_match = re.search(r'(\d+.\d+)\s*id', output)
-            if idle_match:
-                idle = float(idle_match.group(1))
-                return round(100 - idle, 2)
-    except:
-        return None
-    return None
-
-def parse_mem_linux(client):
-    try:
-        os_check = ssh_exec(client, "uname")
-        if "HP-UX" in os_check:
-            return 1024, 512, 512, 0  # Placeholder
-        elif "AIX" in os_check or "SunOS" in os_check:
-            output = ssh_exec(client, "vmstat")
-            lines = output.strip().splitlines()
-            if len(lines) >= 3:
-                parts = lines[-1].split()
-                if len(parts) >= 5:
-                    free = int(parts[4]) // 1024
-                    total = 1024
-                    used = total - free
-                    return total, used, free, 0
-        else:
-            output = ssh_exec(client, "free -m")
-            lines = output.splitlines()
-            for line in lines:
-                if line.lower().startswith("mem:"):
-                    parts = line.split()
-                    total = int(parts[1])
-                    used = int(parts[2])
-                    free = int(parts[3])
-                    buff_cache = int(parts[5]) if len(parts) > 5 else 0
-                    return total, used, free, buff_cache
-    except:
-        return None, None, None, None
-    return None, None, None, None
-
-def parse_filesystem(client):
-    try:
-        os_type = ssh_exec(client, "uname").strip()
-        if "HP-UX" in os_type:
-            output = ssh_exec(client, "bdf")
-        elif "AIX" in os_type or "SunOS" in os_type:
-            output = ssh_exec(client, "df -k")
-        else:
-            output = ssh_exec(client, "df -h")
-
-        fs_list = []
-        lines = output.strip().splitlines()
-        for line in lines[1:]:
-            parts = line.split()
-            if len(parts) >= 6:
-                fs_list.append({
-                    "Filesystem": parts[0],
-                    "Size": parts[1],
-                    "Used": parts[2],
-                    "Available": parts[3],
-                    "Use%": parts[4],
-                    "Mounted on": parts[5]
-                })
-        return fs_list
-    except:
-        return []
-
 def colorize_usage(value):
     try:
         val = float(value)
@@ -327,39 +227,196 @@ def colorize_usage(value):
         return '#9E9E9E'
 
 # === Database Functions ===
-def get_status(row):
-    max_mb = row["Max MB"]
-    pct_free = row["Percentage Free"]
-    if pct_free <= (10 if max_mb < 1000 else 5):
-        return "Needs Extension"
-    return "Normal"
-
-def highlight_status(row):
-    max_mb = row["Max MB"]
-    pct_free = row["Percentage Free"]
-    avail_ext = row["Available Extension MB"]
-
-    if avail_ext < 10000:
-        if max_mb >= 1000 and pct_free <= 5:
-            color = "#ffcccc"  # Light red
-        elif max_mb < 1000 and pct_free <= 10:
-            color = "#fff5cc"  # Light yellow
-        else:
-            color = ""
-    else:
-        color = ""
+def query_tablespace_data(env, db, call_timeout=0):
+    conn = get_oracle_connection(env, db)
+    try:
+        conn.call_timeout = call_timeout
+        df = query_tablespace_usage(conn, key=(env, db))
+    finally:
+        conn.call_timeout = 0
+        conn.close()
+
+    try:
+        record_tablespace_snapshot(env, db, df)
+    except sqlite3.Error:
+        pass  # History is best effort; never fail the live view because of it
+    return df
 
-    return [f"background-color: {color}"] * len(row)
+def query_db_load_data(env, db, call_timeout=0):
+    conn = get_oracle_connection(env, db)
+    try:
+        conn.call_timeout = call_timeout
+        load = query_db_load(conn)
+    finally:
+        conn.call_timeout = 0
+        conn.close()
+
+    try:
+        record_db_load_sample(env, db, load)
+    except sqlite3.Error:
+        pass  # History is best effort; never fail the live view because of it
+    return load
+
+def shared_query(compute, *key_parts):
+    """
+    Run compute() at most once per DB_CACHE_TTL across all viewers and workers.
+
+    Once the TTL runs out the last good result keeps being served while one
+    viewer refreshes it in the background, so nobody waits on a slow or
+    failing database until the result is DB_CACHE_MAX_STALE old.
+
+    Returns:
+        tuple: (result, time.time() at which it was fetched)
+    """
+    return get_cache().get_or_refresh(cache_key(*key_parts), compute, DB_CACHE_TTL, DB_CACHE_MAX_STALE)
+
+def last_updated_footer(fetched_at, ttl=DB_CACHE_TTL):
+    if fetched_at is None:
+        return
+    age_text = snapshot_age_text(fetched_at)
+    color = "#B3E5FC"
+    if time.time() - fetched_at > ttl:
+        # Served from cache while a background refresh is pending or failing
+        age_text += ", refreshing"
+        color = "#FFB74D"
+    st.markdown(
+        f"<div style='text-align:right; color:{color}; font-size:0.8em; margin-top: 15px;'>Last updated: {pd.Timestamp.fromtimestamp(fetched_at).strftime('%Y-%m-%d %H:%M:%S')} ({age_text})</div>",
+        unsafe_allow_html=True
+    )
+
+def query_with_connection(env, db, query, *args):
+    conn = get_oracle_connection(env, db)
+    try:
+        return query(conn, *args)
+    finally:
+        conn.close()
+
+def fetch_tablespace_data(env, db):
+    try:
+        return shared_query(lambda: query_tablespace_data(env, db), "tablespace", env, db)
+    except Exception as e:
+        st.error(f"Error fetching tablespace data: {e}")
+        return pd.DataFrame(), None
 
 @st.cache_data(ttl=300)
+def fetch_tablespace_forecast(env, db):
+    try:
+        return forecast_days_to_full(load_tablespace_history(env, db))
+    except sqlite3.Error:
+        return forecast_days_to_full(pd.DataFrame())
+
+def fetch_fleet_tablespaces(timeout=FLEET_QUERY_TIMEOUT):
+    """
+    Run the tablespace usage report against every database in DB_CONFIGS at once.
+
+    Returns:
+        tuple: (combined DataFrame with Environment/Database columns,
+                {"env/db": error message} for databases that failed or timed out,
+                fetch time of the oldest result or None)
+    """
+    def query(env, db):
+        return shared_query(
+            lambda: query_tablespace_data(env, db, call_timeout=call_timeout_ms(timeout)),
+            "tablespace", env, db,
+        )
+
+    results, errors = run_on_all_databases(DB_CONFIGS, query, timeout=timeout)
+    frames = []
+    for (env, db), (df, _) in results.items():
+        if not df.empty:
+            frames.append(df.assign(Environment=env, Database=db))
+    combined = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    oldest = min((fetched_at for _, fetched_at in results.values()), default=None)
+    return combined, {f"{env}/{db}": message for (env, db), message in errors.items()}, oldest
+
+def fetch_fleet_db_load(timeout=FLEET_QUERY_TIMEOUT):
+    """
+    Read the v$sysmetric load figures of every database in DB_CONFIGS at once.
+
+    Returns:
+        tuple: (DataFrame with Environment, Database and DB_LOAD_COLUMNS,
+                {"env/db": error message} for databases that failed or timed out,
+                fetch time of the oldest result or None)
+    """
+    def query(env, db):
+        return get_cache().get_or_refresh(
+            cache_key("db_load", env, db),
+            lambda: query_db_load_data(env, db, call_timeout=call_timeout_ms(timeout)),
+            DB_LOAD_TTL, DB_LOAD_MAX_STALE,
+        )
+
+    results, errors = run_on_all_databases(DB_CONFIGS, query, timeout=timeout)
+    rows = [{"Environment": env, "Database": db, **load} for (env, db), (load, _) in results.items()]
+    df = pd.DataFrame(rows, columns=["Environment", "Database", *DB_LOAD_COLUMNS, "Interval End"])
+    df = df.astype(dict.fromkeys(DB_LOAD_COLUMNS, float))
+    oldest = min((fetched_at for _, fetched_at in results.values()), default=None)
+    return df, {f"{env}/{db}": message for (env, db), message in errors.items()}, oldest
 
+@st.cache_data(ttl=DB_LOAD_TTL)
+def fetch_db_load_history(env, db):
+    try:
+        return load_db_load_history(env, db)
+    except sqlite3.Error:
+        return pd.DataFrame(columns=["ts"])
+
+def fetch_sessions_summary(env, db):
+    try:
+        return shared_query(
+            lambda: query_with_connection(env, db, query_sessions_summary),
+            "sessions_summary", env, db,
+        )
+    except Exception as e:
         st.error(f"Error fetching sessions data: {e}")
-        return pd.DataFrame()
+        return pd.DataFrame(), None
 
-@st.cache_data(ttl=300)
-def fetch_db_info(env, db):
+def fetch_session_changes(env, db, sids):
+    """Diff of the latest state of the sessions on sids against what was last seen of them, or None."""
+    sids = tuple(sorted(int(sid) for sid in sids))
+    try:
+        state, fetched_at = shared_query(
+            lambda: query_with_connection(env, db, query_sessions_state, sids),
+            "sessions_state", env, db, sids,
+        )
+    except Exception as e:
+        st.error(f"Error fetching session changes: {e}")
+        return None
+    return get_tracker(env, db).update(state, fetched_at, sids=sids)
+
+def fetch_blocking_chains(env, db):
+    try:
+        sessions, _ = shared_query(
+            lambda: query_with_connection(env, db, query_blocking_sessions),
+            "blocking_sessions", env, db,
+        )
+    except Exception as e:
+        st.error(f"Error fetching blocking sessions: {e}")
+        return None
+    return analyse_blocking(sessions)
+
+def fetch_filtered_sessions_summary(env, db, statuses, usernames, min_hours):
+    try:
+        return shared_query(
+            lambda: query_with_connection(env, db, query_filtered_summary, statuses, usernames, min_hours),
+            "sessions_filtered_summary", env, db, statuses, usernames, min_hours,
+        )
+    except Exception as e:
+        st.error(f"Error fetching sessions data: {e}")
+        return pd.DataFrame(columns=["USERNAME", "STATUS", "SESSION_COUNT"]), None
+
+def fetch_sessions_page(env, db, statuses, usernames, min_hours, page_size, after):
+    try:
+        return shared_query(
+            lambda: query_with_connection(env, db, query_sessions_page, statuses, usernames, min_hours,
+                                          page_size, after),
+            "sessions_page", env, db, statuses, usernames, min_hours, page_size, after,
+        )
+    except Exception as e:
+        st.error(f"Error fetching sessions data: {e}")
+        return (pd.DataFrame(), None), None
+
+def query_db_info(env, db):
+    conn = get_oracle_connection(env, db)
     try:
-        conn = get_oracle_connection(env, db)
         cursor = conn.cursor()
 
         cursor.execute("SELECT sys_context('USERENV','DB_NAME') FROM dual")
@@ -368,100 +425,117 @@ def fetch_db_info(env, db):
         cursor.execute("SELECT sys_context('USERENV','SERVER_HOST') FROM dual")
         host = cursor.fetchone()[0]
 
-        try:
-            ip = socket.gethostbyname(host)
-        except:
-            ip = "Unavailable"
-
         cursor.close()
+    finally:
         conn.close()
-        return db_name, ip
+
+    try:
+        ip = socket.gethostbyname(host)
+    except:
+        ip = "Unavailable"
+    return db_name, ip
+
+def fetch_db_info(env, db):
+    try:
+        return shared_query(lambda: query_db_info(env, db), "db_info", env, db)[0]
     except Exception as e:
         return "Unknown", "Unknown"
 
+def session_changes_panel(changes):
+    """New, ended and changed sessions from a tracker diff; only those rows are listed."""
+    if changes is None:
+        return
+    if changes["previous_time"] is None:
+        st.caption("Tracking changes to the sessions on this page from the next refresh.")
+        return
+    since = pd.Timestamp.fromtimestamp(changes["previous_time"]).strftime('%H:%M:%S')
+    st.markdown(f"#### 🔄 Changes on This Page Since {since}")
+    chg1, chg2, chg3, chg4 = st.columns(4)
+    chg1.metric(label="New Sessions", value=len(changes["added"]))
+    chg2.metric(label="Ended Sessions", value=len(changes["removed"]))
+    chg3.metric(label="Changed Sessions", value=len(changes["changed"]))
+    chg4.metric(label="PGA Change", value=f"{changes['pga_delta'].sum():+,.1f} MB")
+
+    # Only the rows that moved, not the whole session list
+    moved = changes["change"] != ""
+    if moved.any():
+        with st.expander(f"New and changed sessions ({int(moved.sum())})"):
+            moved_df = pd.concat([changes["added"], changes["changed"]]).reset_index()
+            moved_df = annotate_sessions(moved_df, changes).sort_values("PGA Delta MB", ascending=False)
+            st.dataframe(moved_df.style.format({'MEMORY_MB': '{:.2f}', 'PGA Delta MB': '{:+.2f}'}, na_rep=""),
+                         use_container_width=True, hide_index=True)
+    if not changes["removed"].empty:
+        with st.expander(f"Ended sessions ({len(changes['removed'])})"):
+            st.dataframe(changes["removed"].reset_index(), use_container_width=True, hide_index=True)
+
+def render_host_trend(store, host, trend_label):
+    """CPU and memory trend for one host at the resolution that fits the window."""
+    trend_window = TREND_WINDOWS[trend_label]
+    cpu_trend = store.history(host, CPU, trend_window)
+    if len(cpu_trend) <= 1:
+        st.caption(f"No trend data for {host} over {trend_label} yet.")
+        return
+    if cpu_trend.attrs["resolution"] == 0:
+        cpu_stats = store.stats(host, CPU, trend_window)
+        p95_text = f' | p95 {cpu_stats["p95"]:.1f}%' if cpu_stats["p95"] is not None else ""
+        resolution_text = "raw samples"
+    else:
+        p95_text = ""
+        resolution_text = f'{cpu_trend.attrs["resolution"] // 60} min rollups'
+    st.markdown(f'<div style="color:#E3F2FD; margin-top: 10px;">📈 {host} CPU over {trend_label}: max {cpu_trend["max"].max():.1f}%{p95_text} | mean {cpu_trend["mean"].mean():.1f}% ({resolution_text})</div>', unsafe_allow_html=True)
+    mem_trend = store.history(host, MEM_USED, trend_window)
+    trend_col1, trend_col2 = st.columns(2)
+    with trend_col1:
+        st.line_chart(cpu_trend[["mean", "max"]].rename(columns={"mean": "CPU % (mean)", "max": "CPU % (max)"}), height=150)
+    with trend_col2:
+        st.line_chart(mem_trend["mean"].rename("Memory Used MB"), height=150)
+
+
 # === Tab Functions ===
+# Each view is a fragment: its widgets and its timer rerun only that view,
+# not the header or the other views.
+@st.fragment(run_every=SERVER_REFRESH_INTERVAL)
 def server_monitoring_tab():
-    st_autorefresh(interval=300000, key="refresh_key")  # 5 minutes
-    
     st.markdown("### 🖥️ Server Health Monitoring")
     
-    credentials = read_credentials(CSV_PATH)
-    if not credentials:
-        st.warning("No server credentials found.")
+    snapshot = read_snapshot()
+    if snapshot is None:
+        st.warning("No server snapshot available yet. Start the collector with `python collector_daemon.py`.")
         return
 
-    server_data = []
-
-    for cred in credentials:
-        host = cred["Host"]
-        user = cred["User"]
-        password = cred["Password"]
-
-        try:
-            client = paramiko.SSHClient()
-            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            client.connect(hostname=host, username=user, password=password, timeout=7)
-
-            cpu = parse_cpu_linux(client)
-            cpu_color = colorize_usage(cpu) if cpu is not None else '#9E9E9E'
-
-            if cpu is not None:
-                if cpu >= 90:
-                    row_style = 'background: linear-gradient(145deg, #D32F2F, #F44336);'
-                    status = 'CRITICAL'
-                    status_level = 0
-                elif cpu >= 80:
-                    row_style = 'background: linear-gradient(145deg, #F57C00, #FF9800);'
-                    status = 'NEED ATTENTION'
-                    status_level = 1
-                else:
-                    row_style = 'background: linear-gradient(145deg, #388E3C, #4CAF50);'
-                    status = 'UP'
-                    status_level = 2
-            else:
-                row_style = 'background: linear-gradient(145deg, #616161, #757575);'
-                status = 'UNKNOWN'
-                status_level = 3
-
-            mem = parse_mem_linux(client)
-            fs = parse_filesystem(client)
-
-            server_data.append({
-                "host": host,
-                "client": client,
-                "cpu": cpu,
-                "cpu_color": cpu_color,
-                "mem": mem,
-                "fs": fs,
-                "status": status,
-                "row_style": row_style,
-                "status_level": status_level
-            })
-
-        except Exception:
-            server_data.append({
-                "host": host,
-                "cpu": None,
-                "cpu_color": "#9E9E9E",
-                "mem": (None, None, None, None),
-                "fs": [],
-                "status": "DOWN",
-                "row_style": 'background: linear-gradient(145deg, #8B0000, #B71C1C);',
-                "status_level": 4,
-                "client": None
-            })
-
-    server_data.sort(key=lambda x: x["status_level"])
+    collected_at = snapshot["collected_at"]
+    st.markdown(
+        f"<div style='color:#B3E5FC; font-size:0.85em;'>Collected {pd.Timestamp.fromtimestamp(collected_at).strftime('%Y-%m-%d %H:%M:%S')} ({snapshot_age_text(collected_at)})</div>",
+        unsafe_allow_html=True
+    )
+    if time.time() - collected_at > SNAPSHOT_STALE_AFTER:
+        st.warning("Server snapshot is stale. Check that collector_daemon.py is running.")
+
+    # The store follows the snapshot on its own; this view only reads it
+    store = get_store()
+    if store.restoring:
+        st.caption("Reloading older history from the metric archive; trends fill in over the next few refreshes.")
+    server_data = sorted(snapshot["servers"], key=lambda x: x["status_level"])
+
+    # One trend panel for the host the user picks; charting every host on
+    # each refresh costs two history queries and two charts per host
+    up_hosts = [data["host"] for data in server_data if data["status"] != "DOWN"]
+    if up_hosts:
+        trend_col1, trend_col2 = st.columns([1, 2])
+        with trend_col1:
+            trend_host = st.selectbox("Trend host", up_hosts, key="server_trend_host")
+        with trend_col2:
+            trend_label = st.radio("Trend window", list(TREND_WINDOWS), horizontal=True, key="server_trend_window")
+        render_host_trend(store, trend_host, trend_label)
 
     for data in server_data:
         host = data["host"]
         cpu = data["cpu"]
-        cpu_color = data["cpu_color"]
-        row_style = data["row_style"]
+        cpu_color = colorize_usage(cpu) if cpu is not None else '#9E9E9E'
         status = data["status"]
+        row_style = STATUS_ROW_STYLES[status]
         total, used, free, buff_cache = data["mem"]
         fs = data["fs"]
-        client = data["client"]
 
         if status == "DOWN":
             st.markdown(f"""
@@ -522,10 +596,8 @@ def server_monitoring_tab():
                 st.markdown('<div style="color:#FFA726;">📁 No filesystem info available.</div>', unsafe_allow_html=True)
 
             st.markdown('</div>', unsafe_allow_html=True)
-            
-            if client:
-                client.close()
 
+@st.fragment
 def database_monitoring_tab():
     st.markdown("### 🗄️ Oracle Database Tablespace Monitoring")
     
@@ -552,25 +624,30 @@ def database_monitoring_tab():
         </div>
         """, unsafe_allow_html=True)
 
-        df = fetch_tablespace_data(selected_env, selected_db)
+        df, fetched_at = fetch_tablespace_data(selected_env, selected_db)
         if df.empty:
             st.warning("No tablespace data available.")
             return
 
-        df["Status"] = df.apply(get_status, axis=1)
+        forecast = fetch_tablespace_forecast(selected_env, selected_db)
+        df["Growth MB/Day"] = df["Tablespace Name"].map(forecast["Growth MB/Day"])
+        df["Days To Full"] = df["Tablespace Name"].map(forecast["Days To Full"])
+        df["Status"] = forecast_status(tablespace_status(df), df["Days To Full"])
 
         total_ts = len(df)
-        needs_ext = (df["Status"] == "Needs Extension").sum()
+        needs_ext = (df["Status"] == NEEDS_EXTENSION).sum()
+        needs_ext_soon = (df["Status"] == NEEDS_EXTENSION_SOON).sum()
 
         # KPI Metrics
-        kpi1, kpi2, kpi3 = st.columns(3)
+        kpi1, kpi2, kpi3, kpi4 = st.columns(4)
         kpi1.metric(label="Total Tablespaces", value=total_ts)
         kpi2.metric(label="Needs Extension", value=needs_ext, delta=f"{(needs_ext/total_ts)*100:.1f}%" if total_ts else "0%")
-        kpi3.metric(label="Normal", value=total_ts - needs_ext)
+        kpi3.metric(label=f"Full Within {FORECAST_HORIZON_DAYS} Days", value=needs_ext_soon)
+        kpi4.metric(label="Normal", value=total_ts - needs_ext - needs_ext_soon)
 
         st.markdown("---")
 
-        styled_df = df.style.apply(highlight_status, axis=1).format({
+        styled_df = df.style.apply(highlight_tablespaces, axis=None).format({
             "Max MB": "{:,.0f}",
             "Allocated MB": "{:,.0f}",
             "Free MB": "{:,.0f}",
@@ -578,19 +655,150 @@ def database_monitoring_tab():
             "Percentage Used": "{:.2f}%",
             "Available Extension MB": "{:,.0f}",
             "Percentage Free": "{:.2f}%",
-        })
+            "Growth MB/Day": "{:,.1f}",
+            "Days To Full": "{:,.0f}",
+        }, na_rep="—")
 
         st.dataframe(styled_df, height=500, use_container_width=True)
 
-        st.markdown(
-            f"<div style='text-align:right; color:#B3E5FC; font-size:0.8em; margin-top: 15px;'>Last updated: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}</div>",
-            unsafe_allow_html=True
-        )
+        last_updated_footer(fetched_at)
     else:
         st.info("Please select a database.")
 
+@st.fragment
+def fleet_tablespace_tab():
+    st.markdown("### 🌐 Fleet Tablespace Overview")
+    st.markdown("Tablespaces that **Need Extension** across every configured database.")
+
+    df, errors, fetched_at = fetch_fleet_tablespaces()
+    total_dbs = sum(len(dbs) for dbs in DB_CONFIGS.values())
+
+    if df.empty:
+        needs_ext_df = df
+    else:
+        df["Status"] = tablespace_status(df)
+        needs_ext_df = df[df["Status"] == NEEDS_EXTENSION]
+
+    kpi1, kpi2, kpi3 = st.columns(3)
+    kpi1.metric(label="Databases Reporting", value=f"{total_dbs - len(errors)} / {total_dbs}")
+    kpi2.metric(label="Total Tablespaces", value=len(df))
+    kpi3.metric(label="Needs Extension", value=len(needs_ext_df))
+
+    if errors:
+        with st.expander(f"⚠️ {len(errors)} database(s) unavailable", expanded=False):
+            for name, message in errors.items():
+                st.markdown(f"**{name}**: {message}")
+
+    st.markdown("---")
+
+    if needs_ext_df.empty:
+        st.success("No tablespace needs extension.")
+    else:
+        cols = ["Environment", "Database"] + [c for c in needs_ext_df.columns if c not in ("Environment", "Database")]
+        needs_ext_df = needs_ext_df[cols].sort_values(["Percentage Free", "Environment", "Database"])
+        styled_df = needs_ext_df.style.apply(highlight_tablespaces, axis=None).format({
+            "Max MB": "{:,.0f}",
+            "Allocated MB": "{:,.0f}",
+            "Free MB": "{:,.0f}",
+            "Used MB": "{:,.0f}",
+            "Percentage Used": "{:.2f}%",
+            "Available Extension MB": "{:,.0f}",
+            "Percentage Free": "{:.2f}%",
+        })
+        st.dataframe(styled_df, height=500, use_container_width=True, hide_index=True)
+
+    last_updated_footer(fetched_at)
+
+@st.fragment(run_every=DB_LOAD_TTL)
+def database_load_tab():
+    st.markdown("### 📊 Database Load")
+    st.markdown("Host CPU, DB time and I/O rates of every configured database over the last minute.")
+
+    df, errors, fetched_at = fetch_fleet_db_load()
+    total_dbs = sum(len(dbs) for dbs in DB_CONFIGS.values())
+
+    kpi1, kpi2, kpi3 = st.columns(3)
+    kpi1.metric(label="Databases Reporting", value=f"{total_dbs - len(errors)} / {total_dbs}")
+    kpi2.metric(label="Total DB Time/s", value=f"{df['DB Time/s'].sum():,.2f}")
+    kpi3.metric(label="Busiest Host CPU", value=f"{df['Host CPU %'].max():.1f}%" if df["Host CPU %"].notna().any() else "N/A")
+
+    if errors:
+        with st.expander(f"⚠️ {len(errors)} database(s) unavailable", expanded=False):
+            for name, message in errors.items():
+                st.markdown(f"**{name}**: {message}")
+
+    st.markdown("---")
+
+    if df.empty:
+        st.warning("No database load data available.")
+        return
+
+    # Sparklines from the local history store, one list of points per cell
+    histories = [fetch_db_load_history(env, db) for env, db in zip(df["Environment"], df["Database"])]
+    column_config = {}
+    for metric in DB_LOAD_TRENDS:
+        trend = f"{metric} Trend"
+        df[trend] = [h[metric].dropna().tolist() if metric in h else [] for h in histories]
+        column_config[trend] = st.column_config.LineChartColumn(trend, width="small")
+
+    df = df.sort_values("DB Time/s", ascending=False, na_position="last")
+    styled_df = df.style.format({
+        "Host CPU %": "{:.1f}%",
+        "DB Time/s": "{:,.2f}",
+        "Read MB/s": "{:,.2f}",
+        "Write MB/s": "{:,.2f}",
+        "Redo MB/s": "{:,.2f}",
+        "Logons/s": "{:,.2f}",
+    }, na_rep="—")
+    st.dataframe(styled_df, column_config=column_config, use_container_width=True, hide_index=True)
+
+    last_updated_footer(fetched_at, ttl=DB_LOAD_TTL)
+
+@st.fragment(run_every=ASH_REFRESH_INTERVAL)
+def active_session_history_panel(env, db):
+    """Top SQL and wait classes from the in-memory sampler; never queries the DB itself."""
+    sampler = get_sampler(env, db)
+    st.markdown("#### 📈 Active Session History")
+    window_label = st.radio("Window", list(WINDOWS), horizontal=True, key="ash_window")
+    window = WINDOWS[window_label]
+
+    top_sql = sampler.top_sql(window)
+    if top_sql.empty:
+        st.caption(f"Sampling active sessions every {SAMPLE_INTERVAL}s; nothing active in the last {window_label} yet.")
+        return
+
+    covered = sampler.coverage(window)
+    if covered < window:
+        st.caption(f"Busy instance: the sample buffer holds only the last {covered / 60:.0f} min, "
+                   f"so these figures cover that span instead of {window_label}.")
+
+    col_sql, col_wait = st.columns(2)
+    with col_sql:
+        st.markdown("**Top SQL**")
+        st.dataframe(top_sql, use_container_width=True, hide_index=True)
+    with col_wait:
+        st.markdown("**Top Wait Classes**")
+        st.dataframe(sampler.top_wait_classes(window), use_container_width=True, hide_index=True)
+
+@st.fragment
 def sessions_monitoring_tab():
-yle='color: #FFFFFF; font-size: 0.9rem;'><strong>Environment:</strong> <span style='color: #FFFFFF;'>{selected_env}</span></span>
+    st.markdown("### 👥 Oracle Database Sessions Monitoring")
+
+    # Database selection
+    col1, col2 = st.columns(2)
+    with col1:
+        selected_env = st.selectbox("Select Database Environment", list(DB_CONFIGS.keys()), key="sessions_env")
+    with col2:
+        db_list = DB_CONFIGS[selected_env]
+        selected_db = st.selectbox("Select Database", db_list, key="sessions_db")
+
+    if selected_db:
+        db_name, ip_address = fetch_db_info(selected_env, selected_db)
+
+        st.markdown(f"""
+        <div style='background: linear-gradient(145deg, #1565C0, #1E88E5); border: 1px solid #42A5F5; border-radius: 8px; padding: 12px; margin: 10px 0; box-shadow: 0 4px 10px rgba(0,0,0,0.2);'>
+            <div style='display: flex; justify-content: space-between; align-items: center; flex-wrap: wrap; gap: 15px;'>
+                <span style='color: #FFFFFF; font-size: 0.9rem;'><strong>Environment:</strong> <span style='color: #FFFFFF;'>{selected_env}</span></span>
                 <span style='color: #FFFFFF ; font-size: 0.9rem;'><strong>Database:</strong> <span style='color: #FFFFFF ;'>{selected_db}</span></span>
                 <span style='color: #FFFFFF ; font-size: 0.9rem;'><strong>DB Name:</strong> <span style='color: #FFFFFF ;'>{db_name}</span></span>
                 <span style='color: #FFFFFF ; font-size: 0.9rem;'><strong>Server IP:</strong> <span style='color: #FFFFFF ;'>{ip_address}</span></span>
@@ -598,16 +806,17 @@ yle='color: #FFFFFF; font-size: 0.9rem;'><strong>Environment:</strong> <span sty
         </div>
         """, unsafe_allow_html=True)
 
-        df_sessions = fetch_sessions_data(selected_env, selected_db)
-        if df_sessions.empty:
+        summary, fetched_at = fetch_sessions_summary(selected_env, selected_db)
+        if summary.empty:
             st.warning("No session data available.")
             return
 
         # Session Statistics
-        total_sessions = len(df_sessions)
-        active_sessions = len(df_sessions[df_sessions['STATUS'] == 'ACTIVE'])
-        inactive_sessions = len(df_sessions[df_sessions['STATUS'] == 'INACTIVE'])
-        blocked_sessions = len(df_sessions[df_sessions['BLOCKING_SESSION'].notna()])
+        status_counts = summary.groupby("STATUS")["SESSION_COUNT"].sum()
+        total_sessions = int(summary["SESSION_COUNT"].sum())
+        active_sessions = int(status_counts.get("ACTIVE", 0))
+        inactive_sessions = int(status_counts.get("INACTIVE", 0))
+        blocked_sessions = int(summary["BLOCKED_COUNT"].sum())
 
         # KPI Metrics
         kpi1, kpi2, kpi3, kpi4 = st.columns(4)
@@ -616,35 +825,71 @@ yle='color: #FFFFFF; font-size: 0.9rem;'><strong>Environment:</strong> <span sty
         kpi3.metric(label="Inactive Sessions", value=inactive_sessions)
         kpi4.metric(label="Blocked Sessions", value=blocked_sessions)
 
+        # Changes on the page since it was last refreshed; filled in once the page is known
+        changes_panel = st.container()
+
         st.markdown("---")
 
         # Filter options
         st.markdown("#### 🔍 Filter Options")
-        filter_col1, filter_col2, filter_col3 = st.columns(3)
-        
+        filter_col1, filter_col2, filter_col3, filter_col4 = st.columns(4)
+
+        status_options = sorted(summary["STATUS"].dropna().unique(), reverse=True)
+        username_options = sorted(summary["USERNAME"].dropna().unique())
+
         with filter_col1:
             status_filter = st.multiselect(
                 "Filter by Status",
-                options=df_sessions['STATUS'].unique(),
-                default=df_sessions['STATUS'].unique()
+                options=status_options,
+                default=status_options
             )
-        
+
         with filter_col2:
             username_filter = st.multiselect(
                 "Filter by Username",
-                options=df_sessions['USERNAME'].dropna().unique(),
-                default=df_sessions['USERNAME'].dropna().unique()
+                options=username_options,
+                default=username_options
             )
-        
+
         with filter_col3:
             min_hours = st.number_input("Min Hours Connected", min_value=0.0, value=0.0, step=0.1)
 
-        # Apply filters
-        filtered_df = df_sessions[
-            (df_sessions['STATUS'].isin(status_filter)) &
-            (df_sessions['USERNAME'].isin(username_filter)) &
-            (df_sessions['HOURS_CONNECTED'] >= min_hours)
-        ]
+        with filter_col4:
+            page_size = st.selectbox("Rows per Page", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE))
+
+        # The filters become bind variables; a full selection needs no IN list
+        statuses = None if set(status_filter) == set(status_options) else tuple(status_filter)
+        usernames = None if set(username_filter) == set(username_options) else tuple(username_filter)
+
+        filtered_summary, filtered_at = fetch_filtered_sessions_summary(selected_env, selected_db, statuses, usernames, min_hours)
+        filtered_total = int(filtered_summary["SESSION_COUNT"].sum()) if not filtered_summary.empty else 0
+
+        # Keyset pagination: keep the cursor of every page visited so far
+        pager_signature = (selected_env, selected_db, statuses, usernames, min_hours, page_size)
+        pager = st.session_state.get("sessions_pager")
+        if pager is None or pager["signature"] != pager_signature:
+            pager = {"signature": pager_signature, "cursors": [None]}
+            st.session_state["sessions_pager"] = pager
+        page_number = len(pager["cursors"])
+
+        (page_df, next_after), page_at = fetch_sessions_page(
+            selected_env, selected_db, statuses, usernames, min_hours, page_size, pager["cursors"][-1]
+        )
+
+        # Track only the sessions on this page, plus those shown on it last
+        # time so the ones that ended are noticed. Sessions elsewhere are not
+        # read at all.
+        page_sids = set(page_df["SID"].astype(int)) if not page_df.empty else set()
+        page_signature = (pager_signature, page_number)
+        shown = st.session_state.get("sessions_shown_sids")
+        if shown is not None and shown[0] == page_signature:
+            tracked_sids = page_sids | shown[1]
+        else:
+            tracked_sids = page_sids
+        st.session_state["sessions_shown_sids"] = (page_signature, page_sids)
+        changes = fetch_session_changes(selected_env, selected_db, tracked_sids) if tracked_sids else None
+        with changes_panel:
+            session_changes_panel(changes)
 
         # Session status highlighting
         def highlight_session_status(row):
@@ -658,30 +903,57 @@ yle='color: #FFFFFF; font-size: 0.9rem;'><strong>Environment:</strong> <span sty
             else:
                 return [''] * len(row)
 
+        # Root blockers, ranked by how many sessions wait behind them
+        if blocked_sessions:
+            chains = fetch_blocking_chains(selected_env, selected_db)
+            if chains is not None and not chains["roots"].empty:
+                st.markdown(f"#### ⛓️ Root Blockers ({len(chains['roots'])})")
+                st.dataframe(chains["roots"], use_container_width=True, hide_index=True)
+            if chains is not None and chains["cycles"]:
+                cycles = "; ".join(" → ".join(str(sid) for sid in cycle + cycle[:1]) for cycle in chains["cycles"])
+                st.error(f"Sessions blocking each other in a cycle: {cycles}")
+
+        active_session_history_panel(selected_env, selected_db)
+
         # Display filtered sessions
-        st.markdown(f"#### 📋 Session Details ({len(filtered_df)} sessions)")
-        
-        if not filtered_df.empty:
-            styled_sessions = filtered_df.style.apply(highlight_session_status, axis=1).format({
+        st.markdown(f"#### 📋 Session Details ({filtered_total} sessions)")
+
+        if not page_df.empty:
+            if changes is not None:
+                page_df = annotate_sessions(page_df, changes)
+            styled_sessions = page_df.style.apply(highlight_session_status, axis=1).format({
                 'HOURS_CONNECTED': '{:.2f}',
-                'MEMORY_MB': '{:.2f}'
-            })
-            
+                'MEMORY_MB': '{:.2f}',
+                'PGA Delta MB': '{:+.2f}',
+            }, na_rep="")
+
             st.dataframe(styled_sessions, height=600, use_container_width=True)
+
+            first_row = (page_number - 1) * page_size + 1
+            nav_prev, nav_info, nav_next = st.columns([1, 4, 1])
+            with nav_prev:
+                st.button("◀ Previous", disabled=page_number == 1,
+                          on_click=lambda: pager["cursors"].pop(), key="sessions_prev_page")
+            with nav_info:
+                st.markdown(
+                    f"<div style='text-align:center; color:#E3F2FD;'>Page {page_number} · rows {first_row}–{first_row + len(page_df) - 1} of {filtered_total}</div>",
+                    unsafe_allow_html=True
+                )
+            with nav_next:
+                st.button("Next ▶", disabled=next_after is None,
+                          on_click=lambda: pager["cursors"].append(next_after), key="sessions_next_page")
         else:
             st.info("No sessions match the current filters.")
 
         # Session summary by user
         st.markdown("#### 📊 Sessions Summary by User")
-        if not filtered_df.empty:
-            user_summary = filtered_df.groupby(['USERNAME', 'STATUS']).size().reset_index(name='Count')
-            user_pivot = user_summary.pivot(index='USERNAME', columns='STATUS', values='Count').fillna(0).astype(int)
+        if not filtered_summary.empty:
+            user_pivot = filtered_summary.pivot_table(
+                index='USERNAME', columns='STATUS', values='SESSION_COUNT', aggfunc='sum', fill_value=0
+            ).astype(int)
             st.dataframe(user_pivot, use_container_width=True)
 
-        st.markdown(
-            f"<div style='text-align:right; color:#B3E5FC; font-size:0.8em; margin-top: 15px;'>Last updated: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}</div>",
-            unsafe_allow_html=True
-        )
+        last_updated_footer(min((t for t in (fetched_at, filtered_at, page_at) if t is not None), default=None))
     else:
         st.info("Please select a database.")
 
@@ -710,17 +982,17 @@ def main():
         </div>
         """, unsafe_allow_html=True)
 
-    # Create tabs
-    tab1, tab2, tab3 = st.tabs(["🖥️ Server Monitoring", "🗄️ Database Monitoring", "👥 Sessions Monitoring"])
-    
-    with tab1:
-        server_monitoring_tab()
-    
-    with tab2:
-        database_monitoring_tab()
-    
-    with tab3:
-        sessions_monitoring_tab()
+    # Only the selected view runs on a rerun. st.tabs would execute all three
+    # bodies every time, so picking a DB would also re-render the server fleet.
+    views = {
+        "🖥️ Server Monitoring": server_monitoring_tab,
+        "🗄️ Database Monitoring": database_monitoring_tab,
+        "🌐 Fleet Tablespaces": fleet_tablespace_tab,
+        "📊 Database Load": database_load_tab,
+        "👥 Sessions Monitoring": sessions_monitoring_tab,
+    }
+    selected_view = st.radio("View", list(views), horizontal=True, label_visibility="collapsed", key="active_view")
+    views[selected_view]()
 
 if __name__ == "__main__":
     main()
@@ -1,46 +1,189 @@
 import oracledb
+import atexit
 import json
 import os
+import threading
+
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:  # Columnar fetch is optional; fetch_dataframe falls back to row tuples
+    pyarrow = None
 
 # Automatically use Thin mode (no Oracle Instant Client required)
 oracledb.init_oracle_client = lambda *args, **kwargs: None  # Safeguard if called elsewhere
 
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "cred.json")
+
+# Session pool settings; an optional "pool" block next to a database's
+# user/password/dsn in cred.json overrides any of them for that database.
+POOL_DEFAULTS = {
+    "min": 1,
+    "max": 4,
+    "increment": 1,
+    "stmtcachesize": 50,
+    "ping_interval": 0,   # 0 = ping every connection when it is acquired
+    "timeout": 300,       # close idle pooled sessions after this many seconds
+    "wait_timeout": 10000,  # ms to wait for a free session when the pool is full
+}
+
+# Rows per network round trip for fetch_dataframe
+FETCH_ARRAYSIZE = 1000
+
+_config_cache = {"mtime": None, "config": None}
+_pools = {}  # (env, db_name) -> (credential tuple, pool)
+_pools_lock = threading.Lock()
+
 def load_db_config():
-    config_path = os.path.join(os.path.dirname(__file__), "cred.json")
     try:
-        with open(config_path, "r") as file:
-            return json.load(file)
+        mtime = os.stat(CONFIG_PATH).st_mtime_ns
+    except FileNotFoundError:
+        raise RuntimeError("cred.json file not found.")
+    if _config_cache["mtime"] == mtime:
+        return _config_cache["config"]
+    try:
+        with open(CONFIG_PATH, "r") as file:
+            config = json.load(file)
     except FileNotFoundError:
         raise RuntimeError("cred.json file not found.")
     except json.JSONDecodeError:
         raise RuntimeError("Invalid JSON format in cred.json.")
+    _config_cache["mtime"] = mtime
+    _config_cache["config"] = config
+    return config
+
+def get_db_credentials(env, db_name):
+    config = load_db_config()
+
+    if env not in config:
+        raise ValueError(f"Environment '{env}' not found in configuration.")
+    if db_name not in config[env]:
+        raise ValueError(f"Database '{db_name}' not found in environment '{env}'.")
+
+    return config[env][db_name]
+
+def get_connection_pool(env, db_name):
+    """
+    Get the session pool for an environment and database, creating it on first use.
+
+    The pool is rebuilt when the database's user, password, DSN or pool
+    settings in cred.json change.
+
+    Args:
+        env (str): Environment name (Development, Testing, Production)
+        db_name (str): Database name (rundb1, rundb2, TestDB1, etc.)
+
+    Returns:
+        oracledb.ConnectionPool: Thin-mode session pool shared by the whole process
+    """
+    key = (env, db_name)
+    creds = get_db_credentials(env, db_name)
+    settings = dict(POOL_DEFAULTS, **creds.get("pool", {}))
+    identity = (creds["user"], creds["password"], creds["dsn"], tuple(sorted(settings.items())))
+    stale = None
+    with _pools_lock:
+        cached = _pools.get(key)
+        if cached is not None:
+            if cached[0] == identity:
+                return cached[1]
+            # cred.json changed (password rotation, DSN move): replace the pool
+            stale = _pools.pop(key)[1]
+
+        try:
+            pool = oracledb.create_pool(
+                user=creds["user"],
+                password=creds["password"],
+                dsn=creds["dsn"],
+                min=settings["min"],
+                max=settings["max"],
+                increment=settings["increment"],
+                stmtcachesize=settings["stmtcachesize"],
+                ping_interval=settings["ping_interval"],
+                timeout=settings["timeout"],
+                getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+                wait_timeout=settings["wait_timeout"],
+            )
+        except oracledb.DatabaseError as e:
+            raise RuntimeError(f"Oracle DB pool creation failed for {env}/{db_name}: {e}")
+        finally:
+            if stale is not None:
+                _close_pool(stale)
+        _pools[key] = (identity, pool)
+        return pool
 
 def get_oracle_connection(env, db_name):
     """
     Get Oracle database connection for specified environment and database.
-    
+
+    The connection is borrowed from the session pool for env/db_name;
+    calling close() on it returns it to the pool instead of logging off.
+
     Args:
         env (str): Environment name (Development, Testing, Production)
         db_name (str): Database name (rundb1, rundb2, TestDB1, etc.)
-    
+
     Returns:
         oracledb.Connection: Oracle database connection object
     """
-    config = load_db_config()
+    pool = get_connection_pool(env, db_name)
+    try:
+        return pool.acquire()
+    except oracledb.DatabaseError as e:
+        raise RuntimeError(f"Oracle DB connection failed for {env}/{db_name}: {e}")
 
-    if env not in config:
-        raise ValueError(f"Environment '{env}' not found in configuration.")
-    if db_name not in config[env]:
-        raise ValueError(f"Database '{db_name}' not found in environment '{env}'.")
+def _close_pool(pool):
+    try:
+        pool.close(force=True)
+    except oracledb.Error:
+        pass
+
+def close_pools():
+    """Close every session pool; registered to run at interpreter exit."""
+    with _pools_lock:
+        pools = [pool for _, pool in _pools.values()]
+        _pools.clear()
+    for pool in pools:
+        _close_pool(pool)
+
+atexit.register(close_pools)
 
-    creds = config[env][db_name]
+def _fetch_rows(conn, sql, params, arraysize):
+    cursor = conn.cursor()
     try:
-        connection = oracledb.connect(
-            user=creds["user"],
-            password=creds["password"],
-            dsn=creds["dsn"],
-            config_dir=None  # Ensures thin mode
-        )
-        return connection
-    except oracledb.DatabaseError as e:
-        raise RuntimeError(f"Oracle DB connection failed for {env}/{db_name}: {e}")
\ No newline at end of file
+        cursor.arraysize = arraysize
+        cursor.prefetchrows = arraysize + 1
+        cursor.execute(sql, params or {})
+        cols = [desc[0] for desc in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=cols)
+    finally:
+        cursor.close()
+
+def fetch_dataframe(conn, sql, params=None, arraysize=FETCH_ARRAYSIZE):
+    """
+    Run a query and return its result set as a pandas DataFrame.
+
+    Uses the driver's columnar fetch (Connection.fetch_df_all) so rows land
+    in Arrow buffers instead of one Python object per cell, then hands them
+    to pandas column by column. Falls back to cursor.fetchall() when pyarrow
+    or fetch_df_all is unavailable, or the result has a column type the
+    columnar path does not support.
+
+    Args:
+        conn: Oracle connection (or anything with a DB-API cursor())
+        sql (str): Query text
+        params (dict): Bind variables
+        arraysize (int): Rows fetched per round trip
+
+    Returns:
+        pd.DataFrame: Result set with the query's column names
+    """
+    if pyarrow is not None and hasattr(conn, "fetch_df_all"):
+        try:
+            odf = conn.fetch_df_all(sql, params, arraysize=arraysize)
+        except oracledb.NotSupportedError:
+            pass
+        else:
+            # self_destruct frees each Arrow column once pandas owns a copy
+            return pyarrow.table(odf).to_pandas(split_blocks=True, self_destruct=True)
+    return _fetch_rows(conn, sql, params, arraysize)
@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Per-database budget for fleet-wide queries (seconds)
+FLEET_QUERY_TIMEOUT = 30
+
+# Databases queried at the same time
+FLEET_WORKERS = 8
+
+def list_databases(db_configs):
+    """Flatten {env: [db, ...]} into [(env, db), ...]."""
+    return [(env, db) for env, dbs in db_configs.items() for db in dbs]
+
+def run_on_all_databases(db_configs, query, timeout=FLEET_QUERY_TIMEOUT, max_workers=FLEET_WORKERS):
+    """
+    Run query(env, db) against every configured database concurrently.
+
+    A database that has not answered within timeout seconds is reported as
+    timed out instead of holding up the others. query should also bound its
+    own round trips (see call_timeout_ms) so abandoned workers finish soon.
+
+    Args:
+        db_configs (dict): Environment name -> list of database names
+        query (callable): Function taking (env, db) and returning a result
+        timeout (float): Seconds to wait for the slowest database
+        max_workers (int): Databases queried at the same time
+
+    Returns:
+        tuple: ({(env, db): result}, {(env, db): error message})
+    """
+    databases = list_databases(db_configs)
+    if not databases:
+        return {}, {}
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(databases))),
+                                  thread_name_prefix="db-fleet")
+    try:
+        futures = {executor.submit(query, env, db): (env, db) for env, db in databases}
+        done, _ = wait(futures, timeout=timeout)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results, errors = {}, {}
+    for future, key in futures.items():
+        if future not in done:
+            future.cancel()
+            errors[key] = f"Timed out after {timeout}s"
+        elif future.exception() is not None:
+            errors[key] = str(future.exception())
+        else:
+            results[key] = future.result()
+    return results, errors
+
+def call_timeout_ms(timeout=FLEET_QUERY_TIMEOUT):
+    """Convert a fleet timeout to an oracledb Connection.call_timeout value."""
+    return int(timeout * 1000)
@@ -0,0 +1,61 @@
+import pandas as pd
+
+from db_conn import fetch_dataframe
+
+# Load figures shown on the Database Load view, as column label -> SQL
+# expression over the pivoted v$sysmetric values (see DB_LOAD_QUERY)
+DB_LOAD_COLUMNS = {
+    "Host CPU %": "ROUND(host_cpu, 1)",
+    "DB Time/s": "ROUND(db_time / 100, 2)",  # centiseconds per second -> average active sessions
+    "Read MB/s": "ROUND(read_bytes / 1024 / 1024, 2)",
+    "Write MB/s": "ROUND(write_bytes / 1024 / 1024, 2)",
+    "Redo MB/s": "ROUND(redo_bytes / 1024 / 1024, 2)",
+    "Logons/s": "ROUND(logons, 2)",
+}
+
+# All load figures in one row from the 60-second v$sysmetric interval
+# (group_id 2). MMON already keeps these rates, so polling is a read of a
+# few in-memory rows: no AWR, no v$sysstat deltas to compute.
+DB_LOAD_QUERY = """
+WITH m AS (
+  SELECT
+    MAX(end_time) AS end_time,
+    MAX(DECODE(metric_name, 'Host CPU Utilization (%)', value)) AS host_cpu,
+    MAX(DECODE(metric_name, 'Database Time Per Sec', value)) AS db_time,
+    MAX(DECODE(metric_name, 'Physical Read Total Bytes Per Sec', value)) AS read_bytes,
+    MAX(DECODE(metric_name, 'Physical Write Total Bytes Per Sec', value)) AS write_bytes,
+    MAX(DECODE(metric_name, 'Redo Generated Per Sec', value)) AS redo_bytes,
+    MAX(DECODE(metric_name, 'Logons Per Sec', value)) AS logons
+  FROM v$sysmetric
+  WHERE group_id = 2
+    AND metric_name IN (
+      'Host CPU Utilization (%)',
+      'Database Time Per Sec',
+      'Physical Read Total Bytes Per Sec',
+      'Physical Write Total Bytes Per Sec',
+      'Redo Generated Per Sec',
+      'Logons Per Sec'
+    )
+)
+SELECT
+  {columns},
+  TO_CHAR(end_time, 'DD-MON-YYYY HH24:MI:SS') AS "Interval End"
+FROM m
+""".format(columns=",\n  ".join(f'{expr} AS "{label}"' for label, expr in DB_LOAD_COLUMNS.items()))
+
+def query_db_load(conn):
+    """
+    Read the current load figures of one database.
+
+    Returns:
+        dict: DB_LOAD_COLUMNS label -> float (None where the metric is not
+              reported yet) plus "Interval End"
+    """
+    df = fetch_dataframe(conn, DB_LOAD_QUERY)
+    if df.empty:
+        return dict.fromkeys([*DB_LOAD_COLUMNS, "Interval End"])
+    row = df.iloc[0]
+    load = {label: None if pd.isna(row[label]) else float(row[label])
+            for label in DB_LOAD_COLUMNS}
+    load["Interval End"] = row["Interval End"]
+    return load
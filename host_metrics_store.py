@@ -0,0 +1,713 @@
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from metric_archive import (
+    MetricArchive,
+    bucket_samples,
+    read_rollup,
+    rollup_fields,
+)
+from server_collector import read_snapshot
+
+# Raw host samples kept in memory per series (seconds; override with HOST_METRICS_RETENTION)
+RETENTION = int(os.environ.get("HOST_METRICS_RETENTION", str(2 * 3600)))
+
+# Shortest collector interval the buffers are sized for (seconds)
+RESOLUTION = 30
+
+# Rollup levels as (bucket width, retention) in seconds. Every sample is
+# folded into each level as it arrives, keeping min/max/mean/last per bucket.
+ROLLUP_LEVELS = [
+    (60, 6 * 3600),
+    (900, 2 * 86400),
+    (3600, 31 * 86400),
+]
+
+# Upper bound on the points history() returns for one series
+MAX_CHART_POINTS = 1500
+
+# Kind of the host sample chunks in the metric archive
+ARCHIVE_KIND = "host"
+
+# Raw samples reloaded from the archive on startup (seconds)
+RESTORE_SECONDS = 3600
+
+# How often the dashboard's store checks the collector snapshot and the
+# archive (seconds), whether or not anyone is looking at the Server view
+FOLLOW_INTERVAL = 15
+
+# Rollup widths the collector archives next to the raw chunks (seconds).
+# On startup these levels are seeded from the archive for their whole
+# retention; finer levels refill from the restored raw samples and live data.
+ARCHIVE_ROLLUP_WIDTHS = [900, 3600]
+
+log = logging.getLogger(__name__)
+
+# Series names; filesystems are "fs:<mount point>" with the Use% value
+CPU = "cpu"
+MEM_USED = "mem_used"
+MEM_FREE = "mem_free"
+MEM_BUFF_CACHE = "mem_buff_cache"
+FS_PREFIX = "fs:"
+
+class SeriesRing:
+    """
+    One metric of one host: sample times and values in preallocated NumPy
+    arrays used as a ring. Appends are O(1) and never allocate; once full
+    the oldest sample is overwritten, so memory is fixed by capacity.
+    """
+
+    def __init__(self, capacity):
+        self.ts = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros(capacity, dtype=np.float32)
+        self.head = 0   # next slot to write
+        self.count = 0
+
+    @property
+    def capacity(self):
+        return len(self.ts)
+
+    @property
+    def last_ts(self):
+        return self.ts[self.head - 1] if self.count else None
+
+    @property
+    def first_ts(self):
+        return self.ts[self.head if self.count == self.capacity else 0] if self.count else None
+
+    def append(self, ts, value):
+        """Add a sample; samples not newer than the last one are ignored."""
+        if self.count and ts <= self.ts[self.head - 1]:
+            return False
+        self.ts[self.head] = ts
+        self.values[self.head] = np.nan if value is None else value
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        return True
+
+    def extend(self, ts, values):
+        """Append many ascending samples at once; older ones are skipped. Returns how many were kept."""
+        if self.count:
+            newer = ts > self.last_ts
+            ts, values = ts[newer], values[newer]
+        ts, values = ts[-self.capacity:], values[-self.capacity:]
+        slots = (self.head + np.arange(len(ts))) % self.capacity
+        self.ts[slots] = ts
+        self.values[slots] = values
+        self.head = (self.head + len(ts)) % self.capacity
+        self.count = min(self.count + len(ts), self.capacity)
+        return len(ts)
+
+    def merge(self, ts, values):
+        """
+        Add ascending samples that may be older than what the ring holds
+        (e.g. archived ones after live ones); samples at a time already held
+        are skipped. Returns how many were added.
+        """
+        if not self.count or ts[0] > self.last_ts:
+            return self.extend(ts, values)
+        held_ts, held_values = self.arrays()
+        new = ~np.isin(ts, held_ts)
+        if not new.any():
+            return 0
+        merged_ts = np.concatenate((held_ts, ts[new]))
+        order = np.argsort(merged_ts, kind="stable")[-self.capacity:]
+        self.head = self.count = 0
+        self.extend(merged_ts[order], np.concatenate((held_values, values[new]))[order])
+        return int(np.isin(ts[new], merged_ts[order]).sum())
+
+    def arrays(self):
+        """(ts, values) oldest first, as copies."""
+        if self.count < self.capacity:
+            return self.ts[:self.count].copy(), self.values[:self.count].copy()
+        return np.roll(self.ts, -self.head), np.roll(self.values, -self.head)
+
+    def window(self, since, until=None):
+        """(ts, values) of samples with since <= ts (<= until)."""
+        ts, values = self.arrays()
+        start = np.searchsorted(ts, since, side="left")
+        end = len(ts) if until is None else np.searchsorted(ts, until, side="right")
+        return ts[start:end], values[start:end]
+
+    @property
+    def nbytes(self):
+        return self.ts.nbytes + self.values.nbytes
+
+class RollupRing:
+    """
+    Fixed-width buckets of one series at one resolution: min, max, sum,
+    count and last value per bucket. Bucket n lives in slot n % capacity,
+    so adding a sample is O(1) whether it opens a new bucket or updates
+    the current one, and buckets older than capacity * width are
+    overwritten in place.
+    """
+
+    def __init__(self, width, retention):
+        capacity = max(1, math.ceil(retention / width))
+        self.width = width
+        self.bucket = np.full(capacity, -1, dtype=np.int32)
+        self.min = np.zeros(capacity, dtype=np.float32)
+        self.max = np.zeros(capacity, dtype=np.float32)
+        self.sum = np.zeros(capacity, dtype=np.float32)
+        self.count = np.zeros(capacity, dtype=np.uint16)
+        self.last = np.zeros(capacity, dtype=np.float32)
+
+    @property
+    def capacity(self):
+        return len(self.bucket)
+
+    @property
+    def retention(self):
+        return self.capacity * self.width
+
+    def add(self, ts, value):
+        if value is None or np.isnan(value):
+            return
+        n = int(ts // self.width)
+        slot = n % self.capacity
+        if self.bucket[slot] != n:
+            if self.bucket[slot] > n:
+                return  # older than what this slot already holds
+            self.bucket[slot] = n
+            self.min[slot] = self.max[slot] = self.last[slot] = value
+            self.sum[slot] = value
+            self.count[slot] = 1
+            return
+        self.min[slot] = min(self.min[slot], value)
+        self.max[slot] = max(self.max[slot], value)
+        self.sum[slot] += value
+        self.count[slot] += 1
+        self.last[slot] = value
+
+    def load(self, buckets, low, high, total, count, last):
+        """
+        Set whole buckets at once, e.g. from the archive, replacing what their
+        slots hold unless a slot already has a newer bucket. Buckets with a
+        count of 0 are skipped.
+        """
+        keep = count > 0
+        if len(buckets):
+            keep &= buckets > buckets.max() - self.capacity
+        slots = (buckets[keep] % self.capacity).astype(np.int64)
+        newer = self.bucket[slots] <= buckets[keep]
+        slots = slots[newer]
+        for target, source in ((self.bucket, buckets), (self.min, low), (self.max, high),
+                               (self.sum, total), (self.count, count), (self.last, last)):
+            target[slots] = source[keep][newer]
+
+    @property
+    def last_end(self):
+        """End of the newest bucket held, or None."""
+        held = self.bucket[self.count > 0]
+        return (int(held.max()) + 1) * self.width if len(held) else None
+
+    def window(self, since, until):
+        """
+        Buckets starting in [since, until], oldest first.
+
+        Returns:
+            tuple: (bucket start times, min, max, mean, last) arrays
+        """
+        lo = math.floor(since / self.width)
+        hi = math.floor(until / self.width)
+        slots = np.flatnonzero((self.bucket >= lo) & (self.bucket <= hi) & (self.count > 0))
+        slots = slots[np.argsort(self.bucket[slots])]
+        mean = self.sum[slots] / self.count[slots]
+        return (self.bucket[slots] * float(self.width), self.min[slots], self.max[slots],
+                mean.astype(np.float32), self.last[slots])
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.bucket, self.min, self.max, self.sum, self.count, self.last))
+
+def window_stats(values):
+    """last, mean, max and p95 of a window, ignoring missing samples."""
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return {"last": None, "mean": None, "max": None, "p95": None}
+    return {
+        "last": float(values[-1]),
+        "mean": float(values.mean()),
+        "max": float(values.max()),
+        "p95": float(np.percentile(values, 95)),
+    }
+
+def snapshot_samples(server):
+    """{series: value} of one server_data record from the collector snapshot."""
+    total, used, free, buff_cache = server["mem"]
+    samples = {CPU: server["cpu"], MEM_USED: used, MEM_FREE: free, MEM_BUFF_CACHE: buff_cache}
+    for fs in server["fs"]:
+        try:
+            samples[FS_PREFIX + fs["Mounted on"]] = float(str(fs["Use%"]).rstrip("%"))
+        except ValueError:
+            continue
+    return samples
+
+class HostMetricsStore:
+    """
+    In-memory time series of host metrics, one SeriesRing per (host, series)
+    for raw samples plus one RollupRing per rollup level.
+
+    Every ring holds a fixed number of samples or buckets, so memory is
+    bounded by the number of series and the retentions, not by uptime.
+    Series that have not been written for the longest retention are
+    dropped by prune().
+
+    With an archive, restore_from_archive() reloads the recent raw samples
+    and seeds the archived rollup levels (ARCHIVE_ROLLUP_WIDTHS) for their
+    whole retention, once; charts are then always served from memory.
+    """
+
+    def __init__(self, retention=RETENTION, resolution=RESOLUTION, levels=ROLLUP_LEVELS, archive=None):
+        self.retention = retention
+        self.resolution = resolution
+        self.capacity = max(1, math.ceil(retention / resolution))
+        self.levels = sorted(levels)
+        self.archive = archive
+        self._lock = threading.Lock()
+        self._series = {}   # (host, series) -> SeriesRing
+        self._rollups = {}  # (host, series) -> [RollupRing per level, finest first]
+        self._last_snapshot = None
+        self._held_since = {}  # bucket width (0 = raw) -> oldest sample or bucket held
+        self._archived_until = None  # end of the newest chunk this store knows is archived
+        self._restored = threading.Event()
+        self._restored.set()
+
+    def _ring(self, key):
+        ring = self._series.get(key)
+        if ring is None:
+            ring = self._series[key] = SeriesRing(self.capacity)
+        return ring
+
+    def _rollups_of(self, key):
+        rollups = self._rollups.get(key)
+        if rollups is None:
+            rollups = self._rollups[key] = [RollupRing(w, r) for w, r in self.levels]
+        return rollups
+
+    def _held(self, width, since):
+        held = self._held_since.get(width)
+        if held is None or since < held:
+            self._held_since[width] = float(since)
+
+    def append(self, host, series, ts, value):
+        with self._lock:
+            if not self._ring((host, series)).append(ts, value):
+                return False
+            for rollup in self._rollups_of((host, series)):
+                rollup.add(ts, value)
+                self._held(rollup.width, ts)
+            self._held(0, ts)
+            return True
+
+    def restore(self, samples, widths=None):
+        """
+        Bulk-load raw samples, e.g. from the archive on startup, and fold them
+        into the rollup levels of the given widths (default: every level).
+
+        Args:
+            samples (dict): (host, series) -> (ts, values), ascending
+            widths (list): Rollup widths to fold the samples into
+
+        Returns:
+            int: Number of samples kept in the raw rings
+        """
+        widths = [width for width, _ in self.levels] if widths is None else widths
+        kept = 0
+        for key, (ts, values) in samples.items():
+            if not len(ts):
+                continue
+            with self._lock:  # per series, so live appends and charts are not held up
+                ring = self._ring(key)
+                kept += ring.merge(ts, values)
+                self._held(0, max(ts[0], ring.first_ts))
+                for rollup in self._rollups_of(key):
+                    if rollup.width in widths:
+                        buckets, low, high, total, count, last = bucket_samples(ts, values, rollup.width)
+                        rollup.load(buckets, low, high, total.astype(np.float32), count, last)
+                        if len(buckets):
+                            self._held(rollup.width, buckets[0] * rollup.width)
+        return kept
+
+    def seed_rollups(self, width, since):
+        """
+        Load the archived buckets of one rollup level from since on.
+
+        Files are read one day at a time and each key's row is loaded
+        straight into its RollupRing, so no more than one day's buckets are
+        held outside the rings.
+
+        Returns:
+            int: Number of series seeded
+        """
+        level = next((i for i, (w, _) in enumerate(self.levels) if w == width), None)
+        files = self.archive.rollups(ARCHIVE_KIND, width, since) if level is not None else []
+        first = int(since // width)
+        seeded, held_since = set(), None
+        for _, path in files:
+            try:
+                keys, file_first, fields = read_rollup(path)
+            except (OSError, ValueError):
+                continue  # removed by prune() meanwhile, or not a rollup
+            buckets = file_first + np.arange(fields["count"].shape[1])
+            columns = np.flatnonzero(buckets >= first)
+            if not len(columns):
+                continue
+            buckets = buckets[columns]
+            count = fields["count"][:, columns]
+            for row in np.flatnonzero(count.any(axis=1)):
+                key = keys[row]
+                with self._lock:
+                    rollup = self._rollups_of(tuple(key.split("\t", 1)))[level]
+                    rollup.load(buckets, fields["min"][row, columns], fields["max"][row, columns],
+                                fields["sum"][row, columns], count[row], fields["last"][row, columns])
+                seeded.add(key)
+            held = np.flatnonzero(count.any(axis=0))
+            if len(held) and held_since is None:
+                held_since = buckets[held[0]] * width
+        if held_since is not None:
+            with self._lock:
+                self._held(width, held_since)
+        return len(seeded)
+
+    def export(self, since, until):
+        """(host, series) -> (ts, values) of raw samples with since <= ts < until."""
+        samples = {}
+        with self._lock:
+            for key, ring in self._series.items():
+                ts, values = ring.window(since, until)
+                if len(ts) and ts[-1] == until:
+                    ts, values = ts[:-1], values[:-1]
+                if len(ts):
+                    samples[key] = (ts, values)
+        return samples
+
+    def restore_from_archive(self, now=None, seconds=RESTORE_SECONDS):
+        """
+        Reload the last `seconds` (at most the retention) of raw samples from
+        the archive, and seed the archived rollup levels for their retention.
+
+        Returns:
+            int: Number of raw samples restored
+        """
+        if self.archive is None:
+            return 0
+        now = time.time() if now is None else now
+        archived_widths = [width for width, _ in self.levels if width in ARCHIVE_ROLLUP_WIDTHS]
+        for width, retention in self.levels:
+            if width in archived_widths:
+                self.seed_rollups(width, now - retention)
+        archived = self.archive.read_range(ARCHIVE_KIND, now - min(seconds, self.retention))
+        self._archived_until = self.archive.last_chunk_end(ARCHIVE_KIND)
+        samples = {tuple(key.split("\t", 1)): data for key, data in archived.items()}
+        return self.restore(samples, widths=[width for width, _ in self.levels if width not in archived_widths])
+
+    def sync_archive(self):
+        """
+        Fill gaps from the chunks the collector has archived since this store
+        last looked, e.g. sweeps whose snapshot was replaced before it was read.
+
+        A series whose raw ring already holds every sample of a chunk is left
+        alone. Otherwise the missing samples are merged into the raw ring, the
+        rollup buckets inside the chunk are rebuilt from it, and the missing
+        samples are added to wider buckets. Chunks older than the raw
+        retention only rebuild the buckets inside them.
+
+        Returns:
+            int: Number of series that had samples filled in
+        """
+        if self.archive is None:
+            return 0
+        span = self.archive.chunk_seconds
+        since = self._archived_until or 0
+        chunks = [start for start, _ in self.archive.chunks(ARCHIVE_KIND, since) if start >= since]
+        filled = 0
+        for start in chunks:
+            for key, (ts, values) in self.archive.read_range(ARCHIVE_KIND, start, start + span).items():
+                key = tuple(key.split("\t", 1))
+                with self._lock:
+                    ring = self._ring(key)
+                    held = ring.window(start, start + span)[0]
+                    missing = ~np.isin(ts, held)
+                    if not missing.any():
+                        continue
+                    if ring.count == 0 or start + span > ring.first_ts:
+                        ring.merge(ts, values)
+                    else:
+                        missing[:] = False  # no longer in the raw ring: cannot tell what the wider buckets lack
+                    for rollup in self._rollups_of(key):
+                        if rollup.width <= span:
+                            buckets, low, high, total, count, last = bucket_samples(ts, values, rollup.width)
+                            rollup.load(buckets, low, high, total.astype(np.float32), count, last)
+                        else:
+                            for t, value in zip(ts[missing], values[missing]):
+                                rollup.add(t, value)
+                filled += 1
+            self._archived_until = start + span
+        return filled
+
+    def follow(self, read=read_snapshot, interval=FOLLOW_INTERVAL, stop=None):
+        """
+        Keep the store up to date in a daemon thread until stop is set:
+        ingest every new collector snapshot and, once restored, fill gaps
+        from the archive, so history does not depend on the Server view
+        being open.
+        """
+        stop = threading.Event() if stop is None else stop
+
+        def run():
+            while not stop.is_set():
+                try:
+                    snapshot = read()
+                    if snapshot is not None and self.ingest_snapshot(snapshot):
+                        self.prune()
+                    if not self.restoring:
+                        self.sync_archive()
+                except Exception:
+                    log.warning("Following the collector snapshot failed", exc_info=True)
+                stop.wait(interval)
+
+        thread = threading.Thread(target=run, name="host-metrics-follow", daemon=True)
+        thread.start()
+        return thread
+
+    def restore_in_background(self, **kwargs):
+        """
+        Run restore_from_archive() in a daemon thread and return at once.
+        The store takes live samples and serves charts meanwhile; restoring
+        is True until it has finished.
+        """
+        self._restored.clear()
+
+        def run():
+            try:
+                restored = self.restore_from_archive(**kwargs)
+                log.info("Restored %d host samples from the metric archive", restored)
+            except Exception:
+                log.warning("Restoring host metrics from the archive failed", exc_info=True)
+            finally:
+                self._restored.set()
+
+        thread = threading.Thread(target=run, name="host-metrics-restore", daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def restoring(self):
+        return not self._restored.is_set()
+
+    def archive_pending(self, now=None):
+        """
+        Write every chunk that has closed since the last one archived and is
+        still fully held in the raw rings. Only one process (the collector)
+        should do this for a given archive.
+
+        Returns:
+            int: Number of chunk files written
+        """
+        if self.archive is None:
+            return 0
+        now = time.time() if now is None else now
+        with self._lock:
+            covered_since = self._held_since.get(0)
+        if covered_since is None:
+            return 0
+        if self._archived_until is None:
+            self._archived_until = self.archive.last_chunk_end(ARCHIVE_KIND)
+        span = self.archive.chunk_seconds
+        start = self.archive.chunk_start(max(covered_since, now - self.retention))
+        if self._archived_until is not None:
+            start = max(start, self._archived_until)
+        written = 0
+        while start + span <= self.archive.chunk_start(now):
+            samples = self.export(start, start + span)
+            if samples:  # no file for hours the collector was not running
+                keyed = {f"{host}\t{series}": data for (host, series), data in samples.items()}
+                self.archive.write_chunk(ARCHIVE_KIND, start, keyed)
+                for width in ARCHIVE_ROLLUP_WIDTHS:
+                    self._archive_rollup(keyed, start, span, width)
+                written += 1
+            start += span
+            self._archived_until = start
+        return written
+
+    def _archive_rollup(self, keyed, start, span, width):
+        """Bucket one closed chunk's samples at width and add them to the archive's rollup file."""
+        first = int(start // width)
+        fields = rollup_fields(list(keyed.values()), width, first, max(1, span // width))
+        self.archive.add_rollup(ARCHIVE_KIND, width, list(keyed), first, fields)
+
+    def ingest_snapshot(self, snapshot):
+        """
+        Append every server of a collector snapshot at its collected_at time.
+
+        Returns:
+            bool: False when this snapshot was already ingested
+        """
+        ts = snapshot["collected_at"]
+        with self._lock:
+            if self._last_snapshot is not None and ts <= self._last_snapshot:
+                return False
+            self._last_snapshot = ts
+        for server in snapshot["servers"]:
+            if server["status"] == "DOWN":
+                continue
+            for series, value in snapshot_samples(server).items():
+                self.append(server["host"], series, ts, value)
+        return True
+
+    def series(self, host):
+        with self._lock:
+            return sorted(name for h, name in self._series if h == host)
+
+    def window(self, host, series, seconds, now=None):
+        """(ts, values) of the last `seconds` of one series; empty if unknown."""
+        now = time.time() if now is None else now
+        with self._lock:
+            ring = self._series.get((host, series))
+            if ring is None:
+                return np.empty(0), np.empty(0, dtype=np.float32)
+            return ring.window(now - seconds)
+
+    def stats(self, host, series, seconds, now=None):
+        return window_stats(self.window(host, series, seconds, now)[1])
+
+    def fleet_stats(self, series, seconds, now=None):
+        """DataFrame indexed by host with last, mean, max and p95 of one series over a window."""
+        with self._lock:
+            hosts = sorted(h for h, name in self._series if name == series)
+        stats = {host: self.stats(host, series, seconds, now) for host in hosts}
+        return pd.DataFrame.from_dict(stats, orient="index", columns=["last", "mean", "max", "p95"])
+
+    def frame(self, host, series, seconds, now=None):
+        """DataFrame of several series over a window, indexed by sample time, for charting."""
+        columns = {}
+        for name in series:
+            ts, values = self.window(host, name, seconds, now)
+            columns[name] = pd.Series(values, index=_local_times(ts))
+        return pd.DataFrame(columns)
+
+    def resolution_for(self, seconds, max_points=MAX_CHART_POINTS):
+        """
+        Bucket width to read a range of `seconds` at: raw samples (0) when
+        they cover it within max_points, else the first rollup level that
+        covers the range within max_points, else the coarsest level.
+        """
+        if seconds <= self.retention and seconds / self.resolution <= max_points:
+            return 0
+        for width, retention in self.levels:
+            if seconds <= retention and seconds / width <= max_points:
+                return width
+        return self.levels[-1][0] if self.levels else 0
+
+    def _width_for(self, seconds, since, max_points):
+        """
+        resolution_for(seconds), unless that level does not hold data back to
+        since yet (e.g. the 1-minute level just after a restart): then the
+        next level that fits and does, else the one holding the most.
+        """
+        candidates = [0] if seconds <= self.retention and seconds / self.resolution <= max_points else []
+        candidates += [width for width, retention in self.levels
+                       if seconds <= retention and seconds / width <= max_points]
+        if not candidates:
+            return self.resolution_for(seconds, max_points)
+        with self._lock:
+            held = {width: self._held_since.get(width) for width in candidates}
+        for width in candidates:
+            if held[width] is not None and held[width] <= since + max(width, self.resolution):
+                return width
+        known = [width for width in candidates if held[width] is not None]
+        return min(known, key=lambda width: held[width]) if known else candidates[0]
+
+    def history(self, host, series, seconds, now=None, max_points=MAX_CHART_POINTS):
+        """
+        One series over a range of any length, read from memory at
+        resolution_for(seconds) (see _width_for).
+
+        Returns:
+            DataFrame indexed by time with min, max, mean and last columns
+            (all equal for raw samples) and the bucket width in attrs["resolution"]
+        """
+        now = time.time() if now is None else now
+        since = now - seconds
+        width = self._width_for(seconds, since, max_points)
+        columns = ["min", "max", "mean", "last"]
+        if width == 0:
+            ts, values = self.window(host, series, seconds, now)
+            arrays = (ts, values, values, values, values)
+        else:
+            arrays = self._rollup_window(host, series, width, since, now)
+        df = pd.DataFrame(dict(zip(columns, arrays[1:])), index=_local_times(arrays[0]))
+        df.attrs["resolution"] = width
+        return df
+
+    def _rollup_window(self, host, series, width, since, until):
+        with self._lock:
+            rollups = self._rollups.get((host, series))
+            rollup = None if rollups is None else next(r for r in rollups if r.width == width)
+            if rollup is None:
+                return (np.empty(0),) + (np.empty(0, dtype=np.float32),) * 4
+            return rollup.window(since, until)
+
+    def prune(self, now=None):
+        """
+        Drop series with no sample in the longest retention, raw or rollup,
+        so a host that went quiet keeps its history until every level has
+        aged out. Returns how many series were dropped.
+        """
+        now = time.time() if now is None else now
+        cutoff = now - max([self.retention] + [retention for _, retention in self.levels])
+        with self._lock:
+            stale = []
+            for key in set(self._series) | set(self._rollups):
+                ring = self._series.get(key)
+                last = [ring.last_ts] if ring is not None and ring.count else []
+                last += [rollup.last_end for rollup in self._rollups.get(key, []) if rollup.last_end is not None]
+                if not last or max(last) < cutoff:
+                    stale.append(key)
+            for key in stale:
+                self._series.pop(key, None)
+                self._rollups.pop(key, None)
+        return len(stale)
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return (sum(ring.nbytes for ring in self._series.values())
+                    + sum(r.nbytes for rollups in self._rollups.values() for r in rollups))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._series)
+
+def _local_times(ts):
+    return pd.to_datetime(ts, unit="s", utc=True).tz_convert(datetime.now().astimezone().tzinfo)
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """
+    Return the process-wide host metrics store.
+
+    Like the SSH pool it lives at module level, so history survives
+    Streamlit reruns and is shared by every viewer of the process. On
+    first use it starts reloading the history the collector has archived
+    in the background (see HostMetricsStore.restoring), so the first
+    render does not wait for it, and starts following the collector
+    snapshot (see HostMetricsStore.follow).
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HostMetricsStore(archive=MetricArchive())
+            _store.restore_in_background()
+            _store.follow()
+        return _store
@@ -0,0 +1,458 @@
+import re
+import socket
+import threading
+
+from host_profiles import get_profiles, profile_from_sections, tools_command
+
+# Longest wait for output from one probe command (seconds); a hung bdf on a
+# stale NFS mount or a stuck vmstat fails the probe instead of holding a
+# sweep worker forever
+SSH_COMMAND_TIMEOUT = 30
+
+# Section markers written by the probe script, one per metric group
+SECTION_PATTERN = re.compile(r"^<<<(\w+)>>>\s*$", re.MULTILINE)
+
+# "vmstat -s" tick lines on AIX/HP-UX, e.g. "   98754371 idle cpu ticks"
+VMSTAT_TICKS_PATTERN = re.compile(r"^\s*(\d+)\s+(user|nice|system|idle|I/O wait|wait)\s+cpu ticks", re.IGNORECASE | re.MULTILINE)
+
+# AIX "vmstat -v" page counts, e.g. "   201934 free pages"
+VMSTAT_V_PATTERN = re.compile(r"^\s*(\d+)\s+(memory|free|file) pages\s*$", re.MULTILINE)
+
+# A vmstat data line: nothing but numbers
+VMSTAT_LINE_PATTERN = re.compile(r"^\s*\d+(\s+\d+){10,}\s*$")
+
+# HP-UX physical memory: "Memory: 16353 MB (15.97 GB)", "Memory = 8176 MB ..." or
+# dmesg "Physical: 8388608 Kbytes, lockable: ..."
+MACHINFO_MEMORY_PATTERN = re.compile(r"^\s*Memory\s*[:=]\s*(\d+)\s*MB", re.IGNORECASE | re.MULTILINE)
+DMESG_PHYSICAL_PATTERN = re.compile(r"Physical:\s*(\d+)\s*Kbytes", re.IGNORECASE)
+PAGE_SIZE_PATTERN = re.compile(r"^pagesize\s+(\d+)\s*$", re.MULTILINE)
+
+class CpuSampler:
+    """
+    Keeps the last cumulative CPU counters per host and turns a new reading
+    into utilisation over the interval since the previous poll. The first
+    poll of a host, or one after its counters were reset by a reboot, only
+    sets the baseline: the since-boot average is not current load.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last = {}  # host -> (busy_ticks, total_ticks)
+
+    def utilisation(self, host, busy, total):
+        with self._lock:
+            previous = self._last.get(host)
+            self._last[host] = (busy, total)
+
+        if previous is None:
+            return None
+        d_busy = busy - previous[0]
+        d_total = total - previous[1]
+        if d_total > 0 and d_busy >= 0:
+            return round(d_busy / d_total * 100, 2)
+        return None  # counters went backwards: the next poll gives a delta
+
+    def forget(self, host):
+        with self._lock:
+            self._last.pop(host, None)
+
+CPU_SAMPLER = CpuSampler()
+
+def ssh_exec(client, cmd, timeout=SSH_COMMAND_TIMEOUT):
+    """Run cmd and return its stdout; raises socket.timeout if output stalls for timeout seconds."""
+    stdin, stdout, stderr = client.exec_command(cmd, timeout=timeout)
+    try:
+        return stdout.read().decode()
+    except socket.timeout:
+        stdout.channel.close()
+        raise
+
+def split_sections(output):
+    """Split probe output into a {section_name: text} dict."""
+    sections = {}
+    matches = list(SECTION_PATTERN.finditer(output))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(output)
+        sections[match.group(1)] = output[match.end():end].strip("\n")
+    return sections
+
+# === Parsers ===
+def parse_proc_stat_counters(output):
+    """(busy_ticks, total_ticks) from the aggregate line of /proc/stat."""
+    for line in output.splitlines():
+        if line.startswith("cpu "):
+            # user nice system idle iowait irq softirq steal (guest is already in user)
+            values = [int(v) for v in line.split()[1:9]]
+            idle = values[3] + (values[4] if len(values) > 4 else 0)
+            total = sum(values)
+            return total - idle, total
+    return None
+
+def parse_kstat_counters(output):
+    """(busy_ticks, total_ticks) summed over every CPU in kstat -p cpu_stat output."""
+    ticks = {}
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[0].startswith("cpu_stat:"):
+            field = parts[0].rsplit(":", 1)[-1]
+            ticks[field] = ticks.get(field, 0) + int(parts[1])
+    if not ticks:
+        return None
+    idle = ticks.get("idle", 0) + ticks.get("wait", 0)
+    total = sum(ticks.values())
+    return total - idle, total
+
+def parse_vmstat_tick_counters(output):
+    """(busy_ticks, total_ticks) from the "cpu ticks" lines of vmstat -s."""
+    ticks = {}
+    for value, field in VMSTAT_TICKS_PATTERN.findall(output):
+        ticks[field.lower()] = int(value)
+    if not ticks:
+        return None
+    idle = ticks.get("idle", 0) + ticks.get("i/o wait", 0) + ticks.get("wait", 0)
+    total = sum(ticks.values())
+    return total - idle, total
+
+def parse_free_mem(output):
+    for line in output.splitlines():
+        if line.lower().startswith("mem:"):
+            parts = line.split()
+            total = int(parts[1])
+            used = int(parts[2])
+            free = int(parts[3])
+            buff_cache = int(parts[5]) if len(parts) > 5 else 0
+            return total, used, free, buff_cache
+    return None, None, None, None
+
+def parse_vmstat_v_mem(output):
+    """AIX vmstat -v: memory, free and file (cache) page counts, 4 KB each."""
+    pages = {name: int(value) for value, name in VMSTAT_V_PATTERN.findall(output)}
+    if "memory" not in pages:
+        return None, None, None, None
+    total = pages["memory"] * 4 // 1024
+    free = pages.get("free", 0) * 4 // 1024
+    buff_cache = pages.get("file", 0) * 4 // 1024
+    return total, max(total - free - buff_cache, 0), free, buff_cache
+
+def parse_hpux_mem(output):
+    """
+    HP-UX MEM section: physical memory from machinfo (or dmesg on hosts
+    without it), the page size, and the since-boot vmstat line whose free
+    column counts free pages.
+    """
+    total = None
+    match = MACHINFO_MEMORY_PATTERN.search(output)
+    if match:
+        total = int(match.group(1))
+    else:
+        match = DMESG_PHYSICAL_PATTERN.search(output)
+        if match:
+            total = int(match.group(1)) // 1024
+    page_size = PAGE_SIZE_PATTERN.search(output)
+    page_size = int(page_size.group(1)) if page_size else 4096
+    vmstat = [line.split() for line in output.splitlines() if VMSTAT_LINE_PATTERN.match(line)]
+    if total is None or not vmstat:
+        return None, None, None, None
+    free = int(vmstat[-1][4]) * page_size // (1024 * 1024)
+    return total, max(total - free, 0), free, 0
+
+def parse_solaris_mem(output):
+    """pagesize and kstat physmem/freemem pages, plus the ZFS ARC size in bytes."""
+    page_size = 0
+    stats = {}
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) == 1 and parts[0].isdigit():
+            page_size = int(parts[0])
+        elif len(parts) == 2 and ":" in parts[0]:
+            stats[parts[0].rsplit(":", 1)[-1]] = int(parts[1])
+    if not page_size or "physmem" not in stats:
+        return None, None, None, None
+    mb = 1024 * 1024
+    total = stats["physmem"] * page_size // mb
+    free = stats.get("freemem", 0) * page_size // mb
+    buff_cache = stats.get("size", 0) // mb
+    return total, max(total - free - buff_cache, 0), free, buff_cache
+
+def format_kb(kb):
+    """Render a KB count the way df -h does, e.g. 825.8 MB -> "826M", 1.19 GB -> "1.2G"."""
+    value = float(kb)
+    for unit in "KMGT":
+        if value < 1024 or unit == "T":
+            break
+        value /= 1024
+    return f"{value:.1f}{unit}" if value < 10 and unit != "K" else f"{value:.0f}{unit}"
+
+def parse_kb_filesystem(output):
+    """
+    Parse POSIX-style df -k / df -kP / bdf output (sizes in KB) into the
+    parse_filesystem shape. bdf wraps long device names onto their own
+    line, so a lone first field is joined with the line after it.
+    """
+    fs_list = []
+    pending = None
+    for line in output.strip().splitlines()[1:]:
+        parts = line.split()
+        if pending is not None:
+            parts = [pending] + parts
+            pending = None
+        if len(parts) == 1:
+            pending = parts[0]
+            continue
+        if len(parts) < 6:
+            continue
+        try:
+            size, used, avail = (format_kb(int(v)) for v in parts[1:4])
+        except ValueError:
+            continue
+        fs_list.append({
+            "Filesystem": parts[0],
+            "Size": size,
+            "Used": used,
+            "Available": avail,
+            "Use%": parts[4],
+            "Mounted on": " ".join(parts[5:]),
+        })
+    return fs_list
+
+def parse_filesystem(output):
+    try:
+        fs_list = []
+        lines = output.strip().splitlines()
+        for line in lines[1:]:
+            parts = line.split()
+            if len(parts) >= 6:
+                fs_list.append({
+                    "Filesystem": parts[0],
+                    "Size": parts[1],
+                    "Used": parts[2],
+                    "Available": parts[3],
+                    "Use%": parts[4],
+                    "Mounted on": parts[5]
+                })
+        return fs_list
+    except:
+        return []
+
+# === Collectors ===
+COLLECTORS = {}  # uname -s -> HostCollector subclass; "*" is the fallback
+
+def register_collector(cls):
+    """Class decorator: poll hosts whose uname -s is cls.platform with cls."""
+    COLLECTORS[cls.platform] = cls
+    return cls
+
+class HostCollector:
+    """
+    Metrics collection for one platform.
+
+    script prints the CPU, MEM and FS sections in one exec_command round
+    trip. The CPU section holds cumulative tick counters; utilisation is
+    derived from the delta against the previous poll, so no script sleeps
+    on the remote side (but see HPUXCollector). Subclasses override the parse_* methods for their
+    platform's tools and may tune command() to the host's profile.
+    """
+
+    platform = None
+    script = ""
+
+    def __init__(self, profile=None):
+        self.profile = profile or {}
+
+    def command(self):
+        return self.script
+
+    def parse_cpu_counters(self, output):
+        return None
+
+    def parse_cpu(self, output):
+        """Utilisation % from a platform tool, when no counters are available."""
+        return None
+
+    def parse_mem(self, output):
+        return None, None, None, None
+
+    def parse_filesystem(self, output):
+        return parse_filesystem(output)
+
+    def parse(self, sections, host=None, sampler=CPU_SAMPLER):
+        """
+        Returns:
+            tuple: (cpu, (total, used, free, buff_cache), fs_list)
+        """
+        cpu_text = sections.get("CPU", "")
+        try:
+            counters = self.parse_cpu_counters(cpu_text)
+        except (ValueError, IndexError):
+            counters = None
+        if counters is not None:
+            cpu = sampler.utilisation(host, *counters)
+        else:
+            try:
+                cpu = self.parse_cpu(cpu_text)
+            except (ValueError, IndexError):
+                cpu = None
+        try:
+            mem = self.parse_mem(sections.get("MEM", ""))
+        except (ValueError, IndexError):
+            mem = (None, None, None, None)
+        fs = self.parse_filesystem(sections.get("FS", ""))
+        return cpu, mem, fs
+
+@register_collector
+class LinuxCollector(HostCollector):
+    platform = "*"
+    script = (
+        "echo '<<<CPU>>>'; head -1 /proc/stat; "
+        "echo '<<<MEM>>>'; free -m; "
+        "echo '<<<FS>>>'; df -h"
+    )
+
+    def parse_cpu_counters(self, output):
+        return parse_proc_stat_counters(output)
+
+    def parse_mem(self, output):
+        return parse_free_mem(output)
+
+@register_collector
+class HPUXCollector(HostCollector):
+    platform = "HP-UX"
+    # Hosts whose vmstat -s has no tick counters fall back to one 1-second
+    # vmstat interval for CPU, the only collector that waits on the remote
+    # side; the since-boot first line would hide a saturated host. Free
+    # memory is current even on that first line.
+    script_template = (
+        "v=$(vmstat | tail -1); "
+        "echo '<<<CPU>>>'; t=$(vmstat -s | grep 'cpu ticks'); "
+        "if [ -n \"$t\" ]; then echo \"$t\"; else vmstat 1 2 | tail -1; fi; "
+        "echo '<<<MEM>>>'; {memory}; echo pagesize $(getconf PAGE_SIZE); echo \"$v\"; "
+        "echo '<<<FS>>>'; bdf -l"
+    )
+    machinfo_memory = "machinfo | grep -i memory"
+    dmesg_memory = "/usr/sbin/dmesg | grep -i physical"  # older PA-RISC hosts have no machinfo
+    script = script_template.format(memory=f"{machinfo_memory} || {dmesg_memory}")
+
+    def command(self):
+        tools = self.profile.get("tools")
+        if not tools:
+            return self.script
+        return self.script_template.format(memory=self.machinfo_memory if "machinfo" in tools else self.dmesg_memory)
+
+    def parse_cpu_counters(self, output):
+        return parse_vmstat_tick_counters(output)
+
+    def parse_cpu(self, output):
+        # The 1-second interval line: r b w avm free re at pi po fr de sr in sy cs us sy id
+        lines = [line.split() for line in output.splitlines() if VMSTAT_LINE_PATTERN.match(line)]
+        if lines and len(lines[-1]) >= 18:
+            return round(100 - float(lines[-1][-1]), 2)
+        return None
+
+    def parse_mem(self, output):
+        return parse_hpux_mem(output)
+
+    def parse_filesystem(self, output):
+        return parse_kb_filesystem(output)
+
+@register_collector
+class AIXCollector(HostCollector):
+    platform = "AIX"
+    script = (
+        "echo '<<<CPU>>>'; vmstat -s | grep 'cpu ticks'; "
+        "echo '<<<MEM>>>'; vmstat -v; "
+        "echo '<<<FS>>>'; df -kP"
+    )
+
+    def parse_cpu_counters(self, output):
+        return parse_vmstat_tick_counters(output)
+
+    def parse_mem(self, output):
+        return parse_vmstat_v_mem(output)
+
+    def parse_filesystem(self, output):
+        return parse_kb_filesystem(output)
+
+@register_collector
+class SunOSCollector(HostCollector):
+    platform = "SunOS"
+    script = (
+        "echo '<<<CPU>>>'; kstat -p cpu_stat:::user cpu_stat:::kernel cpu_stat:::idle cpu_stat:::wait; "
+        "echo '<<<MEM>>>'; pagesize; kstat -p unix:0:system_pages:physmem unix:0:system_pages:freemem zfs:0:arcstats:size; "
+        "echo '<<<FS>>>'; df -k"
+    )
+
+    def parse_cpu_counters(self, output):
+        return parse_kstat_counters(output)
+
+    def parse_mem(self, output):
+        return parse_solaris_mem(output)
+
+    def parse_filesystem(self, output):
+        return parse_kb_filesystem(output)
+
+def collector_for(profile):
+    """Instantiate the registered collector for a host profile."""
+    cls = COLLECTORS.get(profile.get("os")) or COLLECTORS["*"]
+    return cls(profile)
+
+def parse_cpu_counters(os_name, output):
+    """
+    Parse cumulative CPU tick counters with the collector registered for os_name.
+
+    Returns:
+        tuple: (busy_ticks, total_ticks), or None if no counters were found
+    """
+    try:
+        return collector_for({"os": os_name}).parse_cpu_counters(output)
+    except (ValueError, IndexError):
+        return None
+
+def build_probe_command():
+    """
+    First-poll command for a host with no profile yet: fingerprints the host
+    (OS, VERSION and TOOLS sections) and runs its platform's script, all in
+    one round trip.
+    """
+    branches = " ".join(
+        f"{platform}) {cls.script};;" for platform, cls in COLLECTORS.items() if platform != "*"
+    )
+    branches += f" *) {COLLECTORS['*'].script};;"
+    return (
+        "os=$(uname); echo '<<<OS>>>'; echo \"$os\"; "
+        "echo '<<<VERSION>>>'; uname -r; "
+        f"echo '<<<TOOLS>>>'; {tools_command()}; "
+        f"case \"$os\" in {branches} esac 2>/dev/null"
+    )
+
+PROBE_COMMAND = build_probe_command()
+
+def parse_probe_output(output, host=None, sampler=CPU_SAMPLER):
+    """
+    Parse the output of PROBE_COMMAND.
+
+    Args:
+        output (str): Raw probe output
+        host (str): Host the output came from, used to key CPU counter deltas
+        sampler (CpuSampler): Holds the previous CPU counters per host
+
+    Returns:
+        tuple: (cpu, (total, used, free, buff_cache), fs_list)
+    """
+    sections = split_sections(output)
+    return collector_for(profile_from_sections(sections)).parse(sections, host, sampler)
+
+def probe_host(client, host, profiles=None, sampler=CPU_SAMPLER):
+    """
+    Collect CPU, memory and filesystem metrics over one SSH channel.
+
+    A host seen before is polled with its platform collector's own command;
+    an unknown one gets PROBE_COMMAND, whose output also becomes its profile.
+    """
+    profiles = get_profiles() if profiles is None else profiles
+    profile = profiles.get(host)
+    if profile is None:
+        sections = split_sections(ssh_exec(client, PROBE_COMMAND))
+        profile = profiles.put(host, profile_from_sections(sections))
+    else:
+        sections = split_sections(ssh_exec(client, collector_for(profile).command()))
+    return collector_for(profile).parse(sections, host, sampler)
@@ -0,0 +1,130 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Fingerprints of every polled host, kept across collector restarts
+PROFILES_PATH = os.environ.get("HOST_PROFILES_PATH", os.path.join(BASE_DIR, "host_profiles.json"))
+
+# Re-fingerprint a host this often (seconds), in case it was rebuilt or upgraded
+PROFILE_MAX_AGE = 86400
+
+# Tools a platform collector may prefer when the host has them
+KNOWN_TOOLS = ["mpstat", "sar", "vmstat", "free", "kstat", "bdf", "svmon", "swapinfo", "machinfo", "prtconf"]
+
+def tools_command(tools=KNOWN_TOOLS):
+    """Shell snippet printing the name of every tool found on the PATH."""
+    return f"for t in {' '.join(tools)}; do command -v $t >/dev/null 2>&1 && echo $t; done"
+
+def profile_from_sections(sections, now=None):
+    """
+    Build a host profile from the OS, VERSION and TOOLS sections of a probe.
+
+    Returns:
+        dict: os (uname -s), version (uname -r), tools (list) and fingerprinted_at
+    """
+    return {
+        "os": sections.get("OS", "").strip(),
+        "version": sections.get("VERSION", "").strip(),
+        "tools": sorted(line.strip() for line in sections.get("TOOLS", "").splitlines() if line.strip()),
+        "fingerprinted_at": time.time() if now is None else now,
+    }
+
+class HostProfileCache:
+    """
+    Per-host OS fingerprints, persisted to a JSON file.
+
+    A host is fingerprinted on its first poll and then served from here
+    until its profile is max_age seconds old or it is forgotten (e.g. after
+    a failed poll), so regular polls never ask the host what it runs.
+
+    put() and forget() only change the in-memory profiles; flush() writes
+    the file, once per sweep, so a cold sweep of many hosts does not
+    rewrite it per host while the SSH workers wait on the lock.
+    """
+
+    def __init__(self, path=PROFILES_PATH, max_age=PROFILE_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._profiles = None  # host -> profile, loaded on first use
+        self._dirty = False
+        self._flush_lock = threading.Lock()  # one writer at a time, outside _lock
+
+    def _load(self):
+        if self._profiles is None:
+            try:
+                with open(self.path, "r") as profiles_file:
+                    self._profiles = json.load(profiles_file)
+            except (OSError, ValueError):
+                self._profiles = {}
+        return self._profiles
+
+    def _save(self, profiles):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".host_profiles.", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as tmp_file:
+                json.dump(profiles, tmp_file, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+        return True
+
+    def flush(self):
+        """Write the profiles to the file if they changed since the last flush. Returns whether it wrote."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return False
+                profiles = dict(self._profiles)
+                self._dirty = False
+            if not self._save(profiles):
+                with self._lock:
+                    self._dirty = True  # try again on the next flush
+                return False
+            return True
+
+    def get(self, host, now=None):
+        """Return the cached profile of host, or None if it needs fingerprinting."""
+        now = time.time() if now is None else now
+        with self._lock:
+            profile = self._load().get(host)
+        if profile is None or now - profile.get("fingerprinted_at", 0) > self.max_age:
+            return None
+        return profile
+
+    def put(self, host, profile):
+        with self._lock:
+            profiles = self._load()
+            if profiles.get(host) != profile:
+                profiles[host] = profile
+                self._dirty = True
+        return profile
+
+    def forget(self, host):
+        with self._lock:
+            if self._load().pop(host, None) is not None:
+                self._dirty = True
+
+    def __len__(self):
+        with self._lock:
+            return len(self._load())
+
+_profiles = None
+_profiles_lock = threading.Lock()
+
+def get_profiles():
+    """Return the process-wide host profile cache."""
+    global _profiles
+    with _profiles_lock:
+        if _profiles is None:
+            _profiles = HostProfileCache()
+        return _profiles
@@ -0,0 +1,451 @@
+import glob
+import mmap
+import os
+import re
+import struct
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Chunk files of archived samples (override with METRIC_ARCHIVE_DIR)
+ARCHIVE_DIR = os.environ.get("METRIC_ARCHIVE_DIR", os.path.join(BASE_DIR, "metric_archive"))
+
+# Time span of one chunk file (seconds); a chunk is written once it has closed
+CHUNK_SECONDS = 3600
+
+# Chunk files older than this are deleted by prune() (seconds)
+ARCHIVE_RETENTION = 31 * 86400
+
+# Time span of one rollup file (seconds). Unlike a chunk, the file of the
+# current day grows: each hour's buckets are appended to it as a new block.
+ROLLUP_FILE_SECONDS = 86400
+
+# Chunk layout: MAGIC, CHUNK_HEADER (series count, key blob length), the key
+# blob ("\n" + keys joined by "\n" + "\n"), series count + 1 int64 offsets
+# into the data, then the encoded series back to back
+MAGIC = b"MARC2\n"
+CHUNK_HEADER = struct.Struct("<II")
+SERIES_HEADER = struct.Struct("<Iq")  # sample count, first timestamp (ms)
+CHUNK_NAME_PATTERN = re.compile(r"^(\w+)-(\d+)\.chunk$")
+
+# Rollup layout: ROLLUP_MAGIC, ROLLUP_HEADER, then blocks in the order they
+# were added, each a ROLLUP_BLOCK_HEADER, the key blob (as in a chunk) and
+# the deflated ROLLUP_FIELDS arrays, each key count x bucket count and
+# byte-shuffled. Empty buckets have a count of 0; a later block replaces
+# the buckets of its keys in earlier ones.
+ROLLUP_MAGIC = b"MROL2\n"
+ROLLUP_HEADER = struct.Struct("<qI")  # first bucket number of the file, buckets in the file
+ROLLUP_BLOCK_HEADER = struct.Struct("<IIIIq")  # key count, buckets per key, key blob length, body length, first bucket number
+ROLLUP_FIELDS = [("min", np.float32), ("max", np.float32), ("sum", np.float32), ("count", np.uint16), ("last", np.float32)]
+ROLLUP_NAME_PATTERN = re.compile(r"^(\w+)@(\d+)-(\d+)\.rollup$")
+
+def _shuffle(array):
+    """Byte planes of a fixed-width array (all first bytes, then all second bytes, ...)."""
+    return array.view(np.uint8).reshape(-1, array.itemsize).T.tobytes()
+
+def _unshuffle(data, dtype, n):
+    itemsize = np.dtype(dtype).itemsize
+    return np.frombuffer(data, dtype=np.uint8).reshape(itemsize, n).T.copy().view(dtype).ravel()
+
+def encode_series(ts, values):
+    """
+    Compress one series.
+
+    Timestamps (ms) are stored as delta-of-deltas, so a steady poll interval
+    is a run of zeros; values as float32 bit patterns XORed with the
+    previous value, so unchanged or similar values are mostly zero bits.
+    Both are byte-shuffled and deflated together.
+
+    Args:
+        ts (ndarray): Sample times in seconds, ascending
+        values (ndarray): Sample values (NaN for missing)
+
+    Returns:
+        bytes
+    """
+    t = np.round(np.asarray(ts, dtype=np.float64) * 1000).astype(np.int64)
+    n = len(t)
+    if n == 0:
+        return SERIES_HEADER.pack(0, 0)
+    dod = np.diff(np.diff(t), prepend=0) if n > 1 else np.empty(0, dtype=np.int64)
+    bits = np.asarray(values, dtype=np.float32).view(np.uint32)
+    xor = bits ^ np.concatenate(([0], bits[:-1])).astype(np.uint32)
+    body = zlib.compress(_shuffle(dod.astype(np.int64)) + _shuffle(xor), 6)
+    return SERIES_HEADER.pack(n, int(t[0])) + body
+
+def decode_series(data):
+    """
+    Returns:
+        tuple: (ts in seconds as float64, values as float32)
+    """
+    n, t0 = SERIES_HEADER.unpack_from(data)
+    if n == 0:
+        return np.empty(0), np.empty(0, dtype=np.float32)
+    raw = zlib.decompress(data[SERIES_HEADER.size:])
+    split = 8 * (n - 1)
+    dod = _unshuffle(raw[:split], np.int64, n - 1)
+    xor = _unshuffle(raw[split:], np.uint32, n)
+    t = np.empty(n, dtype=np.int64)
+    t[0] = t0
+    t[1:] = t0 + np.cumsum(np.cumsum(dod))
+    values = np.bitwise_xor.accumulate(xor).view(np.float32)
+    return t / 1000.0, values
+
+def bucket_samples(ts, values, width):
+    """
+    Group ascending samples into width-second buckets, skipping NaN values.
+
+    Returns:
+        tuple: (bucket numbers, min, max, sum, count, last) arrays
+    """
+    keep = ~np.isnan(values)
+    ts, values = ts[keep], values[keep]
+    if not len(ts):
+        empty = np.empty(0, dtype=np.float32)
+        return np.empty(0, dtype=np.int64), empty, empty, np.empty(0), np.empty(0, dtype=np.int64), empty
+    buckets = np.floor(ts / width).astype(np.int64)
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    counts = np.diff(np.append(starts, len(ts)))
+    return (buckets[starts],
+            np.minimum.reduceat(values, starts),
+            np.maximum.reduceat(values, starts),
+            np.add.reduceat(values.astype(np.float64), starts),
+            counts,
+            values[starts + counts - 1])
+
+def downsample(ts, values, width):
+    """
+    Bucket raw samples the way RollupRing does.
+
+    Returns:
+        tuple: (bucket start times, min, max, mean, last) arrays
+    """
+    buckets, low, high, total, counts, last = bucket_samples(ts, values, width)
+    return buckets * float(width), low, high, (total / np.maximum(counts, 1)).astype(np.float32), last
+
+def empty_rollup(n_keys, n_buckets):
+    """ROLLUP_FIELDS name -> zeroed key count x bucket count array."""
+    return {name: np.zeros((n_keys, n_buckets), dtype=dtype) for name, dtype in ROLLUP_FIELDS}
+
+def rollup_fields(series, width, first, n_buckets):
+    """
+    Bucket several series at width into one rollup block.
+
+    All series are concatenated and grouped by (row, bucket) cell in one
+    pass, since every row's cells follow the previous row's.
+
+    Args:
+        series (list): (ts, values) per key, ascending
+        first (int): Bucket number of the block's first column
+
+    Returns:
+        dict: ROLLUP_FIELDS name -> len(series) x n_buckets array
+    """
+    fields = empty_rollup(len(series), n_buckets)
+    if not series:
+        return fields
+    ts = np.concatenate([np.asarray(s[0], dtype=np.float64) for s in series])
+    values = np.concatenate([np.asarray(s[1], dtype=np.float32) for s in series])
+    rows = np.repeat(np.arange(len(series)), [len(s[0]) for s in series])
+    columns = np.floor(ts / width).astype(np.int64) - first
+    keep = ~np.isnan(values) & (columns >= 0) & (columns < n_buckets)
+    cells, values = rows[keep] * n_buckets + columns[keep], values[keep]
+    if not len(cells):
+        return fields
+    starts = np.flatnonzero(np.diff(cells, prepend=cells[0] - 1))
+    counts = np.diff(np.append(starts, len(cells)))
+    for name, data in (("min", np.minimum.reduceat(values, starts)),
+                       ("max", np.maximum.reduceat(values, starts)),
+                       ("sum", np.add.reduceat(values.astype(np.float64), starts)),
+                       ("count", counts),
+                       ("last", values[starts + counts - 1])):
+        fields[name].ravel()[cells[starts]] = data
+    return fields
+
+def _rollup_block(keys, first, fields):
+    n_keys, n_buckets = fields["count"].shape
+    key_blob = ("\n" + "\n".join(keys) + "\n").encode() if keys else b"\n"
+    body = zlib.compress(b"".join(_shuffle(np.ascontiguousarray(fields[name], dtype=dtype).ravel())
+                                  for name, dtype in ROLLUP_FIELDS), 6)
+    return ROLLUP_BLOCK_HEADER.pack(n_keys, n_buckets, len(key_blob), len(body), first) + key_blob + body
+
+def _rollup_blocks(data):
+    """
+    (keys, first bucket number, fields) per complete block, in file order.
+    A block cut short by an append in progress (or one that crashed) ends
+    the file.
+    """
+    offset = len(ROLLUP_MAGIC) + ROLLUP_HEADER.size
+    while offset + ROLLUP_BLOCK_HEADER.size <= len(data):
+        n_keys, n_buckets, keys_length, body_length, first = ROLLUP_BLOCK_HEADER.unpack_from(data, offset)
+        keys_start = offset + ROLLUP_BLOCK_HEADER.size
+        offset = keys_start + keys_length + body_length
+        if offset > len(data):
+            return
+        key_blob = data[keys_start:keys_start + keys_length]
+        keys = key_blob.decode().strip("\n").split("\n") if n_keys else []
+        raw = zlib.decompress(data[keys_start + keys_length:offset])
+        fields, field_offset = {}, 0
+        for name, dtype in ROLLUP_FIELDS:
+            size = np.dtype(dtype).itemsize * n_keys * n_buckets
+            fields[name] = _unshuffle(raw[field_offset:field_offset + size], dtype,
+                                      n_keys * n_buckets).reshape(n_keys, n_buckets)
+            field_offset += size
+        yield keys, first, fields
+
+def _rollup_end(rollup_file):
+    """Offset just past the last complete block of an open rollup file, or 0 if it is not one."""
+    size = os.fstat(rollup_file.fileno()).st_size
+    rollup_file.seek(0)
+    if rollup_file.read(len(ROLLUP_MAGIC)) != ROLLUP_MAGIC or size < len(ROLLUP_MAGIC) + ROLLUP_HEADER.size:
+        return 0
+    end = len(ROLLUP_MAGIC) + ROLLUP_HEADER.size
+    while end + ROLLUP_BLOCK_HEADER.size <= size:
+        rollup_file.seek(end)
+        _, _, keys_length, body_length, _ = ROLLUP_BLOCK_HEADER.unpack(rollup_file.read(ROLLUP_BLOCK_HEADER.size))
+        block_end = end + ROLLUP_BLOCK_HEADER.size + keys_length + body_length
+        if block_end > size:
+            break
+        end = block_end
+    return end
+
+def read_rollup(path):
+    """
+    Merge the blocks of one rollup file.
+
+    Returns:
+        tuple: (keys, first bucket number, ROLLUP_FIELDS name -> key count x bucket count array)
+    """
+    with open(path, "rb") as rollup_file:
+        data = rollup_file.read()
+    if data[:len(ROLLUP_MAGIC)] != ROLLUP_MAGIC or len(data) < len(ROLLUP_MAGIC) + ROLLUP_HEADER.size:
+        raise ValueError(f"Not a metric archive rollup: {path}")
+    file_first, n_buckets = ROLLUP_HEADER.unpack_from(data, len(ROLLUP_MAGIC))
+    blocks = list(_rollup_blocks(data))
+    index = {}
+    for keys, _, _ in blocks:
+        for key in keys:
+            index.setdefault(key, len(index))
+    merged = empty_rollup(len(index), n_buckets)
+    for keys, first, fields in blocks:
+        rows = np.fromiter((index[key] for key in keys), dtype=np.int64, count=len(keys))
+        columns = first - file_first + np.arange(fields["count"].shape[1])
+        inside = (columns >= 0) & (columns < n_buckets)
+        for name, _ in ROLLUP_FIELDS:
+            merged[name][np.ix_(rows, columns[inside])] = fields[name][:, inside]
+    return list(index), file_first, merged
+
+class ChunkReader:
+    """
+    Memory-mapped view of one chunk file. Nothing is parsed up front: a
+    key is found with a substring search of the key blob, and its series
+    is decompressed straight from the mapping.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as chunk_file:
+            self._mmap = mmap.mmap(chunk_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"Not a metric archive chunk: {path}")
+        n, keys_length = CHUNK_HEADER.unpack_from(self._mmap, len(MAGIC))
+        keys_start = len(MAGIC) + CHUNK_HEADER.size
+        offsets_start = keys_start + keys_length
+        data_start = offsets_start + 8 * (n + 1)
+        self._keys = self._mmap[keys_start:offsets_start]
+        self._offsets = np.frombuffer(self._mmap[offsets_start:data_start], dtype=np.int64)
+        self._data = memoryview(self._mmap)[data_start:]
+
+    def keys(self):
+        return self._keys.decode().strip("\n").split("\n") if len(self._keys) > 2 else []
+
+    def items(self):
+        """(key, (ts, values)) of every series, in file order."""
+        for index, key in enumerate(self.keys()):
+            yield key, decode_series(self._data[self._offsets[index]:self._offsets[index + 1]])
+
+    def read(self, key):
+        position = self._keys.find(b"\n" + key.encode() + b"\n")
+        if position < 0:
+            return np.empty(0), np.empty(0, dtype=np.float32)
+        index = self._keys.count(b"\n", 0, position)
+        return decode_series(self._data[self._offsets[index]:self._offsets[index + 1]])
+
+    def close(self):
+        self._data.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class MetricArchive:
+    """
+    Compressed on-disk archive of metric samples in fixed-span chunk files,
+    one file per kind (e.g. "host") and CHUNK_SECONDS window. A chunk is
+    written once, after its window has closed, and never modified; reads
+    memory-map the files they need.
+
+    Next to the chunks, per-bucket rollups (min/max/sum/count/last) at a few
+    widths are kept in one file per kind, width and day. Each chunk appends
+    its buckets to the day's file, so long ranges load without decoding raw
+    samples.
+    """
+
+    def __init__(self, directory=ARCHIVE_DIR, chunk_seconds=CHUNK_SECONDS, retention=ARCHIVE_RETENTION):
+        self.directory = directory
+        self.chunk_seconds = chunk_seconds
+        self.retention = retention
+
+    def chunk_start(self, ts):
+        return int(ts // self.chunk_seconds) * self.chunk_seconds
+
+    def chunk_path(self, kind, start):
+        return os.path.join(self.directory, f"{kind}-{int(start)}.chunk")
+
+    def chunks(self, kind, since=None, until=None):
+        """[(start, path), ...] of the chunks of kind overlapping [since, until], oldest first."""
+        found = []
+        for path in glob.glob(os.path.join(self.directory, f"{kind}-*.chunk")):
+            match = CHUNK_NAME_PATTERN.match(os.path.basename(path))
+            if match is None or match.group(1) != kind:
+                continue
+            start = int(match.group(2))
+            if since is not None and start + self.chunk_seconds <= since:
+                continue
+            if until is not None and start > until:
+                continue
+            found.append((start, path))
+        return sorted(found)
+
+    def last_chunk_end(self, kind):
+        chunks = self.chunks(kind)
+        return chunks[-1][0] + self.chunk_seconds if chunks else None
+
+    def write_chunk(self, kind, start, series):
+        """
+        Atomically write the chunk of kind starting at start.
+
+        Args:
+            series (dict): key (str) -> (ts, values) for samples inside the chunk
+
+        Returns:
+            int: Size of the file in bytes
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        keys, blobs = [], []
+        for key, (ts, values) in series.items():
+            if len(ts):
+                keys.append(key)
+                blobs.append(encode_series(ts, values))
+        key_blob = ("\n" + "\n".join(keys) + "\n").encode() if keys else b"\n"
+        offsets = np.cumsum([0] + [len(blob) for blob in blobs], dtype=np.int64)
+        head = MAGIC + CHUNK_HEADER.pack(len(keys), len(key_blob)) + key_blob + offsets.tobytes()
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{kind}-", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(head)
+                for blob in blobs:
+                    tmp_file.write(blob)
+            os.replace(tmp_path, self.chunk_path(kind, start))
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return len(head) + int(offsets[-1])
+
+    def rollup_path(self, kind, width, start):
+        return os.path.join(self.directory, f"{kind}@{int(width)}-{int(start)}.rollup")
+
+    def rollups(self, kind, width=None, since=None):
+        """[(start, path), ...] of the rollup files of kind (and width) ending after since, oldest first."""
+        found = []
+        for path in glob.glob(os.path.join(self.directory, f"{kind}@*.rollup")):
+            match = ROLLUP_NAME_PATTERN.match(os.path.basename(path))
+            if match is None or match.group(1) != kind:
+                continue
+            if width is not None and int(match.group(2)) != width:
+                continue
+            start = int(match.group(3))
+            if since is not None and start + ROLLUP_FILE_SECONDS <= since:
+                continue
+            found.append((start, path))
+        return sorted(found)
+
+    def add_rollup(self, kind, width, keys, first, fields):
+        """
+        Append the buckets of some keys to the rollup file of the day they
+        fall in, replacing any buckets of those keys it already holds there.
+        Only the new block is written, however much the day already holds.
+
+        Args:
+            keys (list): Series keys, one per row of the fields
+            first (int): Bucket number of the first column
+            fields (dict): ROLLUP_FIELDS name -> key count x bucket count array,
+                all buckets inside one ROLLUP_FILE_SECONDS span
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        start = int(first * width // ROLLUP_FILE_SECONDS) * ROLLUP_FILE_SECONDS
+        block = _rollup_block(keys, first, fields)
+        with open(self.rollup_path(kind, width, start), "a+b") as rollup_file:
+            end = _rollup_end(rollup_file)
+            rollup_file.truncate(end)  # a block torn by a crash, or a file that is not a rollup
+            if end == 0:
+                rollup_file.write(ROLLUP_MAGIC + ROLLUP_HEADER.pack(start // width, ROLLUP_FILE_SECONDS // width))
+            rollup_file.write(block)
+
+    def read_range(self, kind, since, until=None, keys=None):
+        """
+        Samples of every (or the given) key with since <= ts < until.
+
+        Returns:
+            dict: key -> (ts, values), oldest first
+        """
+        parts = {}
+        for _, path in self.chunks(kind, since, until):
+            try:
+                reader = ChunkReader(path)
+            except (OSError, ValueError):
+                continue  # removed by prune() meanwhile, or not a chunk
+            with reader:
+                found = reader.items() if keys is None else ((key, reader.read(key)) for key in keys)
+                for key, (ts, values) in found:
+                    if len(ts):
+                        parts.setdefault(key, []).append((ts, values))
+        result = {}
+        for key, chunks in parts.items():
+            ts = np.concatenate([c[0] for c in chunks])
+            values = np.concatenate([c[1] for c in chunks])
+            keep = ts >= since if until is None else (ts >= since) & (ts < until)
+            result[key] = (ts[keep], values[keep])
+        return result
+
+    def read_series(self, kind, key, since, until=None):
+        return self.read_range(kind, since, until, keys=[key]).get(
+            key, (np.empty(0), np.empty(0, dtype=np.float32)))
+
+    def prune(self, kind, now=None):
+        """Delete chunks and rollup files that ended more than retention ago. Returns how many."""
+        cutoff = (time.time() if now is None else now) - self.retention
+        removed = 0
+        files = [(start + self.chunk_seconds, path) for start, path in self.chunks(kind)]
+        files += [(start + ROLLUP_FILE_SECONDS, path) for start, path in self.rollups(kind)]
+        for end, path in files:
+            if end < cutoff:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def disk_usage(self, kind):
+        return sum(os.path.getsize(path) for _, path in self.chunks(kind) + self.rollups(kind))
@@ -0,0 +1,159 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from host_probe import CPU_SAMPLER, probe_host
+from host_profiles import get_profiles
+from ssh_pool import get_pool
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(BASE_DIR, 'credentials.csv')
+
+# Latest fleet snapshot published by collector_daemon.py and read by the dashboards
+SNAPSHOT_PATH = os.environ.get("SERVER_SNAPSHOT_PATH", os.path.join(BASE_DIR, "server_snapshot.json"))
+
+# Permissions of the published snapshot; mkstemp creates files as 0600, which
+# a dashboard running as another user than the collector could not read
+SNAPSHOT_MODE = 0o644
+
+# Maximum number of hosts polled at the same time (override with SSH_SWEEP_WORKERS)
+SSH_SWEEP_WORKERS = int(os.environ.get("SSH_SWEEP_WORKERS", "32"))
+
+def load_inventory(path=CSV_PATH):
+    """Read Host/User/Password records from the credentials CSV."""
+    df = pd.read_csv(path)
+    required_cols = ["Host", "User", "Password"]
+    if not all(col in df.columns for col in required_cols):
+        raise ValueError(f"CSV must contain: {required_cols}")
+    return df.to_dict(orient="records")
+
+def classify_cpu(cpu):
+    """Map a CPU percentage to (status, status_level); lower levels sort first."""
+    if cpu is None:
+        return 'UNKNOWN', 3
+    if cpu >= 90:
+        return 'CRITICAL', 0
+    if cpu >= 80:
+        return 'NEED ATTENTION', 1
+    return 'UP', 2
+
+def collect_server_data(cred):
+    host = cred["Host"]
+    user = cred["User"]
+    password = cred["Password"]
+
+    try:
+        client = get_pool().get(host, user, password)
+        cpu, mem, fs = probe_host(client, host)
+        status, status_level = classify_cpu(cpu)
+        return {
+            "host": host,
+            "cpu": cpu,
+            "mem": mem,
+            "fs": fs,
+            "status": status,
+            "status_level": status_level
+        }
+
+    except Exception:
+        get_pool().discard(host, user)
+        get_profiles().forget(host)  # fingerprint again once it is back
+        CPU_SAMPLER.forget(host)  # and take a fresh CPU baseline
+        return {
+            "host": host,
+            "cpu": None,
+            "mem": (None, None, None, None),
+            "fs": [],
+            "status": "DOWN",
+            "status_level": 4
+        }
+
+def sweep_hosts(credentials, collect=collect_server_data, max_workers=SSH_SWEEP_WORKERS):
+    """
+    Poll every host in the inventory concurrently.
+
+    Args:
+        credentials (list): Records from load_inventory() (Host, User, Password)
+        collect (callable): Function taking one credential record and returning
+            its server_data record. It must handle its own connection errors.
+        max_workers (int): Upper bound on concurrent SSH sessions
+
+    Returns:
+        list: server_data records in the same order as credentials
+    """
+    if not credentials:
+        return []
+
+    workers = max(1, min(int(max_workers), len(credentials)))
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ssh-sweep") as pool:
+            return list(pool.map(collect, credentials))
+    finally:
+        get_profiles().flush()  # fingerprints learnt or forgotten during the sweep, in one write
+
+# === Snapshot publishing ===
+def write_snapshot(server_data, path=SNAPSHOT_PATH, duration=None):
+    """Atomically replace the snapshot file with the latest sweep results."""
+    snapshot = {
+        "collected_at": time.time(),
+        "duration": duration,
+        "servers": server_data,
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".server_snapshot.", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as tmp_file:
+            json.dump(snapshot, tmp_file)
+        os.chmod(tmp_path, SNAPSHOT_MODE)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return snapshot
+
+_snapshot_cache = {}
+_snapshot_lock = threading.Lock()
+
+def read_snapshot(path=SNAPSHOT_PATH):
+    """
+    Return the latest published snapshot, or None if the collector has not
+    written one yet. The file is only re-parsed when it has been replaced.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    with _snapshot_lock:
+        cached = _snapshot_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+    try:
+        with open(path, "r") as snapshot_file:
+            snapshot = json.load(snapshot_file)
+    except (OSError, ValueError):
+        return None
+
+    for data in snapshot.get("servers", []):
+        data["mem"] = tuple(data["mem"])
+
+    with _snapshot_lock:
+        _snapshot_cache[path] = (mtime, snapshot)
+    return snapshot
+
+def snapshot_age_text(collected_at):
+    age = int(time.time() - collected_at)
+    if age < 60:
+        return f"{age}s ago"
+    if age < 3600:
+        return f"{age // 60}m {age % 60}s ago"
+    return f"{age // 3600}h {(age % 3600) // 60}m ago"
@@ -0,0 +1,243 @@
+import logging
+import threading
+import time
+from collections import Counter, deque
+
+import pandas as pd
+
+from db_conn import get_oracle_connection
+from snapshot_cache import cache_key, get_cache
+
+# Seconds between samples of one database
+SAMPLE_INTERVAL = 5
+
+# Active-session rows kept per database; at SAMPLE_INTERVAL and ~50 active
+# sessions this is a little over an hour of history
+BUFFER_ROWS = 50000
+
+# A sampler nobody has read from for this long stops polling (seconds)
+SAMPLER_IDLE_TIMEOUT = 900
+
+# Samples the sampling process republishes in the shared cache; a process
+# that misses fewer ticks than this in a row loses none of them
+SHARED_SAMPLES = 12
+
+# The sampling lease outlives this many missed ticks before another process
+# takes over
+LEASE_TICKS = 3
+
+# Sliding windows offered in the UI (label -> seconds)
+WINDOWS = {"5 min": 300, "15 min": 900, "60 min": 3600}
+
+# Slim ASH-style sample: one row per session that is on CPU or in a
+# non-idle wait right now. Sessions not waiting count as "CPU".
+ACTIVE_SESSIONS_SAMPLE_QUERY = """
+SELECT
+    s.sql_id,
+    CASE WHEN s.state = 'WAITING' THEN s.event ELSE 'ON CPU' END AS event,
+    CASE WHEN s.state = 'WAITING' THEN s.wait_class ELSE 'CPU' END AS wait_class
+FROM v$session s
+WHERE s.status = 'ACTIVE'
+  AND s.type = 'USER'
+  AND s.sid <> SYS_CONTEXT('USERENV', 'SID')
+  AND NOT (s.state = 'WAITING' AND s.wait_class = 'Idle')
+"""
+
+log = logging.getLogger(__name__)
+
+class SessionSampler:
+    """
+    Polls ACTIVE_SESSIONS_SAMPLE_QUERY for one database on a background
+    thread into a fixed-size ring buffer, and answers top-SQL and
+    top-wait-class questions over sliding windows from memory.
+
+    The buffer holds (sample time, sql_id, event, wait_class) rows; the
+    oldest rows fall off once BUFFER_ROWS is reached. Sample times are kept
+    separately so idle samples (no active sessions) still count towards
+    average active sessions. On a busy instance the row buffer covers less
+    time than the window asked for; windows are then clipped to the samples
+    whose rows are all still held (see coverage()).
+
+    With a SnapshotCache, samplers of the same env/db in several processes
+    (Streamlit workers) query the database once between them: only the
+    holder of the cache's ("ash", env, db) lease samples, and it publishes
+    its last SHARED_SAMPLES samples there for the others to copy.
+    """
+
+    def __init__(self, env, db, interval=SAMPLE_INTERVAL, capacity=BUFFER_ROWS,
+                 idle_timeout=SAMPLER_IDLE_TIMEOUT, sample=None, cache=None):
+        self.env = env
+        self.db = db
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self._sample = sample or self._query_active_sessions
+        self._rows = deque(maxlen=capacity)
+        self._sample_times = deque(maxlen=capacity)
+        self._dropped_through = None  # time of the newest sample that lost rows to the ring
+        self._cache = cache
+        self._key = cache_key("ash", env, db)
+        self._lease = None  # token while this process is the one sampling
+        self._shared = deque(maxlen=SHARED_SAMPLES)
+        self._lock = threading.Lock()
+        self._last_read = time.time()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _query_active_sessions(self):
+        conn = get_oracle_connection(self.env, self.db)
+        try:
+            conn.call_timeout = int(self.interval * 1000)
+            cursor = conn.cursor()
+            try:
+                cursor.execute(ACTIVE_SESSIONS_SAMPLE_QUERY)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+        finally:
+            conn.call_timeout = 0
+            conn.close()
+
+    def add_sample(self, rows, ts=None):
+        """Append one sample: an iterable of (sql_id, event, wait_class)."""
+        ts = time.time() if ts is None else ts
+        rows = [(ts, sql_id, event, wait_class) for sql_id, event, wait_class in rows]
+        with self._lock:
+            overflow = len(self._rows) + len(rows) - self._rows.maxlen
+            if overflow > 0:
+                self._dropped_through = self._rows[overflow - 1][0] if overflow <= len(self._rows) else ts
+            self._sample_times.append(ts)
+            self._rows.extend(rows)
+
+    def sample_once(self):
+        if self._cache is None:
+            self.add_sample(self._sample())
+            return
+        if self._lease is None:
+            self._lease = self._cache.try_lease(self._key)
+        if self._lease is not None and not self._cache.hold_lease(self._key, self._lease,
+                                                                  LEASE_TICKS * self.interval):
+            self._lease = None  # stalled long enough for another process to take over
+        if self._lease is None:
+            self._copy_shared()
+            return
+        ts = time.time()
+        rows = [tuple(row) for row in self._sample()]
+        self.add_sample(rows, ts)
+        self._shared.append((ts, rows))
+        self._cache.store(self._key, list(self._shared))
+
+    def _copy_shared(self):
+        """Add the published samples newer than the newest one held."""
+        entry = self._cache.read(self._key)
+        if entry is None:
+            return
+        with self._lock:
+            newest = self._sample_times[-1] if self._sample_times else None
+        for ts, rows in entry[0]:
+            if newest is None or ts > newest:
+                self.add_sample(rows, ts)
+                self._shared.append((ts, rows))
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.time()
+            if started - self._last_read > self.idle_timeout:
+                log.info("Stopping idle session sampler for %s/%s", self.env, self.db)
+                break
+            try:
+                self.sample_once()
+            except Exception:
+                log.warning("Session sample of %s/%s failed", self.env, self.db, exc_info=True)
+            self._stop.wait(max(0.0, self.interval - (time.time() - started)))
+        if self._lease is not None:
+            self._cache.release_lease(self._key, self._lease)
+            self._lease = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._last_read = time.time()
+            self._thread = threading.Thread(target=self._run, name=f"ash-{self.env}-{self.db}", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def window(self, seconds, now=None):
+        """
+        Rows and sample count of the last `seconds`, clipped to the samples
+        whose rows are all still in the buffer.
+
+        Returns:
+            tuple: (DataFrame with ts, SQL_ID, EVENT, WAIT_CLASS; number of samples)
+        """
+        now = time.time() if now is None else now
+        since = now - seconds
+        with self._lock:
+            self._last_read = time.time()
+            partial = self._dropped_through
+            samples = 0
+            for ts in reversed(self._sample_times):
+                if ts < since or (partial is not None and ts <= partial):
+                    break
+                samples += 1
+            rows = []
+            for row in reversed(self._rows):
+                if row[0] < since or (partial is not None and row[0] <= partial):
+                    break
+                rows.append(row)
+        return pd.DataFrame(rows, columns=["ts", "SQL_ID", "EVENT", "WAIT_CLASS"]), samples
+
+    def coverage(self, seconds, now=None):
+        """Seconds of the last `seconds` that window() can answer for (less once rows were dropped)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            partial = self._dropped_through
+        if partial is None:
+            return seconds
+        return max(0.0, min(seconds, now - partial))
+
+    def top(self, column, seconds, limit=10, now=None):
+        """
+        Rank the values of column (SQL_ID, EVENT or WAIT_CLASS) by activity.
+
+        Returns:
+            DataFrame with Samples, AAS (average active sessions over the
+            window) and % Activity, most active first
+        """
+        rows, samples = self.window(seconds, now)
+        counts = Counter(rows[column].fillna("(none)")) if not rows.empty else Counter()
+        top = pd.DataFrame(counts.most_common(limit), columns=[column, "Samples"])
+        total = sum(counts.values())
+        top["AAS"] = (top["Samples"] / samples).round(2) if samples else 0.0
+        top["% Activity"] = (top["Samples"] / total * 100).round(1) if total else 0.0
+        return top
+
+    def top_sql(self, seconds, limit=10, now=None):
+        return self.top("SQL_ID", seconds, limit, now)
+
+    def top_wait_classes(self, seconds, limit=10, now=None):
+        return self.top("WAIT_CLASS", seconds, limit, now)
+
+_samplers = {}
+_samplers_lock = threading.Lock()
+
+def get_sampler(env, db):
+    """
+    Return the process-wide sampler for env/db, (re)starting its thread.
+
+    Samplers live at module level so they keep sampling across Streamlit
+    reruns; one that nobody reads for SAMPLER_IDLE_TIMEOUT stops by itself
+    and resumes, with its history, the next time it is asked for. They
+    share get_cache(), so one process on the host queries env/db and the
+    others copy its samples.
+    """
+    with _samplers_lock:
+        sampler = _samplers.get((env, db))
+        if sampler is None:
+            sampler = _samplers[(env, db)] = SessionSampler(env, db, cache=get_cache())
+        sampler.start()
+        return sampler
@@ -0,0 +1,141 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# v$session identity: a SID is reused after logoff, SERIAL# tells the sessions apart
+KEY_COLUMNS = ["SID", "SERIAL#"]
+
+# A session that keeps its key but differs in any of these counts as changed
+TRACKED_COLUMNS = ["STATUS", "SQL_ID", "MEMORY_MB"]
+
+NEW = "New"
+CHANGED = "Changed"
+
+def _changed_mask(previous, current, columns):
+    """Row-aligned frames -> boolean array, True where any tracked column differs (NaN == NaN)."""
+    mask = np.zeros(len(current), dtype=bool)
+    for column in columns:
+        before = previous[column].to_numpy()
+        after = current[column].to_numpy()
+        mask |= (before != after) & ~(pd.isna(before) & pd.isna(after))
+    return mask
+
+# Diffs kept per tracker for repeat calls with the same snapshot and scope
+MAX_CACHED_DIFFS = 16
+
+class SessionTracker:
+    """
+    Keeps the last seen state of the sessions of one database indexed by
+    (SID, SERIAL#) and diffs each new snapshot against it in a few
+    vectorised passes.
+
+    A snapshot may cover only some SIDs (e.g. the rows on the current
+    page): it is then diffed against what was last seen of those SIDs
+    only, and replaces just their rows in the baseline. A session missing
+    from such a snapshot counts as new only if it logged on after its SIDs
+    were last seen (CONNECTED_SECONDS), not merely because it has not been
+    looked at before.
+
+    update() returns a dict with:
+        added, removed, changed: DataFrames of new, ended and changed sessions
+        change: Series of NEW/CHANGED/"" for every current session
+        pga_delta: Series of MEMORY_MB growth since the previous snapshot
+                   (NaN for new sessions)
+        snapshot_time, previous_time: the two snapshots compared
+    """
+
+    def __init__(self, tracked_columns=TRACKED_COLUMNS):
+        self.tracked_columns = tracked_columns
+        self._lock = threading.Lock()
+        self._previous = None
+        self._seen_at = None  # snapshot_time each baseline row was last seen, same index
+        self._snapshot_time = None
+        self._diffs = {}
+
+    def update(self, df, snapshot_time=None, sids=None):
+        """
+        Diff df against the previous snapshot and make it the new baseline.
+
+        Args:
+            df (DataFrame): Session state with KEY_COLUMNS and tracked columns
+            snapshot_time (float): When df was fetched
+            sids (iterable): SIDs df was limited to, or None if it covers
+                every session
+
+        Calling again with the same snapshot_time and sids returns the
+        stored diff, so every viewer of a cached snapshot sees the same changes.
+        """
+        scope = None if sids is None else frozenset(int(sid) for sid in sids)
+        with self._lock:
+            cached = self._diffs.get((snapshot_time, scope))
+            if snapshot_time is not None and cached is not None:
+                return cached
+
+            current = df.set_index(KEY_COLUMNS)
+            first = self._previous is None
+            previous = current.iloc[:0] if first else self._previous
+            seen_at = pd.Series(dtype=float) if first else self._seen_at
+            if scope is None:
+                in_scope = np.ones(len(previous), dtype=bool)
+                previous_time = self._snapshot_time
+            else:
+                in_scope = previous.index.get_level_values("SID").isin(list(scope))
+                previous_time = seen_at[in_scope].max() if in_scope.any() else None
+            scoped = previous[in_scope]
+            seen = current.index.isin(scoped.index)
+
+            matched = current[seen]
+            before = scoped.reindex(matched.index)
+            changed = np.zeros(len(current), dtype=bool)
+            changed[seen] = _changed_mask(before, matched, self.tracked_columns)
+
+            change = np.full(len(current), "", dtype=object)
+            if scope is None and not first:  # the first snapshot is the baseline, not a burst of logons
+                change[~seen] = NEW
+            elif scope is not None and previous_time is not None and snapshot_time is not None \
+                    and "CONNECTED_SECONDS" in current.columns:
+                connected = current["CONNECTED_SECONDS"].to_numpy(dtype=float, na_value=np.inf)
+                change[~seen & (connected <= snapshot_time - previous_time)] = NEW
+            change[changed] = CHANGED
+
+            pga_delta = np.full(len(current), np.nan)
+            pga_delta[seen] = (matched["MEMORY_MB"].to_numpy(dtype=float, na_value=np.nan)
+                               - before["MEMORY_MB"].to_numpy(dtype=float, na_value=np.nan))
+
+            diff = {
+                "added": current[change == NEW],
+                "removed": scoped[~scoped.index.isin(current.index)],
+                "changed": current[changed],
+                "change": pd.Series(change, index=current.index),
+                "pga_delta": pd.Series(pga_delta, index=current.index),
+                "snapshot_time": snapshot_time,
+                "previous_time": previous_time,
+            }
+            current_seen = pd.Series(snapshot_time, index=current.index, dtype=float)
+            if scope is None:
+                self._previous, self._seen_at = current, current_seen
+            else:
+                self._previous = pd.concat([previous[~in_scope], current])
+                self._seen_at = pd.concat([seen_at[~in_scope], current_seen])
+            self._snapshot_time = snapshot_time
+            if len(self._diffs) >= MAX_CACHED_DIFFS:
+                del self._diffs[next(iter(self._diffs))]
+            self._diffs[(snapshot_time, scope)] = diff
+            return diff
+
+def annotate_sessions(df, diff):
+    """Add Change and PGA Delta MB columns to a sessions frame from a tracker diff."""
+    keys = pd.MultiIndex.from_frame(df[KEY_COLUMNS])
+    return df.assign(**{
+        "Change": diff["change"].reindex(keys).fillna("").to_numpy(),
+        "PGA Delta MB": diff["pga_delta"].reindex(keys).to_numpy(),
+    })
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+def get_tracker(env, db):
+    """Return the process-wide tracker for env/db, creating it on first use."""
+    with _trackers_lock:
+        return _trackers.setdefault((env, db), SessionTracker())
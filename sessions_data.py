@@ -0,0 +1,207 @@
+import pandas as pd
+
+from db_conn import fetch_dataframe
+
+# Session Details page sizes offered in the UI
+PAGE_SIZES = [50, 100, 250, 500]
+DEFAULT_PAGE_SIZE = 100
+
+# The sessions the Session Details view counts and pages through. The KPIs,
+# the filtered count and the pages all use it, so their totals agree.
+SESSION_SCOPE = "s.type = 'USER' AND s.username IS NOT NULL"
+
+# Per-username/status counts over every session in SESSION_SCOPE: feeds the
+# KPIs and the filter option lists without fetching any session rows.
+SESSIONS_SUMMARY_QUERY = f"""
+SELECT
+    s.username,
+    s.status,
+    COUNT(*) AS session_count,
+    SUM(CASE WHEN s.blocking_session IS NOT NULL THEN 1 ELSE 0 END) AS blocked_count
+FROM v$session s
+WHERE {SESSION_SCOPE}
+GROUP BY s.username, s.status
+"""
+
+# One page of session rows. {filters} and {keyset} are filled in by
+# build_sessions_page_query(); every user-supplied value is a bind variable.
+# Pages are ordered by (status DESC, logon_time DESC, sid DESC), which is
+# unique, so the last row of a page is the keyset cursor for the next one.
+SESSIONS_PAGE_QUERY = f"""
+SELECT
+    s.sid,
+    s.serial#,
+    s.username,
+    s.status,
+    s.osuser,
+    s.machine,
+    s.program,
+    s.module,
+    s.action,
+    TO_CHAR(s.logon_time, 'DD-MON-YYYY HH24:MI:SS') AS logon_time,
+    ROUND((SYSDATE - s.logon_time) * 24, 2) AS hours_connected,
+    s.blocking_session,
+    s.sql_id,
+    s.prev_sql_id,
+    ROUND(st.value/1024/1024, 2) AS memory_mb,
+    s.logon_time AS logon_sort
+FROM v$session s
+LEFT JOIN v$sesstat st ON s.sid = st.sid AND st.statistic# = (
+    SELECT statistic# FROM v$statname WHERE name = 'session pga memory'
+)
+WHERE {SESSION_SCOPE}{{filters}}{{keyset}}
+ORDER BY s.status DESC, s.logon_time DESC, s.sid DESC
+FETCH FIRST :page_rows ROWS ONLY
+"""
+
+# Slim state of the USER sessions on a few SIDs (those on the page being
+# viewed) for session_tracker: enough to tell which of them logged on, ended
+# or changed since the last refresh. {sids} is a bind-variable IN list, so a
+# refresh reads only those rows instead of all of v$session and v$sesstat.
+SESSIONS_STATE_QUERY = f"""
+SELECT
+    s.sid,
+    s.serial#,
+    s.username,
+    s.status,
+    s.sql_id,
+    ROUND(st.value/1024/1024, 2) AS memory_mb,
+    ROUND((SYSDATE - s.logon_time) * 86400) AS connected_seconds
+FROM v$session s
+LEFT JOIN v$sesstat st ON s.sid = st.sid AND st.statistic# = (
+    SELECT statistic# FROM v$statname WHERE name = 'session pga memory'
+)
+WHERE {SESSION_SCOPE}
+  AND {{sids}}
+"""
+
+SESSIONS_STATE_COLUMNS = ["SID", "SERIAL#", "USERNAME", "STATUS", "SQL_ID", "MEMORY_MB", "CONNECTED_SECONDS"]
+
+# Every session in a wait-for chain: the waiters and whoever they wait on,
+# background sessions included, for blocking_chains.analyse_blocking()
+BLOCKING_SESSIONS_QUERY = """
+SELECT
+    s.sid,
+    s.serial#,
+    s.username,
+    s.status,
+    s.machine,
+    s.program,
+    s.sql_id,
+    s.event,
+    ROUND(s.wait_time_micro / 1000000, 1) AS wait_seconds,
+    s.blocking_session
+FROM v$session s
+WHERE s.blocking_session IS NOT NULL
+   OR s.sid IN (SELECT blocking_session FROM v$session WHERE blocking_session IS NOT NULL)
+"""
+
+SESSIONS_FILTERED_SUMMARY_QUERY = f"""
+SELECT s.username, s.status, COUNT(*) AS session_count
+FROM v$session s
+WHERE {SESSION_SCOPE}{{filters}}
+GROUP BY s.username, s.status
+"""
+
+KEYSET_CONDITION = """
+  AND (s.status < :k_status
+       OR (s.status = :k_status AND (s.logon_time < :k_logon
+           OR (s.logon_time = :k_logon AND s.sid < :k_sid))))"""
+
+# Oracle rejects IN lists longer than this (ORA-01795)
+MAX_IN_LIST = 1000
+
+def _in_clause(column, prefix, values, binds):
+    names = [f"{prefix}{i}" for i in range(len(values))]
+    binds.update(zip(names, values))
+    chunks = [names[i:i + MAX_IN_LIST] for i in range(0, len(names), MAX_IN_LIST)]
+    parts = [f"{column} IN ({', '.join(':' + n for n in chunk)})" for chunk in chunks]
+    return parts[0] if len(parts) == 1 else "(" + " OR ".join(parts) + ")"
+
+def build_filter_clause(statuses, usernames, min_hours):
+    """
+    Turn the filter widgets into SQL predicates and bind variables.
+
+    Args:
+        statuses (list): STATUS values to include, or None for all
+        usernames (list): USERNAME values to include, or None for every
+            session in SESSION_SCOPE
+        min_hours (float): Minimum HOURS_CONNECTED
+
+    Returns:
+        tuple: (sql fragment of AND predicates, dict of binds)
+    """
+    binds = {"min_hours": float(min_hours)}
+    clause = ""
+    if statuses is not None:
+        clause += "\n  AND " + _in_clause("s.status", "st", list(statuses), binds)
+    if usernames is not None:
+        clause += "\n  AND " + _in_clause("s.username", "un", list(usernames), binds)
+    clause += "\n  AND (SYSDATE - s.logon_time) * 24 >= :min_hours"
+    return clause, binds
+
+def _is_empty_selection(statuses, usernames):
+    return (statuses is not None and len(statuses) == 0) or (usernames is not None and len(usernames) == 0)
+
+def build_sessions_page_query(statuses, usernames, min_hours, page_size, after=None):
+    """
+    Build the SQL and binds for one page of sessions.
+
+    Args:
+        statuses (list): STATUS values to include, or None for all
+        usernames (list): USERNAME values to include, or None for all
+        min_hours (float): Minimum HOURS_CONNECTED
+        page_size (int): Rows per page; one extra row is fetched to detect a next page
+        after (tuple): (status, logon_time, sid) of the previous page's last row
+
+    Returns:
+        tuple: (sql, binds)
+    """
+    filters, binds = build_filter_clause(statuses, usernames, min_hours)
+    keyset = ""
+    if after is not None:
+        keyset = KEYSET_CONDITION
+        binds["k_status"], binds["k_logon"], binds["k_sid"] = after
+    binds["page_rows"] = int(page_size) + 1
+    return SESSIONS_PAGE_QUERY.format(filters=filters, keyset=keyset), binds
+
+def query_sessions_summary(conn):
+    return fetch_dataframe(conn, SESSIONS_SUMMARY_QUERY)
+
+def build_sessions_state_query(sids):
+    binds = {}
+    return SESSIONS_STATE_QUERY.format(sids=_in_clause("s.sid", "sid", [int(sid) for sid in sids], binds)), binds
+
+def query_sessions_state(conn, sids):
+    """State of the sessions on the given SIDs (see SESSIONS_STATE_QUERY)."""
+    if not sids:
+        return pd.DataFrame(columns=SESSIONS_STATE_COLUMNS)
+    sql, binds = build_sessions_state_query(sids)
+    return fetch_dataframe(conn, sql, binds)
+
+def query_blocking_sessions(conn):
+    return fetch_dataframe(conn, BLOCKING_SESSIONS_QUERY)
+
+def query_filtered_summary(conn, statuses, usernames, min_hours):
+    if _is_empty_selection(statuses, usernames):
+        return pd.DataFrame(columns=["USERNAME", "STATUS", "SESSION_COUNT"])
+    filters, binds = build_filter_clause(statuses, usernames, min_hours)
+    return fetch_dataframe(conn, SESSIONS_FILTERED_SUMMARY_QUERY.format(filters=filters), binds)
+
+def query_sessions_page(conn, statuses, usernames, min_hours, page_size, after=None):
+    """
+    Fetch one page of sessions matching the filters.
+
+    Returns:
+        tuple: (page DataFrame, keyset cursor for the next page or None)
+    """
+    if _is_empty_selection(statuses, usernames):
+        return pd.DataFrame(), None
+    sql, binds = build_sessions_page_query(statuses, usernames, min_hours, page_size, after)
+    df = fetch_dataframe(conn, sql, binds)
+    next_after = None
+    if len(df) > page_size:
+        df = df.iloc[:page_size]
+        last = df.iloc[-1]
+        next_after = (last["STATUS"], pd.Timestamp(last["LOGON_SORT"]).to_pydatetime(), int(last["SID"]))
+    return df.drop(columns=["LOGON_SORT"]), next_after
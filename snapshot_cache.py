@@ -0,0 +1,242 @@
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Shared by every Streamlit worker on this host (override with SNAPSHOT_CACHE_PATH)
+CACHE_DB_PATH = os.environ.get("SNAPSHOT_CACHE_PATH", os.path.join(BASE_DIR, "snapshot_cache.db"))
+
+# A refresh lease not released within this many seconds is assumed dead and
+# can be taken over by another viewer
+LEASE_TIMEOUT = 120
+
+# How often a waiting viewer checks whether the lease holder has finished
+POLL_INTERVAL = 0.1
+
+# After a failed background refresh the key is not retried for this long (seconds)
+RETRY_AFTER = 30
+
+# Background refreshes running at once per process
+REFRESH_WORKERS = 4
+
+# Entries not refreshed for this long are purged
+RETENTION = 86400
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    value BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cache_leases (
+    key TEXT PRIMARY KEY,
+    token TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+def cache_key(*parts):
+    """Key for a query result, e.g. cache_key("tablespace", env, db)."""
+    return repr(parts)
+
+class SnapshotCache:
+    """
+    Query results shared by every viewer and every Streamlit process on the host.
+
+    Entries live in a SQLite file keyed by cache_key(). When an entry is
+    missing or older than the caller's ttl, exactly one caller takes the
+    key's lease (a row in cache_leases, so it works across processes) and
+    runs the upstream query; everyone else polls until the fresh entry
+    appears. A lease whose holder crashed expires after lease_timeout.
+
+    get_or_refresh() adds stale-while-revalidate on top: a stale entry is
+    returned at once while the lease holder refreshes it in the background.
+    """
+
+    def __init__(self, path=CACHE_DB_PATH, lease_timeout=LEASE_TIMEOUT, poll_interval=POLL_INTERVAL,
+                 retention=RETENTION, retry_after=RETRY_AFTER, refresh_workers=REFRESH_WORKERS):
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.retry_after = retry_after
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="cache-refresh")
+
+    def _connect(self):
+        # Autocommit; write transactions are opened explicitly with BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        with self._schema_lock:
+            if not self._schema_ready:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(SCHEMA)
+                self._schema_ready = True
+        return conn
+
+    def read(self, key):
+        """Return (value, created) for key, or None if nothing is cached."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT value, created FROM cache_entries WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return pickle.loads(row[0]), row[1]
+
+    def store(self, key, value, created=None):
+        """Save value under key and return its created timestamp."""
+        created = time.time() if created is None else created
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?)", (key, created, blob))
+            conn.execute("DELETE FROM cache_entries WHERE created < ?", (created - self.retention,))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return created
+
+    def try_lease(self, key):
+        """Take the refresh lease for key; returns a token, or None if someone else holds it."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT expires FROM cache_leases WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[0] > now:
+                conn.execute("ROLLBACK")
+                return None
+            token = uuid.uuid4().hex
+            conn.execute("INSERT OR REPLACE INTO cache_leases VALUES (?, ?, ?)",
+                         (key, token, now + self.lease_timeout))
+            conn.execute("COMMIT")
+            return token
+        finally:
+            conn.close()
+
+    def release_lease(self, key, token):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM cache_leases WHERE key = ? AND token = ?", (key, token))
+        finally:
+            conn.close()
+
+    def hold_lease(self, key, token, seconds):
+        """
+        Keep the lease for another few seconds, e.g. to back off after a failure.
+
+        Returns:
+            bool: False when token no longer holds the lease
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.execute("UPDATE cache_leases SET expires = ? WHERE key = ? AND token = ?",
+                                  (time.time() + seconds, key, token))
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def _load_or_compute(self, key, compute, ttl):
+        deadline = time.time() + self.lease_timeout
+        while True:
+            entry = self.read(key)
+            if entry is not None and time.time() - entry[1] < ttl:
+                return entry
+
+            token = self.try_lease(key)
+            if token is not None:
+                try:
+                    # Another caller may have stored a fresh value since our read
+                    entry = self.read(key)
+                    if entry is not None and time.time() - entry[1] < ttl:
+                        return entry
+                    value = compute()
+                    return value, self.store(key, value)
+                finally:
+                    self.release_lease(key, token)
+
+            if time.time() >= deadline:
+                raise TimeoutError(f"Timed out waiting for another viewer to refresh {key}")
+            time.sleep(self.poll_interval)
+
+    def get_or_compute(self, key, compute, ttl):
+        """
+        Return the cached value for key, running compute() at most once per ttl
+        across all callers sharing the cache file.
+
+        Args:
+            key (str): Entry key from cache_key()
+            compute (callable): Upstream query; its result must be picklable
+            ttl (float): Seconds a stored value is served without refreshing
+
+        Returns:
+            The cached or freshly computed value. Exceptions from compute()
+            propagate to the caller that ran it and nothing is stored.
+        """
+        return self._load_or_compute(key, compute, ttl)[0]
+
+    def _refresh(self, key, token, compute):
+        try:
+            value = compute()
+        except Exception:
+            log.warning("Background refresh of %s failed; keeping the last good value", key, exc_info=True)
+            self.hold_lease(key, token, self.retry_after)
+            return
+        try:
+            self.store(key, value)
+        finally:
+            self.release_lease(key, token)
+
+    def get_or_refresh(self, key, compute, ttl, max_stale):
+        """
+        Stale-while-revalidate lookup.
+
+        A fresh entry is returned as is. An entry older than ttl but younger
+        than max_stale is returned immediately and refreshed in the
+        background by whichever caller wins the lease; if that refresh
+        fails, the last good value keeps being served and the key is retried
+        after retry_after seconds. Without an entry younger than max_stale
+        the caller blocks on get_or_compute() semantics.
+
+        Args:
+            key (str): Entry key from cache_key()
+            compute (callable): Upstream query; its result must be picklable
+            ttl (float): Seconds a stored value counts as fresh
+            max_stale (float): Hard limit on the age of a value served while refreshing
+
+        Returns:
+            tuple: (value, created timestamp)
+        """
+        entry = self.read(key)
+        if entry is not None:
+            age = time.time() - entry[1]
+            if age < ttl:
+                return entry
+            if age < max_stale:
+                token = self.try_lease(key)
+                if token is not None:
+                    self._refresher.submit(self._refresh, key, token, compute)
+                return entry
+        return self._load_or_compute(key, compute, ttl)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Return the process-wide SnapshotCache for CACHE_DB_PATH."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SnapshotCache()
+        return _cache
@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+
+import paramiko
+
+# Connection settings for pooled SSH transports
+SSH_CONNECT_TIMEOUT = 7
+SSH_KEEPALIVE_INTERVAL = 60
+SSH_IDLE_TIMEOUT = int(os.environ.get("SSH_IDLE_TIMEOUT", "900"))  # seconds
+
+class SSHConnectionPool:
+    """
+    Process-wide pool of authenticated SSH clients keyed by (host, user).
+
+    A pooled client is health-checked every time it is borrowed and is
+    reconnected transparently if its transport has died. Clients that have
+    not been used for idle_timeout seconds are closed on the next borrow.
+    Callers must not close the clients they get from the pool; each
+    exec_command() opens its own channel on the shared transport.
+    """
+
+    def __init__(self, connect_timeout=SSH_CONNECT_TIMEOUT, idle_timeout=SSH_IDLE_TIMEOUT,
+                 keepalive_interval=SSH_KEEPALIVE_INTERVAL):
+        self.connect_timeout = connect_timeout
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self._lock = threading.Lock()
+        self._entries = {}    # (host, user) -> {"client", "password", "last_used"}
+        self._key_locks = {}  # (host, user) -> threading.Lock
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _connect(self, host, user, password):
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            client.connect(hostname=host, username=user, password=password, timeout=self.connect_timeout)
+        except Exception:
+            client.close()
+            raise
+        transport = client.get_transport()
+        if transport is not None and self.keepalive_interval:
+            transport.set_keepalive(self.keepalive_interval)
+        return client
+
+    @staticmethod
+    def is_healthy(client):
+        transport = client.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        try:
+            transport.send_ignore()
+        except Exception:
+            return False
+        return True
+
+    def get(self, host, user, password):
+        """
+        Borrow an authenticated client for host/user, connecting if needed.
+
+        Raises whatever paramiko raises when a fresh connection cannot be made.
+        """
+        self.evict_idle()
+        key = (host, user)
+        with self._key_lock(key):
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                if entry["password"] == password and self.is_healthy(entry["client"]):
+                    entry["last_used"] = time.monotonic()
+                    return entry["client"]
+                self.discard(host, user)
+
+            client = self._connect(host, user, password)
+            with self._lock:
+                self._entries[key] = {"client": client, "password": password, "last_used": time.monotonic()}
+            return client
+
+    def discard(self, host, user):
+        """Drop and close the pooled client for host/user, if any."""
+        with self._lock:
+            entry = self._entries.pop((host, user), None)
+        if entry is not None:
+            try:
+                entry["client"].close()
+            except Exception:
+                pass
+
+    def evict_idle(self, now=None):
+        """Close clients that have been idle for longer than idle_timeout."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            stale = [key for key, entry in self._entries.items()
+                     if now - entry["last_used"] > self.idle_timeout]
+        for host, user in stale:
+            self.discard(host, user)
+        return len(stale)
+
+    def close_all(self):
+        with self._lock:
+            keys = list(self._entries)
+        for host, user in keys:
+            self.discard(host, user)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """
+    Return the process-wide SSH pool.
+
+    The pool lives at module level, so it survives Streamlit reruns (the
+    script is re-executed but imported modules are not) and is shared by
+    app.py and combinedapp.py when they run in the same process.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SSHConnectionPool()
+        return _pool
@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 from pathlib import Path
 from db_conn import get_oracle_connection
+from tablespace_queries import query_tablespace_usage
+from tablespace_status import NEEDS_EXTENSION, highlight_tablespaces, tablespace_status
 
 # --- Available Database Environments and DBs ---
 DB_CONFIGS = {
@@ -53,84 +55,14 @@ DB_CONFIGS = {
 #LEFT JOIN ts_autoextend x ON a.tablespace_name = x.tablespace_name
 #ORDER BY a.tablespace_name
 #"""
-TABLESPACE_QUERY = """
-WITH ts_alloc AS (
-  SELECT
-    tablespace_name,
-    SUM(bytes) / 1024 / 1024 AS allocated_mb,
-    SUM(DECODE(autoextensible, 'YES', maxbytes, bytes)) / 1024 / 1024 AS max_mb
-  FROM dba_data_files
-  GROUP BY tablespace_name
-),
-ts_free AS (
-  SELECT
-    tablespace_name,
-    SUM(bytes) / 1024 / 1024 AS free_mb
-  FROM dba_free_space
-  GROUP BY tablespace_name
-),
-ts_autoextend AS (
-  SELECT
-    tablespace_name,
-    SUM(DECODE(autoextensible, 'YES', maxbytes - bytes, 0)) / 1024 / 1024 AS available_extension_mb
-  FROM dba_data_files
-  GROUP BY tablespace_name
-)
-SELECT
-  a.tablespace_name AS "Tablespace Name",
-  ROUND(a.max_mb, 2) AS "Max MB",
-  ROUND(a.allocated_mb, 2) AS "Allocated MB",
-  ROUND(NVL(f.free_mb, 0), 2) AS "Free MB",
-  ROUND((a.allocated_mb - NVL(f.free_mb, 0)), 2) AS "Used MB",
-  CASE
-    WHEN a.allocated_mb = 0 THEN 0
-    ELSE ROUND(((a.allocated_mb - NVL(f.free_mb, 0)) / a.allocated_mb) * 100, 2)
-  END AS "Percentage Used",
-  ROUND(NVL(x.available_extension_mb, 0), 2) AS "Available Extension MB",
-  CASE
-    WHEN a.allocated_mb = 0 THEN 0
-    ELSE ROUND((NVL(f.free_mb, 0) / a.allocated_mb) * 100, 2)
-  END AS "Percentage Free"
-FROM ts_alloc a
-LEFT JOIN ts_free f ON a.tablespace_name = f.tablespace_name
-LEFT JOIN ts_autoextend x ON a.tablespace_name = x.tablespace_name
-ORDER BY a.tablespace_name
-"""
-def get_status(row):
-    max_mb = row["Max MB"]
-    pct_free = row["Percentage Free"]
-    if pct_free <= (10 if max_mb < 1000 else 5):
-        return "Needs Extension"
-    return "Normal"
-
-def highlight_status(row):
-    max_mb = row["Max MB"]
-    pct_free = row["Percentage Free"]
-    avail_ext = row["Available Extension MB"]
-
-    if avail_ext < 10000:
-        if max_mb >= 1000 and pct_free <= 5:
-            color = "#ffcccc"  # Light red
-        elif max_mb < 1000 and pct_free <= 10:
-            color = "#fff5cc"  # Light yellow
-        else:
-            color = ""
-    else:
-        color = ""
-
-    return [f"background-color: {color}"] * len(row)
-
 @st.cache_data(ttl=300)
 def fetch_tablespace_data(env, db):
     try:
         conn = get_oracle_connection(env, db)
-        cursor = conn.cursor()
-        cursor.execute(TABLESPACE_QUERY)
-        cols = [desc[0] for desc in cursor.description]
-        data = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return pd.DataFrame(data, columns=cols)
+        try:
+            return query_tablespace_usage(conn, key=(env, db))
+        finally:
+            conn.close()
     except Exception as e:
         st.error(f"Error fetching tablespace data: {e}")
         return pd.DataFrame()
@@ -186,10 +118,10 @@ def main():
         st.warning("No tablespace data available.")
         return
 
-    df["Status"] = df.apply(get_status, axis=1)
+    df["Status"] = tablespace_status(df)
 
     total_ts = len(df)
-    needs_ext = (df["Status"] == "Needs Extension").sum()
+    needs_ext = (df["Status"] == NEEDS_EXTENSION).sum()
 
     kpi1, kpi2, kpi3 = st.columns(3)
     kpi1.metric(label="Total Tablespaces", value=total_ts)
@@ -198,7 +130,7 @@ def main():
 
     st.markdown("---")
 
-    styled_df = df.style.apply(highlight_status, axis=1).format({
+    styled_df = df.style.apply(highlight_tablespaces, axis=None).format({
         "Max MB": "{:,.0f}",
         "Allocated MB": "{:,.0f}",
         "Free MB": "{:,.0f}",
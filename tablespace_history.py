@@ -0,0 +1,218 @@
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Local append-only history of DB metrics (override with METRICS_HISTORY_PATH)
+HISTORY_DB_PATH = os.environ.get("METRICS_HISTORY_PATH", os.path.join(BASE_DIR, "metrics_history.db"))
+
+# Skip a snapshot if the same database was sampled less than this long ago (seconds),
+# so several viewers or worker processes do not multiply the history.
+MIN_SAMPLE_INTERVAL = 900
+
+# Regression window and the minimum evidence needed before forecasting
+FORECAST_WINDOW_DAYS = 30
+FORECAST_MIN_SAMPLES = 4
+FORECAST_MIN_SPAN_DAYS = 1
+
+# v$sysmetric rates cover 60-second intervals; sampling faster only repeats them
+DB_LOAD_MIN_SAMPLE_INTERVAL = 60
+
+# Database load history kept for the sparklines (seconds)
+DB_LOAD_WINDOW = 6 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tablespace_samples (
+    env TEXT NOT NULL,
+    db TEXT NOT NULL,
+    tablespace TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    used_mb REAL,
+    allocated_mb REAL,
+    max_mb REAL,
+    PRIMARY KEY (env, db, tablespace, ts)
+) WITHOUT ROWID
+"""
+
+# One row per database, metric and sample: new db_load metrics need no migration
+DB_LOAD_SCHEMA = """
+CREATE TABLE IF NOT EXISTS db_load_samples (
+    env TEXT NOT NULL,
+    db TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    value REAL,
+    PRIMARY KEY (env, db, metric, ts)
+) WITHOUT ROWID
+"""
+
+def connect_history(path=HISTORY_DB_PATH):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(SCHEMA)
+    conn.execute(DB_LOAD_SCHEMA)
+    return conn
+
+def last_sample_time(conn, env, db):
+    row = conn.execute(
+        "SELECT MAX(ts) FROM tablespace_samples WHERE env = ? AND db = ?", (env, db)
+    ).fetchone()
+    return row[0]
+
+def record_tablespace_snapshot(env, db, df, ts=None, min_interval=MIN_SAMPLE_INTERVAL, path=HISTORY_DB_PATH):
+    """
+    Append one sample per tablespace of a TABLESPACE_QUERY frame.
+
+    Returns:
+        int: Number of rows written (0 when the database was sampled recently)
+    """
+    if df.empty:
+        return 0
+    ts = int(time.time() if ts is None else ts)
+    conn = connect_history(path)
+    try:
+        last = last_sample_time(conn, env, db)
+        if last is not None and ts - last < min_interval:
+            return 0
+        rows = zip(
+            [env] * len(df),
+            [db] * len(df),
+            df["Tablespace Name"].tolist(),
+            [ts] * len(df),
+            df["Used MB"].astype(float).tolist(),
+            df["Allocated MB"].astype(float).tolist(),
+            df["Max MB"].astype(float).tolist(),
+        )
+        with conn:
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO tablespace_samples VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+def load_tablespace_history(env, db, since=None, path=HISTORY_DB_PATH):
+    if since is None:
+        since = time.time() - FORECAST_WINDOW_DAYS * 86400
+    conn = connect_history(path)
+    try:
+        return pd.read_sql_query(
+            "SELECT tablespace, ts, used_mb, allocated_mb, max_mb FROM tablespace_samples "
+            "WHERE env = ? AND db = ? AND ts >= ? ORDER BY tablespace, ts",
+            conn,
+            params=(env, db, int(since)),
+        )
+    finally:
+        conn.close()
+
+def forecast_days_to_full(history, now=None, min_samples=FORECAST_MIN_SAMPLES, min_span_days=FORECAST_MIN_SPAN_DAYS):
+    """
+    Fit used_mb = a + b * t per tablespace with one vectorised least-squares
+    pass and project when the latest Max MB is reached.
+
+    Days To Full counts from now, not from the latest sample: usage is
+    carried forward along the fitted growth over any gap since then, so an
+    old forecast keeps counting down instead of looking current.
+
+    Args:
+        history (DataFrame): tablespace, ts, used_mb, max_mb columns
+        now (float): Time to count from (default: time.time())
+
+    Returns:
+        DataFrame indexed by tablespace with Growth MB/Day and Days To Full
+        (NaN where the tablespace is not growing or there is too little history)
+    """
+    columns = ["Growth MB/Day", "Days To Full"]
+    if history.empty:
+        return pd.DataFrame(columns=columns, dtype=float)
+
+    codes, names = pd.factorize(history["tablespace"])
+    k = len(names)
+    t = history["ts"].to_numpy(dtype=float) / 86400.0
+    u = history["used_mb"].to_numpy(dtype=float)
+
+    n = np.bincount(codes, minlength=k).astype(float)
+    t_first = np.full(k, np.inf)
+    np.minimum.at(t_first, codes, t)
+    t_last = np.full(k, -np.inf)
+    np.maximum.at(t_last, codes, t)
+    # Centre time per group to keep the sums numerically stable
+    tc = t - t_first[codes]
+    s_t = np.bincount(codes, tc, k)
+    s_u = np.bincount(codes, u, k)
+    s_tt = np.bincount(codes, tc * tc, k)
+    s_tu = np.bincount(codes, tc * u, k)
+
+    denom = n * s_tt - s_t * s_t
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(denom > 0, (n * s_tu - s_t * s_u) / denom, np.nan)
+
+    # Latest sample per tablespace (history is sorted by tablespace, ts)
+    last_idx = np.zeros(k, dtype=int)
+    np.maximum.at(last_idx, codes, np.arange(len(codes)))
+    latest_used = u[last_idx]
+    latest_max = history["max_mb"].to_numpy(dtype=float)[last_idx]
+
+    enough = (n >= min_samples) & (t_last - t_first >= min_span_days)
+    growing = enough & (slope > 0)
+    elapsed = np.maximum((time.time() if now is None else now) / 86400.0 - t_last, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        used_now = latest_used + slope * elapsed
+        days = np.where(growing, np.maximum(latest_max - used_now, 0) / slope, np.nan)
+
+    return pd.DataFrame(
+        {"Growth MB/Day": np.where(enough, slope, np.nan), "Days To Full": days},
+        index=pd.Index(names, name="tablespace"),
+    )
+
+def record_db_load_sample(env, db, load, ts=None, min_interval=DB_LOAD_MIN_SAMPLE_INTERVAL, path=HISTORY_DB_PATH):
+    """
+    Append one sample of each numeric metric in load ({metric: value}).
+
+    Returns:
+        int: Number of rows written (0 when the database was sampled recently)
+    """
+    values = [(metric, value) for metric, value in load.items() if isinstance(value, (int, float))]
+    if not values:
+        return 0
+    ts = int(time.time() if ts is None else ts)
+    conn = connect_history(path)
+    try:
+        last = conn.execute(
+            "SELECT MAX(ts) FROM db_load_samples WHERE env = ? AND db = ?", (env, db)
+        ).fetchone()[0]
+        if last is not None and ts - last < min_interval:
+            return 0
+        with conn:
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO db_load_samples VALUES (?, ?, ?, ?, ?)",
+                [(env, db, metric, ts, float(value)) for metric, value in values],
+            )
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+def load_db_load_history(env, db, since=None, path=HISTORY_DB_PATH):
+    """
+    Returns:
+        DataFrame: one row per sample time (ts) and one column per metric
+    """
+    if since is None:
+        since = time.time() - DB_LOAD_WINDOW
+    conn = connect_history(path)
+    try:
+        samples = pd.read_sql_query(
+            "SELECT ts, metric, value FROM db_load_samples "
+            "WHERE env = ? AND db = ? AND ts >= ? ORDER BY ts",
+            conn,
+            params=(env, db, int(since)),
+        )
+    finally:
+        conn.close()
+    if samples.empty:
+        return pd.DataFrame(columns=["ts"])
+    return samples.pivot(index="ts", columns="metric", values="value").reset_index().rename_axis(columns=None)
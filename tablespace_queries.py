@@ -0,0 +1,155 @@
+import threading
+
+import oracledb
+import pandas as pd
+
+from db_conn import fetch_dataframe
+
+# Full tablespace usage report: aggregates DBA_FREE_SPACE and reads
+# DBA_DATA_FILES twice. Works for any user with SELECT on the DBA_ views.
+# {where} limits it to some tablespaces (see build_tablespace_query).
+_TABLESPACE_QUERY_TEMPLATE = """
+WITH ts_alloc AS (
+  SELECT
+    tablespace_name,
+    SUM(bytes) / 1024 / 1024 AS allocated_mb,
+    SUM(DECODE(autoextensible, 'YES', maxbytes, bytes)) / 1024 / 1024 AS max_mb
+  FROM dba_data_files
+  GROUP BY tablespace_name
+),
+ts_free AS (
+  SELECT
+    tablespace_name,
+    SUM(bytes) / 1024 / 1024 AS free_mb
+  FROM dba_free_space
+  GROUP BY tablespace_name
+),
+ts_autoextend AS (
+  SELECT
+    tablespace_name,
+    SUM(DECODE(autoextensible, 'YES', maxbytes - bytes, 0)) / 1024 / 1024 AS available_extension_mb
+  FROM dba_data_files
+  GROUP BY tablespace_name
+)
+SELECT
+  a.tablespace_name AS "Tablespace Name",
+  ROUND(a.max_mb, 2) AS "Max MB",
+  ROUND(a.allocated_mb, 2) AS "Allocated MB",
+  ROUND(NVL(f.free_mb, 0), 2) AS "Free MB",
+  ROUND((a.allocated_mb - NVL(f.free_mb, 0)), 2) AS "Used MB",
+  CASE
+    WHEN a.allocated_mb = 0 THEN 0
+    ELSE ROUND(((a.allocated_mb - NVL(f.free_mb, 0)) / a.allocated_mb) * 100, 2)
+  END AS "Percentage Used",
+  ROUND(NVL(x.available_extension_mb, 0), 2) AS "Available Extension MB",
+  CASE
+    WHEN a.allocated_mb = 0 THEN 0
+    ELSE ROUND((NVL(f.free_mb, 0) / a.allocated_mb) * 100, 2)
+  END AS "Percentage Free"
+FROM ts_alloc a
+LEFT JOIN ts_free f ON a.tablespace_name = f.tablespace_name
+LEFT JOIN ts_autoextend x ON a.tablespace_name = x.tablespace_name{where}
+ORDER BY a.tablespace_name
+"""
+
+TABLESPACE_QUERY = _TABLESPACE_QUERY_TEMPLATE.format(where="")
+
+# Same columns from DBA_TABLESPACE_USAGE_METRICS (used blocks maintained by
+# MMON) and a single DBA_DATA_FILES pass, so DBA_FREE_SPACE is never read.
+# A tablespace with no metrics row (new, offline or read-only, or MMON has
+# not refreshed yet) comes back with NULL usage; query_tablespace_usage()
+# fills those rows in from the full query.
+TABLESPACE_METRICS_QUERY = """
+WITH ts_files AS (
+  SELECT
+    tablespace_name,
+    SUM(bytes) / 1024 / 1024 AS allocated_mb,
+    SUM(DECODE(autoextensible, 'YES', maxbytes, bytes)) / 1024 / 1024 AS max_mb,
+    SUM(DECODE(autoextensible, 'YES', maxbytes - bytes, 0)) / 1024 / 1024 AS available_extension_mb
+  FROM dba_data_files
+  GROUP BY tablespace_name
+),
+ts_used AS (
+  SELECT
+    a.tablespace_name,
+    a.allocated_mb,
+    a.max_mb,
+    a.available_extension_mb,
+    LEAST(m.used_space * t.block_size / 1024 / 1024, a.allocated_mb) AS used_mb
+  FROM ts_files a
+  JOIN dba_tablespaces t ON t.tablespace_name = a.tablespace_name
+  LEFT JOIN dba_tablespace_usage_metrics m ON m.tablespace_name = a.tablespace_name
+)
+SELECT
+  tablespace_name AS "Tablespace Name",
+  ROUND(max_mb, 2) AS "Max MB",
+  ROUND(allocated_mb, 2) AS "Allocated MB",
+  ROUND(allocated_mb - used_mb, 2) AS "Free MB",
+  ROUND(used_mb, 2) AS "Used MB",
+  CASE
+    WHEN allocated_mb = 0 THEN 0
+    ELSE ROUND((used_mb / allocated_mb) * 100, 2)
+  END AS "Percentage Used",
+  ROUND(available_extension_mb, 2) AS "Available Extension MB",
+  CASE
+    WHEN allocated_mb = 0 THEN 0
+    ELSE ROUND(((allocated_mb - used_mb) / allocated_mb) * 100, 2)
+  END AS "Percentage Free"
+FROM ts_used
+ORDER BY tablespace_name
+"""
+
+# ORA-00942 (view not visible) and ORA-01031 (insufficient privileges)
+# mean the metrics view cannot be used by this account
+METRICS_UNAVAILABLE_CODES = {942, 1031}
+
+_metrics_unavailable = set()
+_metrics_lock = threading.Lock()
+
+def _error_code(exc):
+    return getattr(exc.args[0], "code", None) if exc.args else None
+
+def build_tablespace_query(names):
+    """TABLESPACE_QUERY limited to the given tablespaces: (sql, binds)."""
+    binds = {f"ts{i}": name for i, name in enumerate(names)}
+    where = "\nWHERE a.tablespace_name IN (" + ", ".join(":" + bind for bind in binds) + ")"
+    return _TABLESPACE_QUERY_TEMPLATE.format(where=where), binds
+
+def _fill_missing_metrics(conn, df):
+    """Replace the rows the metrics view had no usage for with TABLESPACE_QUERY rows."""
+    missing = df["Used MB"].isna()
+    if not missing.any():
+        return df
+    sql, binds = build_tablespace_query(df.loc[missing, "Tablespace Name"].tolist())
+    full = fetch_dataframe(conn, sql, binds)
+    return (pd.concat([df[~missing], full], ignore_index=True)
+            .sort_values("Tablespace Name", ignore_index=True))
+
+def query_tablespace_usage(conn, key=None):
+    """
+    Run the tablespace usage report, preferring TABLESPACE_METRICS_QUERY.
+
+    If the account cannot see DBA_TABLESPACE_USAGE_METRICS the full
+    TABLESPACE_QUERY is used instead, and when key is given (e.g. (env, db))
+    that database goes straight to the full query from then on. Tablespaces
+    the metrics view has no row for are read with the full query.
+
+    Args:
+        conn: Oracle connection
+        key: Hashable identifying the database, or None to always try the fast path
+
+    Returns:
+        pd.DataFrame: TABLESPACE_QUERY columns
+    """
+    with _metrics_lock:
+        use_metrics = key is None or key not in _metrics_unavailable
+    if use_metrics:
+        try:
+            return _fill_missing_metrics(conn, fetch_dataframe(conn, TABLESPACE_METRICS_QUERY))
+        except oracledb.DatabaseError as e:
+            if _error_code(e) not in METRICS_UNAVAILABLE_CODES:
+                raise
+            if key is not None:
+                with _metrics_lock:
+                    _metrics_unavailable.add(key)
+    return fetch_dataframe(conn, TABLESPACE_QUERY)
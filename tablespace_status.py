@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+NEEDS_EXTENSION = "Needs Extension"
+NEEDS_EXTENSION_SOON = "Needs Extension soon"
+NORMAL = "Normal"
+
+# Normal tablespaces forecast to fill within this many days are flagged early
+FORECAST_HORIZON_DAYS = 30
+
+# Small tablespaces (Max MB below this) get the looser free-space threshold
+SMALL_TABLESPACE_MB = 1000
+SMALL_FREE_PCT = 10
+LARGE_FREE_PCT = 5
+
+# Rows are only highlighted while autoextend headroom is below this
+HIGHLIGHT_MAX_EXTENSION_MB = 10000
+
+STYLE_CRITICAL = "background-color: #ffcccc"  # Light red
+STYLE_WARNING = "background-color: #fff5cc"   # Light yellow
+STYLE_NONE = "background-color: "
+
+def _column(df, name):
+    return df[name].to_numpy(dtype=float, na_value=np.nan)
+
+def needs_extension(df):
+    """Boolean array: Percentage Free at or below the threshold for the tablespace size."""
+    max_mb = _column(df, "Max MB")
+    pct_free = _column(df, "Percentage Free")
+    return pct_free <= np.where(max_mb < SMALL_TABLESPACE_MB, SMALL_FREE_PCT, LARGE_FREE_PCT)
+
+def tablespace_status(df):
+    """Status for every row of a TABLESPACE_QUERY frame, computed in one pass."""
+    return np.where(needs_extension(df), NEEDS_EXTENSION, NORMAL)
+
+def forecast_status(status, days_to_full, horizon=FORECAST_HORIZON_DAYS):
+    """Upgrade Normal rows whose forecast Days To Full falls within the horizon."""
+    days = np.asarray(days_to_full, dtype=float)
+    return np.where((status == NORMAL) & (days <= horizon), NEEDS_EXTENSION_SOON, status)
+
+def tablespace_row_styles(df):
+    """One CSS string per row: red for large and yellow for small tablespaces running out of room."""
+    max_mb = _column(df, "Max MB")
+    pct_free = _column(df, "Percentage Free")
+    low_headroom = _column(df, "Available Extension MB") < HIGHLIGHT_MAX_EXTENSION_MB
+    small = max_mb < SMALL_TABLESPACE_MB
+
+    critical = low_headroom & (max_mb >= SMALL_TABLESPACE_MB) & (pct_free <= LARGE_FREE_PCT)
+    warning = low_headroom & small & (pct_free <= SMALL_FREE_PCT)
+    return np.select([critical, warning], [STYLE_CRITICAL, STYLE_WARNING], STYLE_NONE)
+
+def highlight_tablespaces(df):
+    """Styler.apply(..., axis=None) callback: every cell takes its row's style."""
+    row_styles = tablespace_row_styles(df)
+    styles = np.broadcast_to(row_styles[:, None], df.shape)
+    return pd.DataFrame(styles, index=df.index, columns=df.columns)
@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 from pathlib import Path
-from db_conn import get_oracle_connection
+from db_conn import fetch_dataframe, get_oracle_connection
+from tablespace_status import NEEDS_EXTENSION, highlight_tablespaces, tablespace_status
 import socket
 
 # --- Available Database Environments and DBs ---
@@ -64,45 +65,139 @@ JOIN ts_info i ON a.tablespace_name = i.tablespace_name
 ORDER BY a.tablespace_name
 """
 
-def get_status(row):
-    max_mb = row["Max MB"]
-    pct_free = row["Percentage Free"]
-    if pct_free <= (10 if max_mb < 1000 else 5):
-        return "Needs Extension"
-    return "Normal"
-
-def highlight_status(row):
-    max_mb = row["Max MB"]
-    pct_free = row["Percentage Free"]
-    avail_ext = row["Available Extension MB"]
-
-    if avail_ext < 10000:
-        if max_mb >= 1000 and pct_free <= 5:
-            color = "#ffcccc"  # Light red
-        elif max_mb < 1000 and pct_free <= 10:
-            color = "#fff5cc"  # Light yellow
-        else:
-            color = ""
-    else:
-        color = ""
+# CDB mode: the same report for every open PDB (and CDB$ROOT) in one round
+# trip from the root container. CDB_* views add CON_ID to the DBA_* columns;
+# allocation and autoextend headroom come from a single CDB_DATA_FILES pass.
+# Rows hang off V$CONTAINERS, so a container with no online permanent
+# tablespace to report (e.g. a PDB that is not open) still gets one row,
+# with NULL tablespace columns. The query takes no binds.
+CDB_TABLESPACE_QUERY = """
+WITH ts_alloc AS (
+  SELECT
+    con_id,
+    tablespace_name,
+    SUM(bytes) / 1024 / 1024 AS allocated_mb,
+    SUM(CASE WHEN autoextensible = 'YES' THEN maxbytes ELSE bytes END) / 1024 / 1024 AS max_mb,
+    SUM(CASE WHEN autoextensible = 'YES' THEN (maxbytes - bytes) ELSE 0 END) / 1024 / 1024 AS available_extension_mb
+  FROM cdb_data_files
+  GROUP BY con_id, tablespace_name
+),
+ts_free AS (
+  SELECT
+    con_id,
+    tablespace_name,
+    SUM(bytes) / 1024 / 1024 AS free_mb
+  FROM cdb_free_space
+  GROUP BY con_id, tablespace_name
+),
+ts_info AS (
+  SELECT
+    con_id,
+    tablespace_name,
+    status,
+    contents
+  FROM cdb_tablespaces
+  WHERE status = 'ONLINE' AND contents = 'PERMANENT'
+),
+ts_rows AS (
+  SELECT
+    a.con_id,
+    a.tablespace_name,
+    i.status,
+    i.contents,
+    a.max_mb,
+    a.allocated_mb,
+    NVL(f.free_mb, 0) AS free_mb,
+    a.available_extension_mb
+  FROM ts_alloc a
+  JOIN ts_info i ON a.con_id = i.con_id AND a.tablespace_name = i.tablespace_name
+  LEFT JOIN ts_free f ON a.con_id = f.con_id AND a.tablespace_name = f.tablespace_name
+)
+SELECT
+  c.name AS "Container",
+  c.con_id AS "CON_ID",
+  t.tablespace_name AS "Tablespace Name",
+  t.status AS "Status",
+  t.contents AS "Type",
+  ROUND(t.max_mb, 2) AS "Max MB",
+  ROUND(t.allocated_mb, 2) AS "Allocated MB",
+  ROUND(t.free_mb, 2) AS "Free MB",
+  ROUND((t.allocated_mb - t.free_mb), 2) AS "Used MB",
+  CASE
+    WHEN t.allocated_mb = 0 THEN 0
+    ELSE ROUND(((t.allocated_mb - t.free_mb) / t.allocated_mb) * 100, 2)
+  END AS "Percentage Used",
+  ROUND(t.available_extension_mb, 2) AS "Available Extension MB",
+  CASE
+    WHEN t.allocated_mb = 0 THEN 0
+    ELSE ROUND((t.free_mb / t.allocated_mb) * 100, 2)
+  END AS "Percentage Free"
+FROM v$containers c
+LEFT JOIN ts_rows t ON t.con_id = c.con_id
+WHERE c.name <> 'PDB$SEED'
+ORDER BY c.con_id, t.tablespace_name
+"""
 
-    return [f"background-color: {color}"] * len(row)
+CDB_TABLESPACE_COLUMNS = [
+    "Container", "CON_ID", "Tablespace Name", "Status", "Type", "Max MB", "Allocated MB", "Free MB",
+    "Used MB", "Percentage Used", "Available Extension MB", "Percentage Free",
+]
+
+TABLESPACE_FORMAT = {
+    "Max MB": "{:,.0f}",
+    "Allocated MB": "{:,.0f}",
+    "Free MB": "{:,.0f}",
+    "Used MB": "{:,.0f}",
+    "Percentage Used": "{:.2f}%",
+    "Available Extension MB": "{:,.0f}",
+    "Percentage Free": "{:.2f}%",
+}
 
 @st.cache_data(ttl=300)
 def fetch_tablespace_data(env, db):
     try:
         conn = get_oracle_connection(env, db)
-        cursor = conn.cursor()
-        cursor.execute(TABLESPACE_QUERY)
-        cols = [desc[0] for desc in cursor.description]
-        data = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return pd.DataFrame(data, columns=cols)
+        try:
+            return fetch_dataframe(conn, TABLESPACE_QUERY)
+        finally:
+            conn.close()
     except Exception as e:
         st.error(f"Error fetching tablespace data: {e}")
         return pd.DataFrame()
 
+@st.cache_data(ttl=300)
+def fetch_cdb_tablespace_data(env, db):
+    """Tablespaces of every PDB in the CDB behind env/db; the connection must be to the root."""
+    try:
+        conn = get_oracle_connection(env, db)
+        try:
+            return fetch_dataframe(conn, CDB_TABLESPACE_QUERY)
+        finally:
+            conn.close()
+    except Exception as e:
+        st.error(f"Error fetching CDB tablespace data: {e}")
+        return pd.DataFrame(columns=CDB_TABLESPACE_COLUMNS)
+
+def container_summary(df):
+    """
+    One row per container: tablespace count, how many need extension, and
+    total space. A container whose only row has no tablespace counts 0.
+    """
+    summary = df.groupby(["CON_ID", "Container"], sort=True).agg(
+        **{
+            "Tablespaces": ("Tablespace Name", "count"),
+            "Needs Extension": ("Status", lambda status: int((status == NEEDS_EXTENSION).sum())),
+            "Used MB": ("Used MB", "sum"),
+            "Max MB": ("Max MB", "sum"),
+        }
+    )
+    return summary.reset_index(level="CON_ID")
+
+def show_tablespaces(df, height):
+    df = df.sort_values(by="Status", ascending=False)
+    styled_df = df.style.apply(highlight_tablespaces, axis=None).format(TABLESPACE_FORMAT)
+    st.dataframe(styled_df, height=height)
+
 @st.cache_data(ttl=300)
 def fetch_db_info(env, db):
     try:
@@ -130,19 +225,16 @@ def fetch_db_info(env, db):
 def fetch_session_info(env, db):
     try:
         conn = get_oracle_connection(env, db)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT username, status, COUNT(*) AS session_count
-            FROM v$session
-            WHERE username IS NOT NULL
-            GROUP BY username, status
-            ORDER BY session_count DESC
-        """)
-        data = cursor.fetchall()
-        cols = [desc[0] for desc in cursor.description]
-        cursor.close()
-        conn.close()
-        return pd.DataFrame(data, columns=cols)
+        try:
+            return fetch_dataframe(conn, """
+                SELECT username, status, COUNT(*) AS session_count
+                FROM v$session
+                WHERE username IS NOT NULL
+                GROUP BY username, status
+                ORDER BY session_count DESC
+            """)
+        finally:
+            conn.close()
     except Exception as e:
         st.error(f"Error fetching session data: {e}")
         return pd.DataFrame()
@@ -167,6 +259,10 @@ def main():
     selected_env = "Production"
     db_list = DB_CONFIGS[selected_env]
     selected_db = st.sidebar.selectbox("Select Database", db_list)
+    cdb_mode = st.sidebar.checkbox(
+        "CDB mode (all PDBs)",
+        help="Query CDB_* views once from the root container and split the result by PDB.",
+    )
 
     # Header with logo and title
     logo_path = Path(__file__).parent / "SAIL_Logo.png"
@@ -187,25 +283,38 @@ def main():
         st.markdown(f"**Environment:** `{selected_env}` | **Database:** `{selected_db}` | **Database Name:** `{db_name}` | **Server IP:** `{ip_address}`")
         st.markdown("---")
 
-        df = fetch_tablespace_data(selected_env, selected_db)
-        if df.empty:
-            st.warning("No tablespace data available.")
-            return
-
-        df["Status"] = df.apply(get_status, axis=1)
-        df = df.sort_values(by="Status", ascending=False)
-
-        styled_df = df.style.apply(highlight_status, axis=1).format({
-            "Max MB": "{:,.0f}",
-            "Allocated MB": "{:,.0f}",
-            "Free MB": "{:,.0f}",
-            "Used MB": "{:,.0f}",
-            "Percentage Used": "{:.2f}%",
-            "Available Extension MB": "{:,.0f}",
-            "Percentage Free": "{:.2f}%",
-        })
-
-        st.dataframe(styled_df, height=500)
+        if cdb_mode:
+            df = fetch_cdb_tablespace_data(selected_env, selected_db)
+            if df.empty:
+                st.warning("No CDB tablespace data available. CDB mode needs a connection to the root container.")
+                return
+
+            df["Status"] = tablespace_status(df)
+
+            st.markdown("### Containers")
+            summary = container_summary(df)
+            st.dataframe(summary.style.format({"Used MB": "{:,.0f}", "Max MB": "{:,.0f}"}), height=min(400, 38 + 35 * len(summary)))
+
+            containers = st.multiselect("Show Containers", summary.index.tolist(), default=summary.index.tolist())
+            tablespaces = df[df["Tablespace Name"].notna()]
+            for container in containers:
+                pdb_df = tablespaces[tablespaces["Container"] == container]
+                if pdb_df.empty:
+                    st.caption(f"{container}: no online permanent tablespaces (is the PDB open?)")
+                    continue
+                needs_attention = int(summary.loc[container, "Needs Extension"])
+                label = f"{container} ({len(pdb_df)} tablespaces"
+                label += f", {needs_attention} need extension)" if needs_attention else ")"
+                with st.expander(label, expanded=needs_attention > 0):
+                    show_tablespaces(pdb_df.drop(columns=["Container", "CON_ID"]), height=300)
+        else:
+            df = fetch_tablespace_data(selected_env, selected_db)
+            if df.empty:
+                st.warning("No tablespace data available.")
+                return
+
+            df["Status"] = tablespace_status(df)
+            show_tablespaces(df, height=500)
 
         st.markdown("### Active Sessions")
         session_df = fetch_session_info(selected_env, selected_db)
@@ -0,0 +1,49 @@
+import pandas as pd
+
+from blocking_chains import analyse_blocking, resolve_chains
+
+def sessions(edges, extra=()):
+    """edges: {waiter: blocker}; extra: SIDs that block but are not waiting."""
+    sids = sorted(set(edges) | set(edges.values()) | set(extra))
+    return pd.DataFrame({
+        "SID": sids,
+        "BLOCKING_SESSION": [edges.get(sid) for sid in sids],
+        "USERNAME": [f"U{sid}" for sid in sids],
+    })
+
+def test_roots_depth_and_fan_out():
+    # 1 <- 2 <- 3, 1 <- 4, 2 <- 5 ; 10 <- 11
+    result = analyse_blocking(sessions({2: 1, 3: 2, 4: 1, 5: 2, 11: 10}))
+    roots = result["roots"]
+    assert roots["ROOT_SID"].tolist() == [1, 10]
+    top = roots.iloc[0]
+    assert (top["TOTAL_WAITERS"], top["DIRECT_WAITERS"], top["MAX_DEPTH"]) == (4, 2, 2)
+    assert top["USERNAME"] == "U1"
+    assert result["cycles"] == []
+
+    by_sid = result["sessions"].set_index("SID")
+    assert by_sid.loc[3, "ROOT_SID"] == 1 and by_sid.loc[3, "DEPTH"] == 2
+    assert by_sid.loc[1, "DEPTH"] == 0
+
+def test_cycles_are_reported_not_ranked():
+    result = analyse_blocking(sessions({7: 8, 8: 9, 9: 7, 6: 7, 2: 1}))
+    assert sorted(map(sorted, result["cycles"])) == [[7, 8, 9]]
+    assert result["roots"]["ROOT_SID"].tolist() == [1]
+    by_sid = result["sessions"].set_index("SID")
+    assert pd.isna(by_sid.loc[6, "ROOT_SID"])  # waits behind the cycle
+
+def test_blocker_missing_from_frame_is_still_a_root():
+    df = pd.DataFrame({"SID": [5], "BLOCKING_SESSION": [42], "USERNAME": ["U5"]})
+    roots = analyse_blocking(df)["roots"]
+    assert roots["ROOT_SID"].tolist() == [42]
+    assert pd.isna(roots.loc[0, "USERNAME"])
+
+def test_long_chain_resolves_without_recursion():
+    n = 50000
+    root, depth, cycles = resolve_chains({sid: sid - 1 for sid in range(1, n)})
+    assert root[n - 1] == 0 and depth[n - 1] == n - 1
+    assert cycles == []
+
+def test_no_blocking():
+    result = analyse_blocking(sessions({}, extra=[1, 2]))
+    assert result["roots"].empty and result["cycles"] == []
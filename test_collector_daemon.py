@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+
+import pandas as pd
+
+import collector_daemon
+from collector_daemon import sample_tablespaces
+from tablespace_history import load_tablespace_history
+
+def usage(used_mb):
+    return pd.DataFrame({
+        "Tablespace Name": ["USERS", "SYSTEM"],
+        "Used MB": [used_mb, 500.0],
+        "Allocated MB": [1000.0, 1000.0],
+        "Max MB": [2000.0, 1000.0],
+    })
+
+def test_tablespaces_are_sampled_without_a_viewer(tmp_path, monkeypatch):
+    path = str(tmp_path / "history.db")
+    connections = []
+
+    def connect(env, db):
+        if db == "down":
+            raise RuntimeError("ORA-12541: TNS:no listener")
+        conn = SimpleNamespace(call_timeout=0, closed=False)
+        conn.close = lambda: setattr(conn, "closed", True)
+        connections.append(conn)
+        return conn
+
+    monkeypatch.setattr(collector_daemon, "get_oracle_connection", connect)
+    monkeypatch.setattr(collector_daemon, "query_tablespace_usage", lambda conn, key: usage(100.0))
+
+    written = sample_tablespaces({"Dev": ["db1", "down"], "Prod": ["db2"]}, path=path)
+    assert written == 4
+    assert all(conn.closed and conn.call_timeout == 0 for conn in connections)
+    assert load_tablespace_history("Prod", "db2", since=0, path=path)["tablespace"].tolist() == ["SYSTEM", "USERS"]
+    assert load_tablespace_history("Dev", "down", since=0, path=path).empty
@@ -0,0 +1,83 @@
+import json
+import os
+
+import oracledb
+import pytest
+
+import db_conn
+
+class FakePool:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.closed = False
+
+    def close(self, force=False):
+        self.closed = True
+
+@pytest.fixture
+def pools(tmp_path, monkeypatch):
+    """Point db_conn at a temporary cred.json and record create_pool calls."""
+    path = tmp_path / "cred.json"
+    monkeypatch.setattr(db_conn, "CONFIG_PATH", str(path))
+    monkeypatch.setattr(db_conn, "_config_cache", {"mtime": None, "config": None})
+    monkeypatch.setattr(db_conn, "_pools", {})
+    created = []
+
+    def create_pool(**kwargs):
+        created.append(FakePool(**kwargs))
+        return created[-1]
+
+    monkeypatch.setattr(oracledb, "create_pool", create_pool)
+
+    def write(password, dsn="db1:1521/rundb1", mtime=1):
+        path.write_text(json.dumps({
+            "Development": {"rundb1": {"user": "monitor", "password": password, "dsn": dsn}},
+        }))
+        os.utime(path, ns=(mtime * 1_000_000_000, mtime * 1_000_000_000))
+
+    yield write, created
+    db_conn.close_pools()
+
+def test_pool_is_reused(pools):
+    write, created = pools
+    write("pw1")
+    first = db_conn.get_connection_pool("Development", "rundb1")
+    assert db_conn.get_connection_pool("Development", "rundb1") is first
+    assert len(created) == 1
+    assert first.kwargs["password"] == "pw1"
+
+def test_pool_is_rebuilt_when_password_rotates(pools):
+    write, created = pools
+    write("pw1", mtime=1)
+    first = db_conn.get_connection_pool("Development", "rundb1")
+    write("pw2", mtime=2)
+    second = db_conn.get_connection_pool("Development", "rundb1")
+    assert second is not first
+    assert first.closed
+    assert second.kwargs["password"] == "pw2"
+    assert db_conn.get_connection_pool("Development", "rundb1") is second
+
+def test_pool_is_rebuilt_when_dsn_moves(pools):
+    write, created = pools
+    write("pw1", mtime=1)
+    first = db_conn.get_connection_pool("Development", "rundb1")
+    write("pw1", dsn="db2:1521/rundb1", mtime=2)
+    second = db_conn.get_connection_pool("Development", "rundb1")
+    assert first.closed
+    assert second.kwargs["dsn"] == "db2:1521/rundb1"
+
+def test_unchanged_credentials_keep_the_pool_after_rewrite(pools):
+    write, created = pools
+    write("pw1", mtime=1)
+    first = db_conn.get_connection_pool("Development", "rundb1")
+    write("pw1", mtime=2)
+    assert db_conn.get_connection_pool("Development", "rundb1") is first
+    assert not first.closed
+
+def test_close_pools_closes_everything(pools):
+    write, created = pools
+    write("pw1")
+    pool = db_conn.get_connection_pool("Development", "rundb1")
+    db_conn.close_pools()
+    assert pool.closed
+    assert db_conn._pools == {}
@@ -0,0 +1,63 @@
+import threading
+import time
+
+from db_fleet import FLEET_QUERY_TIMEOUT, call_timeout_ms, list_databases, run_on_all_databases
+
+DB_CONFIGS = {
+    "Development": ["rundb1", "rundb2"],
+    "Production": ["ProdDB1"],
+}
+
+def test_list_databases():
+    assert list_databases(DB_CONFIGS) == [
+        ("Development", "rundb1"), ("Development", "rundb2"), ("Production", "ProdDB1"),
+    ]
+    assert run_on_all_databases({}, lambda env, db: None) == ({}, {})
+
+def test_results_are_keyed_by_database():
+    results, errors = run_on_all_databases(DB_CONFIGS, lambda env, db: f"{env}/{db}")
+    assert errors == {}
+    assert results == {key: f"{key[0]}/{key[1]}" for key in list_databases(DB_CONFIGS)}
+
+def test_failures_are_reported_per_database():
+    def query(env, db):
+        if db == "rundb2":
+            raise RuntimeError("ORA-12541: TNS:no listener")
+        return db
+
+    results, errors = run_on_all_databases(DB_CONFIGS, query)
+    assert results == {("Development", "rundb1"): "rundb1", ("Production", "ProdDB1"): "ProdDB1"}
+    assert errors == {("Development", "rundb2"): "ORA-12541: TNS:no listener"}
+
+def test_slow_database_times_out_without_holding_up_the_others():
+    release = threading.Event()
+
+    def query(env, db):
+        if db == "ProdDB1":
+            release.wait(5)
+        return db
+
+    start = time.monotonic()
+    try:
+        results, errors = run_on_all_databases(DB_CONFIGS, query, timeout=0.2)
+    finally:
+        release.set()
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 1.0
+    assert set(results) == {("Development", "rundb1"), ("Development", "rundb2")}
+    assert errors == {("Production", "ProdDB1"): "Timed out after 0.2s"}
+
+def test_databases_are_queried_concurrently():
+    def query(env, db):
+        time.sleep(0.2)
+        return db
+
+    start = time.monotonic()
+    results, errors = run_on_all_databases(DB_CONFIGS, query, max_workers=8)
+    assert time.monotonic() - start < 0.5
+    assert len(results) == 3 and errors == {}
+
+def test_call_timeout_ms():
+    assert call_timeout_ms(2.5) == 2500
+    assert call_timeout_ms() == FLEET_QUERY_TIMEOUT * 1000
@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+
+import db_load
+from db_load import DB_LOAD_COLUMNS, DB_LOAD_QUERY, query_db_load
+
+def test_query_pivots_every_metric_into_one_row():
+    assert DB_LOAD_QUERY.count("FROM v$sysmetric") == 1
+    assert "group_id = 2" in DB_LOAD_QUERY
+    for label in DB_LOAD_COLUMNS:
+        assert f'AS "{label}"' in DB_LOAD_QUERY
+
+@pytest.fixture
+def fetch_result(monkeypatch):
+    result = {}
+    monkeypatch.setattr(db_load, "fetch_dataframe", lambda conn, sql, params=None: result["df"])
+    return result
+
+def test_query_db_load_returns_floats_and_none_for_missing(fetch_result):
+    row = dict.fromkeys(DB_LOAD_COLUMNS, 1)
+    row["Redo MB/s"] = None
+    row["Interval End"] = "16-OCT-2026 10:00:00"
+    fetch_result["df"] = pd.DataFrame([row])
+
+    load = query_db_load(object())
+    assert load["Host CPU %"] == 1.0 and isinstance(load["Host CPU %"], float)
+    assert load["Redo MB/s"] is None
+    assert load["Interval End"] == "16-OCT-2026 10:00:00"
+
+def test_query_db_load_without_rows(fetch_result):
+    fetch_result["df"] = pd.DataFrame(columns=[*DB_LOAD_COLUMNS, "Interval End"])
+    assert query_db_load(object()) == dict.fromkeys([*DB_LOAD_COLUMNS, "Interval End"])
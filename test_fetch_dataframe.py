@@ -0,0 +1,59 @@
+import oracledb
+import pyarrow
+
+from db_conn import fetch_dataframe
+
+class RowCursor:
+    description = [("SID",), ("USERNAME",)]
+
+    def __init__(self):
+        self.binds = None
+
+    def execute(self, sql, binds):
+        self.binds = binds
+
+    def fetchall(self):
+        return [(1, "SCOTT"), (2, "HR")]
+
+    def close(self):
+        pass
+
+class RowConnection:
+    def __init__(self):
+        self.last_cursor = RowCursor()
+
+    def cursor(self):
+        return self.last_cursor
+
+class ColumnarConnection(RowConnection):
+    def __init__(self, error=None):
+        super().__init__()
+        self.error = error
+        self.calls = []
+
+    def fetch_df_all(self, sql, params=None, arraysize=None):
+        self.calls.append((sql, params, arraysize))
+        if self.error:
+            raise self.error
+        return pyarrow.table({"SID": [1, 2], "USERNAME": ["SCOTT", "HR"]})
+
+def test_columnar_path_used_when_available():
+    conn = ColumnarConnection()
+    df = fetch_dataframe(conn, "SELECT 1", {"x": 1}, arraysize=500)
+    assert conn.calls == [("SELECT 1", {"x": 1}, 500)]
+    assert conn.last_cursor.binds is None
+    assert df.to_dict("list") == {"SID": [1, 2], "USERNAME": ["SCOTT", "HR"]}
+
+def test_row_fallback_tunes_round_trips():
+    conn = RowConnection()
+    df = fetch_dataframe(conn, "SELECT 1", arraysize=500)
+    assert conn.last_cursor.arraysize == 500
+    assert conn.last_cursor.prefetchrows == 501
+    assert df.to_dict("list") == {"SID": [1, 2], "USERNAME": ["SCOTT", "HR"]}
+
+def test_unsupported_column_type_falls_back():
+    conn = ColumnarConnection(error=oracledb.NotSupportedError("unsupported type"))
+    df = fetch_dataframe(conn, "SELECT 1")
+    assert len(conn.calls) == 1
+    assert conn.last_cursor.binds == {}
+    assert list(df.columns) == ["SID", "USERNAME"]
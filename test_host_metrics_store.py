@@ -0,0 +1,114 @@
+import numpy as np
+
+from host_metrics_store import CPU, FS_PREFIX, MEM_USED, HostMetricsStore, RollupRing, SeriesRing
+
+def server(host, cpu, used=600, status="UP", use="62%"):
+    return {
+        "host": host,
+        "cpu": cpu,
+        "mem": (1000, used, 200, 1000 - used - 200),
+        "fs": [{"Filesystem": "/dev/sda2", "Use%": use, "Mounted on": "/"}],
+        "status": status,
+    }
+
+def test_ring_wraps_and_keeps_order():
+    ring = SeriesRing(3)
+    for ts in range(1, 6):
+        assert ring.append(ts, ts * 10)
+    ts, values = ring.arrays()
+    assert ts.tolist() == [3, 4, 5]
+    assert values.tolist() == [30, 40, 50]
+    # Out-of-order or repeated samples are ignored
+    assert not ring.append(5, 99)
+
+def test_window_and_stats():
+    store = HostMetricsStore(retention=3600, resolution=60)
+    for i in range(60):
+        store.append("h1", CPU, 1000 + i * 60, float(i))
+    now = 1000 + 59 * 60
+    ts, values = store.window("h1", CPU, 600, now=now)
+    assert values.tolist() == list(range(49, 60))
+    stats = store.stats("h1", CPU, 600, now=now)
+    assert stats["max"] == 59.0
+    assert stats["last"] == 59.0
+    assert stats["p95"] == np.percentile(np.arange(49, 60), 95)
+
+def test_memory_is_bounded_by_retention():
+    store = HostMetricsStore(retention=600, resolution=60, levels=[])
+    for i in range(1000):
+        store.append("h1", CPU, i * 60, 1.0)
+    assert store.nbytes == 10 * (8 + 4)
+
+def test_ingest_snapshot_once_per_collection():
+    store = HostMetricsStore(retention=3600, resolution=60)
+    snapshot = {"collected_at": 1000.0, "servers": [server("h1", 12.5), server("h2", None, status="DOWN")]}
+    assert store.ingest_snapshot(snapshot)
+    assert not store.ingest_snapshot(snapshot)
+    assert store.series("h1") == sorted([CPU, MEM_USED, "mem_free", "mem_buff_cache", FS_PREFIX + "/"])
+    assert store.series("h2") == []
+    assert store.stats("h1", FS_PREFIX + "/", 60, now=1000.0)["last"] == 62.0
+
+    store.ingest_snapshot({"collected_at": 1060.0, "servers": [server("h1", 50.0), server("h2", 5.0)]})
+    fleet = store.fleet_stats(CPU, 600, now=1060.0)
+    assert fleet.loc["h1", "max"] == 50.0
+    assert fleet.loc["h2", "last"] == 5.0
+
+def test_prune_drops_series_of_hosts_gone_quiet():
+    store = HostMetricsStore(retention=600, resolution=60, levels=[])
+    store.append("old", CPU, 0, 1.0)
+    store.append("new", CPU, 1000, 1.0)
+    assert store.prune(now=1000) == 1
+    assert len(store) == 1
+
+def test_rollup_buckets_keep_min_max_mean_last():
+    rollup = RollupRing(60, 600)
+    for ts, value in [(0, 10.0), (20, 30.0), (40, 20.0), (60, 5.0), (70, None)]:
+        rollup.add(ts, value)
+    ts, low, high, mean, last = rollup.window(0, 60)
+    assert ts.tolist() == [0.0, 60.0]
+    assert low.tolist() == [10.0, 5.0]
+    assert high.tolist() == [30.0, 5.0]
+    assert mean.tolist() == [20.0, 5.0]
+    assert last.tolist() == [20.0, 5.0]
+    # Ten minutes later the slot of bucket 0 is reused
+    rollup.add(600, 1.0)
+    assert rollup.window(0, 600)[0].tolist() == [60.0, 600.0]
+
+def test_history_reads_the_resolution_that_fits():
+    levels = [(60, 6 * 3600), (900, 2 * 86400), (3600, 31 * 86400)]
+    store = HostMetricsStore(retention=7200, resolution=30, levels=levels)
+    start = 1_700_000_000 - 1_700_000_000 % 86400
+    for i in range(2 * 86400 // 30):
+        store.append("h1", CPU, start + i * 30, float(i % 100))
+    now = start + 2 * 86400 - 30
+
+    assert store.resolution_for(3600) == 0
+    assert store.resolution_for(6 * 3600) == 60
+    assert store.resolution_for(86400) == 900
+    assert store.resolution_for(30 * 86400) == 3600
+
+    raw = store.history("h1", CPU, 600, now=now)
+    assert raw.attrs["resolution"] == 0 and len(raw) == 21
+    day = store.history("h1", CPU, 86400, now=now)
+    assert day.attrs["resolution"] == 900
+    assert len(day) == 97
+    assert day["max"].max() == 99.0 and day["min"].min() == 0.0
+    month = store.history("h1", CPU, 30 * 86400, now=now)
+    assert len(month) == 48
+
+def test_prune_keeps_rollups_of_quiet_hosts():
+    store = HostMetricsStore(retention=600, resolution=60, levels=[(3600, 86400)])
+    store.append("quiet", CPU, 0, 1.0)
+    assert store.prune(now=3600) == 0
+    assert len(store.history("quiet", CPU, 86400, now=3600)) == 1
+    assert store.prune(now=2 * 86400) == 1
+
+def test_merge_adds_older_samples_behind_live_ones():
+    ring = SeriesRing(5)
+    ring.extend(np.array([100.0, 110.0]), np.array([1.0, 2.0], dtype=np.float32))
+    assert ring.merge(np.array([70.0, 80.0, 90.0, 100.0]), np.array([7.0, 8.0, 9.0, 0.0], dtype=np.float32)) == 3
+    ts, values = ring.arrays()
+    assert ts.tolist() == [70.0, 80.0, 90.0, 100.0, 110.0]
+    assert values.tolist() == [7.0, 8.0, 9.0, 1.0, 2.0]
+    assert ring.merge(np.array([10.0]), np.array([0.0], dtype=np.float32)) == 0  # older than the ring keeps
+    assert ring.first_ts == 70.0 and ring.last_ts == 110.0
@@ -0,0 +1,282 @@
+import socket
+from types import SimpleNamespace
+
+import pytest
+
+from host_probe import (
+    COLLECTORS,
+    PROBE_COMMAND,
+    SSH_COMMAND_TIMEOUT,
+    AIXCollector,
+    CpuSampler,
+    HPUXCollector,
+    LinuxCollector,
+    SunOSCollector,
+    format_kb,
+    parse_cpu_counters,
+    parse_probe_output,
+    probe_host,
+    split_sections,
+    ssh_exec,
+)
+from host_profiles import HostProfileCache
+
+LINUX_OUTPUT = """<<<OS>>>
+Linux
+<<<CPU>>>
+cpu  4705 150 1120 16250 520 0 35 0 0 0
+<<<MEM>>>
+              total        used        free      shared  buff/cache   available
+Mem:          15884        6120        2011         402        7752        9028
+Swap:          8191           0        8191
+<<<FS>>>
+Filesystem      Size  Used Avail Use% Mounted on
+/dev/sda2        50G   31G   19G  62% /
+/dev/sda4       200G  188G   12G  94% /u01
+"""
+
+AIX_OUTPUT = """<<<OS>>>
+AIX
+<<<CPU>>>
+    1503495 user cpu ticks
+     804052 system cpu ticks
+   98754371 idle cpu ticks
+     253110 I/O wait cpu ticks
+<<<MEM>>>
+              4194304 memory pages
+              3932160 lruable pages
+               201934 free pages
+                    2 memory pools
+               713408 pinned pages
+                 80.0 maxpin percentage
+                  3.0 minperm percentage
+                 90.0 maxperm percentage
+                 55.3 numperm percentage
+              2174392 file pages
+                  0.0 compressed percentage
+<<<FS>>>
+Filesystem    1024-blocks      Used Available Capacity Mounted on
+/dev/hd4          2097152    845632   1251520      41% /
+/dev/fslv00     104857600  99614720   5242880      96% /u01
+"""
+
+HPUX_OUTPUT = """<<<OS>>>
+HP-UX
+<<<CPU>>>
+    2    0    0   512340  1203456    5    0     0    0     0    0     0   1021   5512   430   3  1 96
+<<<MEM>>>
+Memory: 16353 MB (15.97 GB)
+pagesize 4096
+    2    0    0   512340  1203456    5    0     0    0     0    0     0   1021   5512   430   3  1 96
+<<<FS>>>
+Filesystem          kbytes    used   avail %used Mounted on
+/dev/vg00/lvol3    2097152  845632 1241376   41% /
+/dev/vg01/lvol_oracle_data_long
+                   104857600 99614720 5206480   95% /u01
+"""
+
+SUNOS_OUTPUT = """<<<OS>>>
+SunOS
+<<<CPU>>>
+cpu_stat:0:cpu_stat0:user	1000
+cpu_stat:0:cpu_stat0:kernel	500
+cpu_stat:0:cpu_stat0:idle	8000
+cpu_stat:0:cpu_stat0:wait	0
+<<<MEM>>>
+8192
+unix:0:system_pages:physmem	2097152
+unix:0:system_pages:freemem	262144
+zfs:0:arcstats:size	4294967296
+<<<FS>>>
+Filesystem            kbytes    used   avail capacity  Mounted on
+rpool/ROOT/solaris  30707712 8388608 20971520    29%    /
+/dev/dsk/c0t1d0s0   104857600 99614720 5242880    96%    /u01
+"""
+
+def test_split_sections():
+    sections = split_sections(LINUX_OUTPUT)
+    assert list(sections) == ["OS", "CPU", "MEM", "FS"]
+    assert sections["OS"] == "Linux"
+
+def primed_sampler(host):
+    """A sampler whose baseline for host is zero ticks, so the next reading is its own ratio."""
+    sampler = CpuSampler()
+    sampler.utilisation(host, 0, 0)
+    return sampler
+
+def test_parse_linux_probe():
+    cpu, mem, fs = parse_probe_output(LINUX_OUTPUT, "10.0.0.1", primed_sampler("10.0.0.1"))
+    assert cpu == 26.38
+    assert mem == (15884, 6120, 2011, 7752)
+    assert [f["Mounted on"] for f in fs] == ["/", "/u01"]
+    assert fs[1]["Use%"] == "94%"
+
+def test_missing_sections_fall_back_to_empty_values():
+    cpu, mem, fs = parse_probe_output("<<<OS>>>\nLinux\n", "10.0.0.1", CpuSampler())
+    assert cpu is None
+    assert mem == (None, None, None, None)
+    assert fs == []
+
+def test_linux_counters():
+    assert parse_cpu_counters("Linux", "cpu  4705 150 1120 16250 520 0 35 0 0 0") == (6010, 22780)
+
+def test_sunos_counters_are_summed_across_cpus():
+    output = """cpu_stat:0:cpu_stat0:user	1000
+cpu_stat:0:cpu_stat0:kernel	500
+cpu_stat:0:cpu_stat0:idle	8000
+cpu_stat:0:cpu_stat0:wait	0
+cpu_stat:1:cpu_stat1:user	3000
+cpu_stat:1:cpu_stat1:kernel	500
+cpu_stat:1:cpu_stat1:idle	7000
+cpu_stat:1:cpu_stat1:wait	0"""
+    assert parse_cpu_counters("SunOS", output) == (5000, 20000)
+
+def test_aix_vmstat_ticks():
+    output = """    1503495 user cpu ticks
+     804052 system cpu ticks
+   98754371 idle cpu ticks
+     253110 I/O wait cpu ticks"""
+    assert parse_cpu_counters("AIX", output) == (2307547, 101315028)
+
+def test_sampler_uses_delta_between_polls():
+    sampler = CpuSampler()
+    # the first poll only sets the baseline; a since-boot ratio is not current load
+    assert sampler.utilisation("h", 100, 1000) is None
+    assert sampler.utilisation("h", 400, 1500) == 60.0
+    # counters went backwards (reboot): no value until the next delta
+    assert sampler.utilisation("h", 50, 200) is None
+    assert sampler.utilisation("h", 150, 400) == 50.0
+    sampler.forget("h")
+    assert sampler.utilisation("h", 300, 600) is None
+
+def test_parse_aix_probe():
+    cpu, mem, fs = parse_probe_output(AIX_OUTPUT, "aix1", primed_sampler("aix1"))
+    assert cpu == 2.28
+    # 16 GB of 4 KB pages; free and file pages counted separately from used
+    assert mem == (16384, 7103, 788, 8493)
+    assert [(f["Filesystem"], f["Size"], f["Used"], f["Use%"]) for f in fs] == [
+        ("/dev/hd4", "2.0G", "826M", "41%"),
+        ("/dev/fslv00", "100G", "95G", "96%"),
+    ]
+
+def test_parse_hpux_probe_without_tick_counters():
+    cpu, mem, fs = parse_probe_output(HPUX_OUTPUT, "hpux1", CpuSampler())
+    assert cpu == 4.0
+    assert mem == (16353, 11652, 4701, 0)
+    # bdf wrapped the long device name onto its own line
+    assert fs[1]["Filesystem"] == "/dev/vg01/lvol_oracle_data_long"
+    assert fs[1]["Mounted on"] == "/u01"
+    assert fs[1]["Use%"] == "95%"
+
+def test_hpux_memory_from_dmesg():
+    output = HPUX_OUTPUT.replace(
+        "Memory: 16353 MB (15.97 GB)",
+        "    Physical: 8388608 Kbytes, lockable: 6291456 Kbytes, available: 7340032 Kbytes",
+    )
+    assert parse_probe_output(output, "hpux2", CpuSampler())[1] == (8192, 3491, 4701, 0)
+
+def test_hpux_command_follows_the_profile():
+    assert "machinfo" not in HPUXCollector({"tools": ["vmstat"]}).command()
+    assert "dmesg" not in HPUXCollector({"tools": ["machinfo", "vmstat"]}).command()
+    assert HPUXCollector({}).command() == HPUXCollector.script
+
+def test_parse_sunos_probe():
+    cpu, mem, fs = parse_probe_output(SUNOS_OUTPUT, "sun1", primed_sampler("sun1"))
+    assert cpu == 15.79
+    # 8 KB pages; the ZFS ARC is reported as cache
+    assert mem == (16384, 10240, 2048, 4096)
+    assert [f["Size"] for f in fs] == ["29G", "100G"]
+
+def test_unix_scripts_do_not_sleep():
+    for collector in (AIXCollector, HPUXCollector, SunOSCollector):
+        assert "sar" not in collector.script
+    for collector in (AIXCollector, SunOSCollector):
+        assert "vmstat 1" not in collector.script
+
+def test_hpux_samples_an_interval_only_without_tick_counters():
+    script = HPUXCollector.script
+    assert script.count("vmstat 1 2") == 1
+    assert "else vmstat 1 2 | tail -1; fi" in script
+
+def test_format_kb():
+    assert format_kb(512) == "512K"
+    assert format_kb(845632) == "826M"
+    assert format_kb(1251520) == "1.2G"
+
+class FakeStream:
+    def __init__(self, data):
+        self.data = data
+        self.channel = SimpleNamespace(closed=False)
+        self.channel.close = lambda: setattr(self.channel, "closed", True)
+
+    def read(self):
+        if self.data is None:
+            raise socket.timeout()
+        return self.data.encode()
+
+class FakeClient:
+    def __init__(self, output):
+        self.output = output
+        self.commands = []
+        self.timeouts = []
+
+    def exec_command(self, cmd, timeout=None):
+        self.commands.append(cmd)
+        self.timeouts.append(timeout)
+        self.stdout = FakeStream(self.output)
+        return None, self.stdout, FakeStream("")
+
+def test_ssh_exec_times_out_a_hung_command():
+    client = FakeClient(None)  # e.g. bdf stuck on a stale NFS mount
+    with pytest.raises(socket.timeout):
+        ssh_exec(client, "bdf -l")
+    assert client.timeouts == [SSH_COMMAND_TIMEOUT]
+    assert client.stdout.channel.closed
+
+def test_probe_host_uses_one_round_trip(tmp_path):
+    profiles = HostProfileCache(str(tmp_path / "profiles.json"))
+    client = FakeClient(LINUX_OUTPUT)
+    probe_host(client, "10.0.0.1", profiles, CpuSampler())
+    assert client.commands == [PROBE_COMMAND]
+
+def test_known_host_skips_fingerprinting(tmp_path):
+    path = str(tmp_path / "profiles.json")
+    output = "<<<OS>>>\nAIX\n<<<VERSION>>>\n3\n<<<TOOLS>>>\nsar\nvmstat\n<<<CPU>>>\n"
+    client = FakeClient(output)
+    first = HostProfileCache(path)
+    probe_host(client, "aix1", first, CpuSampler())
+    first.flush()
+
+    # A fresh cache (e.g. after a collector restart) reads the persisted profile
+    profiles = HostProfileCache(path)
+    assert profiles.get("aix1")["tools"] == ["sar", "vmstat"]
+    probe_host(client, "aix1", profiles, CpuSampler())
+    assert client.commands == [PROBE_COMMAND, AIXCollector.script]
+
+def test_profiles_expire_and_can_be_forgotten(tmp_path):
+    profiles = HostProfileCache(str(tmp_path / "profiles.json"), max_age=60)
+    profiles.put("h", {"os": "Linux", "version": "", "tools": [], "fingerprinted_at": 1000})
+    assert profiles.get("h", now=1030)["os"] == "Linux"
+    assert profiles.get("h", now=1100) is None
+    profiles.forget("h")
+    assert len(profiles) == 0
+
+def test_profiles_are_written_once_per_flush(tmp_path):
+    path = tmp_path / "profiles.json"
+    profiles = HostProfileCache(str(path))
+    writes = []
+    save = profiles._save
+    profiles._save = lambda data: writes.append(len(data)) or save(data)
+    for i in range(50):
+        profiles.put(f"h{i}", {"os": "Linux", "version": "", "tools": [], "fingerprinted_at": 1000})
+    profiles.forget("h0")
+    assert not path.exists()
+    assert profiles.flush()
+    assert writes == [49]
+    assert not profiles.flush()  # nothing changed since
+    assert len(HostProfileCache(str(path))) == 49
+
+def test_unknown_platform_uses_the_fallback_collector():
+    assert COLLECTORS["*"] is LinuxCollector
+    cpu, mem, fs = parse_probe_output(LINUX_OUTPUT.replace("Linux", "Darwin", 1), "h", CpuSampler())
+    assert mem == (15884, 6120, 2011, 7752)
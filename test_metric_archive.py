@@ -0,0 +1,241 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from collector_daemon import archive_sweep
+from host_metrics_store import CPU, HostMetricsStore, RollupRing
+from metric_archive import (
+    ChunkReader,
+    MetricArchive,
+    bucket_samples,
+    decode_series,
+    downsample,
+    empty_rollup,
+    encode_series,
+    read_rollup,
+    rollup_fields,
+)
+
+def test_round_trip_is_lossless_for_float32():
+    ts = 1_700_000_000 + np.cumsum(np.r_[0, np.full(50, 30.0), 31.5, np.full(50, 30.0)])
+    values = np.round(np.random.default_rng(1).uniform(0, 100, len(ts)), 2).astype(np.float32)
+    values[10] = np.nan
+    decoded_ts, decoded = decode_series(encode_series(ts, values))
+    assert np.array_equal(decoded_ts, ts)
+    assert np.array_equal(decoded, values, equal_nan=True)
+
+def test_steady_series_compress_well():
+    ts = 1_700_000_000 + np.arange(120) * 30.0
+    values = np.full(120, 42.0, dtype=np.float32)
+    assert len(encode_series(ts, values)) < 60  # vs 1,440 bytes raw
+
+def test_chunks_are_read_through_mmap(tmp_path):
+    archive = MetricArchive(str(tmp_path), chunk_seconds=3600)
+    ts = np.arange(0, 3600, 30.0)
+    archive.write_chunk("host", 0, {"h1\tcpu": (ts, ts.astype(np.float32)), "h2\tcpu": (ts[:2], ts[:2])})
+    archive.write_chunk("host", 3600, {"h1\tcpu": (ts + 3600, (ts + 3600).astype(np.float32))})
+
+    with ChunkReader(archive.chunk_path("host", 0)) as reader:
+        assert sorted(reader.keys()) == ["h1\tcpu", "h2\tcpu"]
+    ts_read, values = archive.read_series("host", "h1\tcpu", 1800, 5400)
+    assert ts_read[0] == 1800 and ts_read[-1] == 5370
+    assert np.array_equal(values, ts_read.astype(np.float32))
+    assert archive.last_chunk_end("host") == 7200
+    assert archive.prune("host", now=archive.retention + 5000) == 1
+
+def test_downsample_matches_rollup_ring():
+    ts = np.arange(0, 1800, 30.0)
+    values = np.random.default_rng(2).uniform(0, 100, len(ts)).astype(np.float32)
+    rollup = RollupRing(300, 3600)
+    for t, v in zip(ts, values):
+        rollup.add(t, v)
+    for ours, theirs in zip(downsample(ts, values, 300), rollup.window(0, 1800)):
+        np.testing.assert_allclose(ours, theirs, rtol=1e-6)
+
+def test_restart_restores_from_archive(tmp_path):
+    archive = MetricArchive(str(tmp_path), chunk_seconds=3600)
+    levels = [(60, 6 * 3600), (3600, 31 * 86400)]
+    collector = HostMetricsStore(retention=7200, resolution=30, levels=levels, archive=archive)
+    start = 1_700_000_000 - 1_700_000_000 % 3600
+    for i in range(6 * 3600 // 30):
+        collector.append("h1", CPU, start + i * 30, float(i % 60))
+        if i % 120 == 0:
+            collector.archive_pending(now=start + i * 30)
+    now = start + 6 * 3600 - 30
+    collector.archive_pending(now=now)
+    assert [s for s, _ in archive.chunks("host")] == [start + h * 3600 for h in range(5)]
+
+    # A new process: archived raw samples of the last two hours come back
+    # from disk (the open hour is not archived yet)
+    dashboard = HostMetricsStore(retention=7200, resolution=30, levels=levels, archive=archive)
+    assert dashboard.restore_from_archive(now=now, seconds=7200) == 3600 // 30 + 1
+    assert dashboard.stats("h1", CPU, 3600, now=start + 5 * 3600)["max"] == 59.0
+    # The hourly level was seeded from the archived rollups; the 1-minute
+    # level only holds the restored hours, so the day chart falls back to it
+    assert dashboard.history("h1", CPU, 7140, now=now, max_points=150).attrs["resolution"] == 60
+    day = dashboard.history("h1", CPU, 6 * 3600, now=now)
+    assert day.attrs["resolution"] == 3600
+    assert len(day) == 5
+    assert day["max"].max() == 59.0 and day["min"].min() == 0.0
+
+def test_restore_folds_raw_samples_into_levels_that_are_not_archived(tmp_path):
+    archive = MetricArchive(str(tmp_path), chunk_seconds=3600)
+    ts = np.arange(0, 3 * 3600, 30.0)
+    for hour in range(3):
+        part = ts[(ts >= hour * 3600) & (ts < (hour + 1) * 3600)]
+        archive.write_chunk("host", hour * 3600, {"h1\tcpu": (part, np.full(len(part), float(hour), np.float32))})
+    store = HostMetricsStore(retention=7200, resolution=30, levels=[(60, 6 * 3600)], archive=archive)
+    assert store.restore_from_archive(now=3 * 3600, seconds=7200) == 240
+    raw = store.history("h1", CPU, 7200, now=3 * 3600)
+    assert raw.attrs["resolution"] == 0
+    assert len(raw) == 240
+    assert raw["last"].iloc[0] == 1.0 and raw["last"].iloc[-1] == 2.0
+    minutes = store.history("h1", CPU, 7200, now=3 * 3600, max_points=120)
+    assert minutes.attrs["resolution"] == 60 and len(minutes) == 120
+
+def test_rollup_files_merge_per_day(tmp_path):
+    archive = MetricArchive(str(tmp_path))
+    first = empty_rollup(1, 4)
+    first["count"][:] = 2
+    first["max"][:] = 5.0
+    archive.add_rollup("host", 900, ["h1\tcpu"], 40, first)
+    second = empty_rollup(2, 4)
+    second["count"][:] = 1
+    second["max"][:] = [[7.0] * 4, [9.0] * 4]
+    archive.add_rollup("host", 900, ["h1\tcpu", "h2\tcpu"], 44, second)
+
+    [(day, path)] = archive.rollups("host", 900)
+    assert day == 0
+    keys, first_bucket, fields = read_rollup(path)
+    assert keys == ["h1\tcpu", "h2\tcpu"] and first_bucket == 0
+    assert fields["count"].shape == (2, 96)
+    assert fields["count"][0, 40:48].tolist() == [2] * 4 + [1] * 4
+    assert fields["max"][1, 44:48].tolist() == [9.0] * 4
+    assert fields["count"][1, :44].sum() == 0
+    assert archive.prune("host", now=archive.retention + 86401) == 1
+    assert archive.rollups("host") == []
+
+def test_rollup_fields_match_per_series_buckets():
+    rng = np.random.default_rng(3)
+    series = []
+    for n in (0, 5, 120):
+        ts = np.sort(rng.uniform(3500, 7300, n))
+        values = rng.uniform(0, 100, n).astype(np.float32)
+        values[::7] = np.nan
+        series.append((ts, values))
+    fields = rollup_fields(series, 900, 4, 4)
+    for row, (ts, values) in enumerate(series):
+        buckets, low, high, total, count, last = bucket_samples(ts, values, 900)
+        inside = (buckets >= 4) & (buckets < 8)
+        columns = buckets[inside] - 4
+        assert fields["count"][row].sum() == count[inside].sum()
+        assert fields["max"][row, columns].tolist() == high[inside].tolist()
+        assert fields["last"][row, columns].tolist() == last[inside].tolist()
+        assert np.allclose(fields["sum"][row, columns], total[inside])
+
+def test_rollup_blocks_are_appended_and_a_torn_block_is_dropped(tmp_path):
+    archive = MetricArchive(str(tmp_path))
+    block = empty_rollup(1, 4)
+    block["count"][:] = 1
+    archive.add_rollup("host", 900, ["h1\tcpu"], 40, block)
+    [(_, path)] = archive.rollups("host", 900)
+    size = os.path.getsize(path)
+    archive.add_rollup("host", 900, ["h1\tcpu"], 44, block)
+    block_size = os.path.getsize(path) - size
+    assert block_size < size  # only the new block was written
+
+    with open(path, "ab") as rollup_file:
+        rollup_file.write(b"\x05\x00\x00\x00 torn")
+    assert read_rollup(path)[2]["count"][0, 40:48].tolist() == [1] * 8
+    archive.add_rollup("host", 900, ["h1\tcpu"], 48, block)
+    assert os.path.getsize(path) == size + 2 * block_size
+    assert read_rollup(path)[2]["count"][0, 40:52].tolist() == [1] * 12
+
+def test_archived_rollups_are_seeded_once_and_served_from_memory(tmp_path):
+    archive = MetricArchive(str(tmp_path), chunk_seconds=3600)
+    levels = [(900, 86400), (3600, 31 * 86400)]
+    collector = HostMetricsStore(retention=3600, resolution=60, levels=[], archive=archive)
+    start = 1_700_000_000 - 1_700_000_000 % 86400
+    for i in range(3 * 24 * 60):
+        collector.append("h1", CPU, start + i * 60, float(i // (24 * 60)))
+        if i % 60 == 0:
+            collector.archive_pending(now=start + i * 60)
+    collector.archive_pending(now=start + 3 * 86400)
+    assert [day for day, _ in archive.rollups("host", 3600)] == [start, start + 86400, start + 2 * 86400]
+
+    now = start + 3 * 86400
+    dashboard = HostMetricsStore(retention=3600, resolution=60, levels=levels, archive=archive)
+    dashboard.restore_from_archive(now=now)
+    reads = []
+    archive.read_range = lambda *args: reads.append(args)
+    month = dashboard.history("h1", CPU, 30 * 86400, now=now)
+    assert month.attrs["resolution"] == 3600
+    assert len(month) == 72
+    assert month["mean"].tolist() == [0.0] * 24 + [1.0] * 24 + [2.0] * 24
+    day = dashboard.history("h1", CPU, 86400, now=now)
+    assert day.attrs["resolution"] == 900 and len(day) == 96
+    assert reads == []
+
+def test_collector_keeps_only_raw_rings_and_prunes(tmp_path):
+    store = HostMetricsStore(levels=[], archive=MetricArchive(str(tmp_path)))
+    now = time.time()
+    store.append("decommissioned", CPU, now - 3 * 3600, 1.0)
+    snapshot = {"collected_at": now, "servers": [
+        {"host": "h1", "cpu": 5.0, "mem": (1000, 600, 200, 200), "fs": [], "status": "UP"},
+    ]}
+    archive_sweep(store, snapshot)
+    assert store.series("decommissioned") == []
+    assert store.nbytes == 4 * store.capacity * (8 + 4)  # cpu and three memory series, no rollups
+
+def test_background_restore_keeps_live_samples(tmp_path):
+    archive = MetricArchive(str(tmp_path), chunk_seconds=3600)
+    ts = np.arange(0, 3600, 30.0)
+    archive.write_chunk("host", 0, {"h1\tcpu": (ts, np.full(len(ts), 1.0, np.float32))})
+    store = HostMetricsStore(retention=7200, resolution=30, levels=[(60, 6 * 3600)], archive=archive)
+    store.append("h1", CPU, 3600.0, 5.0)  # a live sample taken before the restore ran
+    store.restore_in_background(now=3630).join(5)
+    assert not store.restoring
+    raw = store.history("h1", CPU, 3600, now=3630)
+    assert len(raw) == 120  # restored from 30 s on, plus the live one
+    assert raw["last"].iloc[0] == 1.0 and raw["last"].iloc[-1] == 5.0
+
+def test_sync_archive_fills_a_gap_in_live_history(tmp_path):
+    archive = MetricArchive(str(tmp_path), chunk_seconds=3600)
+    store = HostMetricsStore(retention=7200, resolution=30, levels=[(60, 6 * 3600), (86400, 31 * 86400)],
+                             archive=archive)
+    store.restore_from_archive(now=0)
+    ts = np.arange(0, 3600, 30.0)
+    values = (ts / 30).astype(np.float32)
+    for t, v in zip(ts, values):
+        if not 1200 <= t < 2400:  # sweeps the dashboard never read
+            store.append("h1", CPU, t, v)
+    archive.write_chunk("host", 0, {"h1\tcpu": (ts, values), "h2\tcpu": (ts, values)})
+
+    assert store.sync_archive() == 2
+    raw = store.history("h1", CPU, 3600, now=3600)
+    assert raw.attrs["resolution"] == 0 and len(raw) == 120
+    assert np.array_equal(raw["last"].to_numpy(), values)
+    minutes = store.history("h1", CPU, 3600, now=3600, max_points=60)
+    assert minutes.attrs["resolution"] == 60 and len(minutes) == 60
+    day = store.history("h1", CPU, 31 * 86400, now=3600)
+    assert day.attrs["resolution"] == 86400 and day["mean"].iloc[0] == values.mean()
+    assert store.series("h2") == [CPU]
+    assert store.sync_archive() == 0  # each chunk is looked at once
+
+def test_follow_ingests_snapshots_without_a_viewer(tmp_path):
+    store = HostMetricsStore(archive=MetricArchive(str(tmp_path)))
+    now = time.time()
+    snapshot = {"collected_at": now, "servers": [
+        {"host": "h1", "cpu": 5.0, "mem": (1000, 600, 200, 200), "fs": [], "status": "UP"},
+    ]}
+    stop = threading.Event()
+    thread = store.follow(read=lambda: snapshot, interval=0.01, stop=stop)
+    deadline = time.monotonic() + 5
+    while not len(store) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stop.set()
+    thread.join(1)
+    assert not thread.is_alive()
+    assert store.window("h1", CPU, 60, now=now + 1)[1].tolist() == [5.0]
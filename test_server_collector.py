@@ -0,0 +1,121 @@
+import os
+import stat
+
+import pytest
+
+import server_collector
+from host_probe import CpuSampler
+from host_profiles import HostProfileCache
+from server_collector import (
+    SNAPSHOT_MODE,
+    classify_cpu,
+    collect_server_data,
+    load_inventory,
+    read_snapshot,
+    sweep_hosts,
+    write_snapshot,
+)
+
+def server(host, cpu=10.0):
+    return {
+        "host": host,
+        "cpu": cpu,
+        "mem": ["8.0G", "4.0G", "2.0G", "2.0G"],
+        "fs": [],
+        "status": "UP",
+        "status_level": 2,
+    }
+
+def test_write_snapshot_is_readable_by_other_users(tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    write_snapshot([server("a")], path, duration=1.5)
+    assert stat.S_IMODE(os.stat(path).st_mode) == SNAPSHOT_MODE
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".server_snapshot.")]
+
+def test_read_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    written = write_snapshot([server("a"), server("b", cpu=None)], path, duration=2.0)
+    snapshot = read_snapshot(path)
+    assert snapshot["collected_at"] == written["collected_at"]
+    assert snapshot["duration"] == 2.0
+    assert [data["host"] for data in snapshot["servers"]] == ["a", "b"]
+    assert snapshot["servers"][0]["mem"] == ("8.0G", "4.0G", "2.0G", "2.0G")
+
+def test_read_snapshot_missing_or_corrupt(tmp_path):
+    path = tmp_path / "snapshot.json"
+    assert read_snapshot(str(path)) is None
+    path.write_text("{not json")
+    assert read_snapshot(str(path)) is None
+
+def test_read_snapshot_only_reparses_replaced_file(tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    write_snapshot([server("a")], path)
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    first = read_snapshot(path)
+    assert read_snapshot(path) is first
+
+    write_snapshot([server("b")], path)
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    second = read_snapshot(path)
+    assert second is not first
+    assert second["servers"][0]["host"] == "b"
+
+@pytest.mark.parametrize("cpu, expected", [
+    (None, ("UNKNOWN", 3)),
+    (95.0, ("CRITICAL", 0)),
+    (90.0, ("CRITICAL", 0)),
+    (85.0, ("NEED ATTENTION", 1)),
+    (80.0, ("NEED ATTENTION", 1)),
+    (79.9, ("UP", 2)),
+    (0.0, ("UP", 2)),
+])
+def test_classify_cpu(cpu, expected):
+    assert classify_cpu(cpu) == expected
+
+def test_load_inventory(tmp_path):
+    path = tmp_path / "credentials.csv"
+    path.write_text("Host,User,Password\n10.0.0.1,root,pw1\n10.0.0.2,oracle,pw2\n")
+    assert load_inventory(str(path)) == [
+        {"Host": "10.0.0.1", "User": "root", "Password": "pw1"},
+        {"Host": "10.0.0.2", "User": "oracle", "Password": "pw2"},
+    ]
+
+def test_load_inventory_requires_columns(tmp_path):
+    path = tmp_path / "credentials.csv"
+    path.write_text("Host,User\n10.0.0.1,root\n")
+    with pytest.raises(ValueError):
+        load_inventory(str(path))
+
+def test_sweep_flushes_profiles_once(tmp_path, monkeypatch):
+    profiles = HostProfileCache(str(tmp_path / "profiles.json"))
+    monkeypatch.setattr(server_collector, "get_profiles", lambda: profiles)
+    flushes = []
+    flush = profiles.flush
+    profiles.flush = lambda: flushes.append(1) or flush()
+
+    def collect(cred):
+        profiles.put(cred["Host"], {"os": "Linux", "version": "", "tools": [], "fingerprinted_at": 1000})
+        return server(cred["Host"])
+
+    credentials = [{"Host": f"10.0.0.{i}", "User": "root", "Password": "pw"} for i in range(20)]
+    assert len(sweep_hosts(credentials, collect=collect, max_workers=8)) == 20
+    assert flushes == [1]
+    assert len(HostProfileCache(str(tmp_path / "profiles.json"))) == 20
+
+def test_failed_probe_forgets_the_cpu_baseline(tmp_path, monkeypatch):
+    sampler = CpuSampler()
+    sampler.utilisation("10.0.0.1", 100, 1000)
+    monkeypatch.setattr(server_collector, "CPU_SAMPLER", sampler)
+    monkeypatch.setattr(server_collector, "get_profiles", lambda: HostProfileCache(str(tmp_path / "profiles.json")))
+
+    class Pool:
+        def get(self, host, user, password):
+            raise OSError("Connection refused")
+
+        def discard(self, host, user):
+            pass
+
+    monkeypatch.setattr(server_collector, "get_pool", lambda: Pool())
+    result = collect_server_data({"Host": "10.0.0.1", "User": "root", "Password": "pw"})
+    assert result["status"] == "DOWN"
+    assert sampler.utilisation("10.0.0.1", 200, 2000) is None  # a fresh baseline, not a stale delta
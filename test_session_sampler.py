@@ -0,0 +1,102 @@
+import time
+
+from session_sampler import SHARED_SAMPLES, SessionSampler
+from snapshot_cache import SnapshotCache
+
+def make_sampler(**kwargs):
+    return SessionSampler("Development", "rundb1", sample=lambda: [], **kwargs)
+
+def test_top_sql_and_wait_classes_over_window():
+    sampler = make_sampler()
+    now = 10000.0
+    sampler.add_sample([("a1", "db file sequential read", "User I/O")], ts=now - 1000)  # outside 5 min
+    sampler.add_sample([("a1", "ON CPU", "CPU"), ("b2", "enq: TX - row lock contention", "Application")], ts=now - 20)
+    sampler.add_sample([("a1", "ON CPU", "CPU"), (None, "log file sync", "Commit")], ts=now - 10)
+    sampler.add_sample([], ts=now)  # idle sample still counts towards AAS
+
+    top_sql = sampler.top_sql(300, now=now)
+    assert top_sql["SQL_ID"].tolist()[0] == "a1"
+    assert top_sql.set_index("SQL_ID").loc["a1", "Samples"] == 2
+    assert top_sql.set_index("SQL_ID").loc["a1", "AAS"] == round(2 / 3, 2)
+    assert "(none)" in top_sql["SQL_ID"].tolist()
+
+    waits = sampler.top_wait_classes(300, now=now).set_index("WAIT_CLASS")
+    assert waits.loc["CPU", "% Activity"] == 50.0
+    assert "User I/O" not in waits.index
+    assert "User I/O" in sampler.top_wait_classes(3600, now=now)["WAIT_CLASS"].tolist()
+
+def test_ring_buffer_drops_oldest_rows():
+    sampler = make_sampler(capacity=3)
+    for i in range(5):
+        sampler.add_sample([(f"sql{i}", "ON CPU", "CPU")], ts=1000.0 + i)
+    rows, samples = sampler.window(3600, now=1004.0)
+    assert sorted(rows["SQL_ID"]) == ["sql2", "sql3", "sql4"]
+    assert samples == 3
+
+def test_empty_window():
+    top = make_sampler().top_sql(300)
+    assert top.empty
+    assert list(top.columns) == ["SQL_ID", "Samples", "AAS", "% Activity"]
+
+def test_background_thread_samples_and_stops_when_idle():
+    calls = []
+    sampler = SessionSampler("Development", "rundb1", interval=0.01, idle_timeout=0.2,
+                             sample=lambda: calls.append(1) or [("a1", "ON CPU", "CPU")])
+    sampler.start()
+    time.sleep(0.05)
+    assert sampler.top_sql(300)["SQL_ID"].tolist() == ["a1"]
+    deadline = time.time() + 5
+    while sampler.is_running():
+        assert time.time() < deadline
+        time.sleep(0.02)
+    assert calls
+
+def test_overflowed_row_buffer_clips_the_window():
+    # 10 rows per sample, room for 25: only the last two samples are whole
+    sampler = make_sampler(capacity=25)
+    for i in range(6):
+        sampler.add_sample([(f"sql{j}", "ON CPU", "CPU") for j in range(10)], ts=1000.0 + 10 * i)
+    rows, samples = sampler.window(3600, now=1050.0)
+    assert samples == 2
+    assert len(rows) == 20
+    assert sampler.coverage(3600, now=1050.0) == 20.0
+    assert sampler.coverage(5, now=1050.0) == 5
+
+    top = sampler.top_sql(3600, now=1050.0).set_index("SQL_ID")
+    assert top.loc["sql0", "AAS"] == 1.0  # every sample had sql0, not 2 of 6
+    assert top["% Activity"].sum() == 100.0
+
+def test_coverage_is_full_until_rows_are_dropped():
+    sampler = make_sampler(capacity=100)
+    sampler.add_sample([("a1", "ON CPU", "CPU")], ts=1000.0)
+    assert sampler.coverage(3600, now=1010.0) == 3600
+
+def test_processes_sharing_a_cache_query_the_database_once(tmp_path):
+    cache = SnapshotCache(path=str(tmp_path / "cache.db"))
+    calls = []
+
+    def query():
+        calls.append(1)
+        return [("a1", "ON CPU", "CPU")]
+
+    # Two samplers of the same database stand in for two Streamlit workers
+    first = SessionSampler("Development", "rundb1", interval=0.05, sample=query, cache=cache)
+    second = SessionSampler("Development", "rundb1", interval=0.05, sample=query, cache=cache)
+    for _ in range(3):
+        first.sample_once()
+        second.sample_once()
+    assert len(calls) == 3
+    assert first.window(3600)[1] == second.window(3600)[1] == 3
+
+    # A process that skipped a few ticks catches up from the published tail
+    for _ in range(SHARED_SAMPLES - 1):
+        first.sample_once()
+    second.sample_once()
+    assert second.top_sql(3600)["Samples"].tolist() == [SHARED_SAMPLES + 2]
+
+    # Once the sampling process stalls past its lease, another one takes over
+    time.sleep(0.2)
+    second.sample_once()
+    first.sample_once()
+    assert len(calls) == SHARED_SAMPLES + 3
+    assert first.window(3600)[1] == second.window(3600)[1] == SHARED_SAMPLES + 3
@@ -0,0 +1,76 @@
+import pandas as pd
+
+from session_tracker import CHANGED, NEW, SessionTracker, annotate_sessions
+
+def snapshot(rows):
+    return pd.DataFrame(rows, columns=["SID", "SERIAL#", "STATUS", "SQL_ID", "MEMORY_MB"])
+
+FIRST = snapshot([
+    (1, 10, "ACTIVE", "a1", 10.0),
+    (2, 20, "INACTIVE", None, 5.0),
+    (3, 30, "ACTIVE", "c3", 8.0),
+])
+
+SECOND = snapshot([
+    (1, 10, "ACTIVE", "a1", 12.5),    # PGA grew
+    (2, 20, "INACTIVE", None, 5.0),   # unchanged, NULL SQL_ID on both sides
+    (3, 31, "ACTIVE", "c3", 8.0),     # SID reused by a new session
+    (4, 40, "ACTIVE", "d4", 1.0),     # logged on
+])
+
+def test_first_snapshot_is_baseline():
+    diff = SessionTracker().update(FIRST, 1)
+    assert diff["added"].empty and diff["removed"].empty and diff["changed"].empty
+    assert diff["previous_time"] is None
+    assert diff["pga_delta"].isna().all()
+
+def test_adds_removes_and_changes_keyed_by_sid_and_serial():
+    tracker = SessionTracker()
+    tracker.update(FIRST, 1)
+    diff = tracker.update(SECOND, 2)
+
+    assert diff["added"].index.tolist() == [(3, 31), (4, 40)]
+    assert diff["removed"].index.tolist() == [(3, 30)]
+    assert diff["changed"].index.tolist() == [(1, 10)]
+    assert diff["change"].tolist() == [CHANGED, "", NEW, NEW]
+    assert diff["pga_delta"].loc[(1, 10)] == 2.5
+    assert diff["pga_delta"].loc[(2, 20)] == 0
+    assert pd.isna(diff["pga_delta"].loc[(4, 40)])
+    assert diff["previous_time"] == 1
+
+def test_same_snapshot_time_reuses_diff():
+    tracker = SessionTracker()
+    tracker.update(FIRST, 1)
+    diff = tracker.update(SECOND, 2)
+    assert tracker.update(SECOND, 2) is diff
+
+def test_annotate_page_rows():
+    tracker = SessionTracker()
+    tracker.update(FIRST, 1)
+    diff = tracker.update(SECOND, 2)
+    page = annotate_sessions(SECOND.iloc[[3, 0, 1]], diff)
+    assert page["Change"].tolist() == [NEW, CHANGED, ""]
+    assert page["PGA Delta MB"].tolist()[1:] == [2.5, 0.0]
+
+def state(rows):
+    return pd.DataFrame(rows, columns=["SID", "SERIAL#", "STATUS", "SQL_ID", "MEMORY_MB", "CONNECTED_SECONDS"])
+
+def test_scoped_update_only_diffs_the_given_sids():
+    tracker = SessionTracker()
+    tracker.update(state([(1, 10, "ACTIVE", "a1", 10.0, 500), (2, 20, "ACTIVE", "b2", 5.0, 500)]), 100, sids=[1, 2])
+    tracker.update(state([(7, 70, "ACTIVE", "g7", 3.0, 900)]), 110, sids=[7])
+    diff = tracker.update(state([
+        (1, 10, "INACTIVE", "a1", 10.0, 560),   # changed since t=100
+        (3, 30, "ACTIVE", "c3", 1.0, 20),       # logged on after the page was last seen
+        (4, 40, "ACTIVE", "d4", 1.0, 7200),     # not seen before, but not new either
+    ]), 160, sids=[1, 2, 3, 4])
+
+    assert diff["previous_time"] == 100
+    assert diff["change"].tolist() == [CHANGED, NEW, ""]
+    assert diff["removed"].index.tolist() == [(2, 20)]   # SID 2 was looked up and is gone
+    # SID 7 was out of scope: neither ended nor dropped from the baseline
+    assert tracker.update(state([(7, 70, "ACTIVE", "g7", 4.0, 960)]), 170, sids=[7])["pga_delta"].tolist() == [1.0]
+
+def test_scoped_first_look_is_baseline():
+    diff = SessionTracker().update(state([(1, 10, "ACTIVE", "a1", 10.0, 5)]), 100, sids=[1])
+    assert diff["added"].empty and diff["previous_time"] is None
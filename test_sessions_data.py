@@ -0,0 +1,112 @@
+import datetime
+
+from sessions_data import (
+    MAX_IN_LIST,
+    SESSION_SCOPE,
+    SESSIONS_FILTERED_SUMMARY_QUERY,
+    SESSIONS_SUMMARY_QUERY,
+    build_filter_clause,
+    build_sessions_page_query,
+    query_sessions_page,
+    query_sessions_state,
+)
+
+class FakeCursor:
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.description = [(c,) for c in columns]
+        self.executed = []
+
+    def execute(self, sql, binds):
+        self.executed.append((sql, binds))
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+def test_filters_are_bind_variables():
+    clause, binds = build_filter_clause(["ACTIVE"], ["SCOTT'; DROP TABLE x --"], 1.5)
+    assert "SCOTT" not in clause
+    assert "s.status IN (:st0)" in clause
+    assert "s.username IN (:un0)" in clause
+    assert binds == {"st0": "ACTIVE", "un0": "SCOTT'; DROP TABLE x --", "min_hours": 1.5}
+
+def test_all_selected_needs_no_in_list():
+    clause, binds = build_filter_clause(None, None, 0)
+    assert " IN " not in clause
+    assert "username" not in clause  # every user in SESSION_SCOPE
+    assert binds == {"min_hours": 0.0}
+
+def test_long_in_lists_are_chunked():
+    users = [f"U{i}" for i in range(MAX_IN_LIST + 5)]
+    clause, binds = build_filter_clause(None, users, 0)
+    assert clause.count("s.username IN (") == 2
+    assert len([b for b in binds if b.startswith("un")]) == len(users)
+
+def test_page_query_keyset_and_limit():
+    after = ("INACTIVE", datetime.datetime(2026, 1, 1), 42)
+    sql, binds = build_sessions_page_query(None, None, 0, 100, after)
+    assert ":k_sid" in sql
+    assert binds["page_rows"] == 101
+    assert (binds["k_status"], binds["k_logon"], binds["k_sid"]) == after
+
+    sql, binds = build_sessions_page_query(None, None, 0, 100)
+    assert ":k_sid" not in sql and "k_sid" not in binds
+
+def test_page_returns_next_cursor_only_when_more_rows():
+    logon = [datetime.datetime(2026, 1, 1, 0, i) for i in range(3)]
+    rows = [(3 - i, "ACTIVE", logon[2 - i]) for i in range(3)]
+    cursor = FakeCursor(rows, ["SID", "STATUS", "LOGON_SORT"])
+
+    df, next_after = query_sessions_page(FakeConnection(cursor), None, None, 0, page_size=2)
+    assert list(df.columns) == ["SID", "STATUS"]
+    assert len(df) == 2
+    assert next_after == ("ACTIVE", logon[1], 2)
+
+    df, next_after = query_sessions_page(FakeConnection(cursor), None, None, 0, page_size=3)
+    assert next_after is None
+
+def test_empty_selection_skips_the_database():
+    cursor = FakeCursor([], ["SID"])
+    df, next_after = query_sessions_page(FakeConnection(cursor), [], None, 0, page_size=10)
+    assert df.empty and next_after is None
+    assert cursor.executed == []
+
+def test_state_query_reads_only_the_given_sids():
+    cursor = FakeCursor([(7, 70, "SCOTT", "ACTIVE", "a1", 3.5, 120)],
+                        ["SID", "SERIAL#", "USERNAME", "STATUS", "SQL_ID", "MEMORY_MB", "CONNECTED_SECONDS"])
+    df = query_sessions_state(FakeConnection(cursor), [7, 9])
+    sql, binds = cursor.executed[0]
+    assert "s.sid IN (:sid0, :sid1)" in sql
+    assert binds == {"sid0": 7, "sid1": 9}
+    assert df["SID"].tolist() == [7]
+
+def test_state_query_without_sids_skips_the_database():
+    cursor = FakeCursor([], [])
+    df = query_sessions_state(FakeConnection(cursor), [])
+    assert cursor.executed == []
+    assert df.empty and "CONNECTED_SECONDS" in df.columns
+
+def where_clause(sql):
+    return sql.split("\nWHERE ", 1)[1].split("GROUP BY")[0].split("ORDER BY")[0]
+
+def test_kpis_count_the_sessions_the_pages_show():
+    # With every status and user selected and no minimum, the KPI summary,
+    # the filtered count and the pages must select exactly the same sessions
+    filters, _ = build_filter_clause(None, None, 0)
+    page_sql, _ = build_sessions_page_query(None, None, 0, 100)
+    summary = where_clause(SESSIONS_SUMMARY_QUERY).strip()
+    filtered = where_clause(SESSIONS_FILTERED_SUMMARY_QUERY.format(filters=filters)).strip()
+    page = where_clause(page_sql).strip()
+    assert summary == SESSION_SCOPE
+    assert filtered == page == SESSION_SCOPE + filters
+    assert filters.strip() == "AND (SYSDATE - s.logon_time) * 24 >= :min_hours"  # true for every session
@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from snapshot_cache import SnapshotCache, cache_key
+
+def make_cache(tmp_path, **kwargs):
+    kwargs.setdefault("poll_interval", 0.01)
+    return SnapshotCache(path=str(tmp_path / "cache.db"), **kwargs)
+
+def test_fresh_entry_is_served_without_recomputing(tmp_path):
+    cache = make_cache(tmp_path)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return pd.DataFrame({"A": [1, 2]})
+
+    key = cache_key("tablespace", "Development", "rundb1")
+    first = cache.get_or_compute(key, compute, ttl=60)
+    second = cache.get_or_compute(key, compute, ttl=60)
+    assert len(calls) == 1
+    assert second.equals(first)
+
+def test_expired_entry_is_recomputed(tmp_path):
+    cache = make_cache(tmp_path)
+    key = cache_key("db_info", "Development", "rundb1")
+    cache.store(key, "old", created=time.time() - 120)
+    assert cache.get_or_compute(key, lambda: "new", ttl=60) == "new"
+    assert cache.read(key)[0] == "new"
+
+def test_concurrent_viewers_share_one_upstream_query(tmp_path):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return "result"
+
+    key = cache_key("sessions_summary", "Production", "ProdDB1")
+    results = []
+    # Separate instances stand in for separate Streamlit worker processes
+    threads = [threading.Thread(target=lambda: results.append(make_cache(tmp_path).get_or_compute(key, compute, ttl=60)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == ["result"] * 8
+
+def test_failed_compute_releases_lease_and_stores_nothing(tmp_path):
+    cache = make_cache(tmp_path)
+    key = cache_key("tablespace", "Testing", "TestDB1")
+
+    def fail():
+        raise RuntimeError("ORA-12170")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute(key, fail, ttl=60)
+    assert cache.read(key) is None
+    assert cache.get_or_compute(key, lambda: "ok", ttl=60) == "ok"
+
+def test_abandoned_lease_is_taken_over(tmp_path):
+    cache = make_cache(tmp_path, lease_timeout=0.2)
+    key = cache_key("tablespace", "Testing", "TestDB2")
+    assert cache.try_lease(key) is not None  # holder "crashes" without releasing
+    assert cache.try_lease(key) is None
+    assert cache.get_or_compute(key, lambda: "recovered", ttl=60) == "recovered"
+
+def test_keys_distinguish_filters():
+    assert cache_key("sessions_page", "Dev", "db", ("ACTIVE",), None) != \
+        cache_key("sessions_page", "Dev", "db", None, ("ACTIVE",))
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+def test_stale_entry_is_served_while_refreshing_in_background(tmp_path):
+    cache = make_cache(tmp_path)
+    key = cache_key("tablespace", "Production", "ProdDB2")
+    stale_at = time.time() - 400
+    cache.store(key, "old", created=stale_at)
+    release = threading.Event()
+
+    def slow_compute():
+        release.wait(5)
+        return "new"
+
+    assert cache.get_or_refresh(key, slow_compute, ttl=300, max_stale=1800) == ("old", stale_at)
+    release.set()
+    wait_for(lambda: cache.read(key)[0] == "new")
+    value, created = cache.get_or_refresh(key, slow_compute, ttl=300, max_stale=1800)
+    assert value == "new" and created > stale_at
+
+def test_failed_background_refresh_keeps_last_good_value(tmp_path):
+    cache = make_cache(tmp_path, retry_after=60)
+    key = cache_key("db_info", "Production", "ProdDB1")
+    cache.store(key, "good", created=time.time() - 400)
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise RuntimeError("ORA-03113")
+
+    assert cache.get_or_refresh(key, fail, ttl=300, max_stale=1800)[0] == "good"
+    wait_for(lambda: calls)
+    # Backing off: further viewers get the old value without another attempt
+    assert cache.get_or_refresh(key, fail, ttl=300, max_stale=1800)[0] == "good"
+    assert cache.read(key)[0] == "good"
+    assert len(calls) == 1
+
+def test_entry_past_max_stale_blocks_for_a_fresh_value(tmp_path):
+    cache = make_cache(tmp_path)
+    key = cache_key("tablespace", "Development", "rundb2")
+    cache.store(key, "ancient", created=time.time() - 7200)
+    assert cache.get_or_refresh(key, lambda: "fresh", ttl=300, max_stale=1800)[0] == "fresh"
+
+    def down():
+        raise RuntimeError("ORA-12541")
+
+    cache.store(key, "ancient", created=time.time() - 7200)
+    with pytest.raises(RuntimeError):
+        cache.get_or_refresh(key, down, ttl=300, max_stale=1800)
@@ -0,0 +1,65 @@
+from ssh_pool import SSHConnectionPool
+
+class FakeTransport:
+    def __init__(self):
+        self.active = True
+
+    def is_active(self):
+        return self.active
+
+    def send_ignore(self):
+        if not self.active:
+            raise EOFError()
+
+class FakeClient:
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.closed = False
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.closed = True
+        self.transport.active = False
+
+def make_pool(**kwargs):
+    pool = SSHConnectionPool(**kwargs)
+    pool.connects = 0
+
+    def connect(host, user, password):
+        pool.connects += 1
+        return FakeClient()
+
+    pool._connect = connect
+    return pool
+
+def test_reuses_healthy_connection():
+    pool = make_pool()
+    first = pool.get("10.0.0.1", "root", "pw")
+    second = pool.get("10.0.0.1", "root", "pw")
+    assert first is second
+    assert pool.connects == 1
+
+def test_reconnects_dead_transport():
+    pool = make_pool()
+    first = pool.get("10.0.0.1", "root", "pw")
+    first.transport.active = False
+    second = pool.get("10.0.0.1", "root", "pw")
+    assert second is not first
+    assert first.closed
+    assert pool.connects == 2
+
+def test_reconnects_when_password_changes():
+    pool = make_pool()
+    first = pool.get("10.0.0.1", "root", "old")
+    second = pool.get("10.0.0.1", "root", "new")
+    assert second is not first
+
+def test_evicts_idle_connections():
+    pool = make_pool(idle_timeout=10)
+    client = pool.get("10.0.0.1", "root", "pw")
+    pool._entries[("10.0.0.1", "root")]["last_used"] -= 60
+    assert pool.evict_idle() == 1
+    assert client.closed
+    assert len(pool) == 0
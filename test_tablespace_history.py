@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from tablespace_history import (
+    forecast_days_to_full,
+    load_db_load_history,
+    load_tablespace_history,
+    record_db_load_sample,
+    record_tablespace_snapshot,
+)
+from tablespace_status import NEEDS_EXTENSION_SOON, NORMAL, forecast_status
+
+DAY = 86400
+
+def snapshot(used_mb, max_mb=1000.0):
+    return pd.DataFrame({
+        "Tablespace Name": ["USERS"],
+        "Used MB": [used_mb],
+        "Allocated MB": [used_mb],
+        "Max MB": [max_mb],
+    })
+
+def test_record_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "history.db")
+    start = 1_700_000_000
+    assert record_tablespace_snapshot("Dev", "db1", snapshot(100.0), ts=start, path=path) == 1
+    # Sampled again too soon: skipped
+    assert record_tablespace_snapshot("Dev", "db1", snapshot(101.0), ts=start + 60, path=path) == 0
+    assert record_tablespace_snapshot("Dev", "db1", snapshot(110.0), ts=start + DAY, path=path) == 1
+
+    history = load_tablespace_history("Dev", "db1", since=0, path=path)
+    assert history["used_mb"].tolist() == [100.0, 110.0]
+
+def test_db_load_samples_round_trip(tmp_path):
+    path = str(tmp_path / "history.db")
+    start = 1_700_000_000
+    load = {"Host CPU %": 40.0, "DB Time/s": 2.5, "Redo MB/s": None, "Interval End": "x"}
+    assert record_db_load_sample("Dev", "db1", load, ts=start, path=path) == 2
+    # Same v$sysmetric interval: skipped
+    assert record_db_load_sample("Dev", "db1", load, ts=start + 30, path=path) == 0
+    assert record_db_load_sample("Dev", "db1", {"Host CPU %": 60.0}, ts=start + 60, path=path) == 1
+
+    history = load_db_load_history("Dev", "db1", since=0, path=path)
+    assert history["ts"].tolist() == [start, start + 60]
+    assert history["Host CPU %"].tolist() == [40.0, 60.0]
+    assert history["DB Time/s"].isna().tolist() == [False, True]
+
+def test_forecast_linear_growth():
+    ts = np.arange(10) * DAY
+    history = pd.DataFrame({
+        "tablespace": ["GROWING"] * 10 + ["FLAT"] * 10,
+        "ts": np.concatenate([ts, ts]),
+        "used_mb": np.concatenate([500.0 + 10.0 * np.arange(10), np.full(10, 900.0)]),
+        "max_mb": np.full(20, 1000.0),
+    })
+    forecast = forecast_days_to_full(history, now=9 * DAY)
+    assert forecast.loc["GROWING", "Growth MB/Day"] == 10.0
+    # 590 MB used of 1000 MB, growing 10 MB/day
+    assert forecast.loc["GROWING", "Days To Full"] == 41.0
+    assert np.isnan(forecast.loc["FLAT", "Days To Full"])
+
+    # Ten days without a sample: the forecast counts down from now
+    later = forecast_days_to_full(history, now=19 * DAY)
+    assert later.loc["GROWING", "Days To Full"] == 31.0
+    assert forecast_days_to_full(history, now=80 * DAY).loc["GROWING", "Days To Full"] == 0.0
+
+def test_forecast_needs_enough_history():
+    history = pd.DataFrame({
+        "tablespace": ["NEW", "NEW"],
+        "ts": [0, DAY],
+        "used_mb": [100.0, 200.0],
+        "max_mb": [1000.0, 1000.0],
+    })
+    assert np.isnan(forecast_days_to_full(history).loc["NEW", "Days To Full"])
+
+def test_forecast_status_only_upgrades_normal_rows():
+    status = np.array([NORMAL, NORMAL, "Needs Extension"])
+    result = forecast_status(status, [10.0, 90.0, 5.0])
+    assert result.tolist() == [NEEDS_EXTENSION_SOON, NORMAL, "Needs Extension"]
@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import oracledb
+import pandas as pd
+import pytest
+
+import tablespace_queries
+from tablespace_queries import (
+    TABLESPACE_METRICS_QUERY,
+    TABLESPACE_QUERY,
+    build_tablespace_query,
+    query_tablespace_usage,
+)
+from tablespace_status import NORMAL, tablespace_status
+
+COLUMNS = ["Tablespace Name", "Max MB", "Allocated MB", "Free MB", "Used MB",
+           "Percentage Used", "Available Extension MB", "Percentage Free"]
+
+def ora_error(code):
+    return oracledb.DatabaseError(SimpleNamespace(code=code, message=f"ORA-{code:05d}"))
+
+@pytest.fixture(autouse=True)
+def fake_fetch(monkeypatch):
+    calls = []
+
+    def fetch(conn, sql, params=None):
+        calls.append(sql)
+        if sql == TABLESPACE_METRICS_QUERY and conn.metrics_error is not None:
+            raise conn.metrics_error
+        return pd.DataFrame(columns=COLUMNS)
+
+    monkeypatch.setattr(tablespace_queries, "fetch_dataframe", fetch)
+    monkeypatch.setattr(tablespace_queries, "_metrics_unavailable", set())
+    return calls
+
+def test_fast_path_preferred(fake_fetch):
+    query_tablespace_usage(SimpleNamespace(metrics_error=None), key=("Dev", "db1"))
+    assert fake_fetch == [TABLESPACE_METRICS_QUERY]
+
+@pytest.mark.parametrize("code", [942, 1031])
+def test_falls_back_and_remembers_missing_privileges(fake_fetch, code):
+    conn = SimpleNamespace(metrics_error=ora_error(code))
+    query_tablespace_usage(conn, key=("Dev", "db1"))
+    query_tablespace_usage(conn, key=("Dev", "db1"))
+    assert fake_fetch == [TABLESPACE_METRICS_QUERY, TABLESPACE_QUERY, TABLESPACE_QUERY]
+
+def test_other_errors_propagate(fake_fetch):
+    with pytest.raises(oracledb.DatabaseError):
+        query_tablespace_usage(SimpleNamespace(metrics_error=ora_error(12170)), key=("Dev", "db1"))
+    assert fake_fetch == [TABLESPACE_METRICS_QUERY]
+
+def test_queries_return_the_same_columns():
+    for query in (TABLESPACE_QUERY, TABLESPACE_METRICS_QUERY):
+        for column in COLUMNS:
+            assert f'AS "{column}"' in query
+
+def usage_row(name, used_mb, free_pct):
+    return [name, 500.0, 500.0, None if used_mb is None else 500.0 - used_mb, used_mb,
+            None if used_mb is None else 100 - free_pct, 0.0, free_pct]
+
+def test_tablespaces_without_metrics_are_read_with_the_full_query(monkeypatch):
+    calls = []
+
+    def fetch(conn, sql, params=None):
+        calls.append((sql, params))
+        if sql == TABLESPACE_METRICS_QUERY:
+            return pd.DataFrame([usage_row("USERS", 100.0, 80.0), usage_row("NEW_TS", None, None)], columns=COLUMNS)
+        return pd.DataFrame([usage_row("NEW_TS", 1.0, 99.8)], columns=COLUMNS)
+
+    monkeypatch.setattr(tablespace_queries, "fetch_dataframe", fetch)
+    df = query_tablespace_usage(SimpleNamespace(), key=("Dev", "db1"))
+    assert calls[1] == build_tablespace_query(["NEW_TS"])
+    assert calls[1][1] == {"ts0": "NEW_TS"} and "IN (:ts0)" in calls[1][0]
+    assert df["Tablespace Name"].tolist() == ["NEW_TS", "USERS"]
+    assert df["Used MB"].tolist() == [1.0, 100.0]
+    assert list(tablespace_status(df)) == [NORMAL, NORMAL]
+
+def test_metrics_query_leaves_usage_null_without_a_metrics_row():
+    assert "NVL(m.used_space" not in TABLESPACE_METRICS_QUERY
+    assert "LEFT JOIN dba_tablespace_usage_metrics m" in TABLESPACE_METRICS_QUERY
+    assert "WHERE" not in TABLESPACE_QUERY.split("LEFT JOIN ts_autoextend")[1]
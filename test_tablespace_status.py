@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from tablespace_status import highlight_tablespaces, tablespace_row_styles, tablespace_status
+
+def reference_status(row):
+    if row["Percentage Free"] <= (10 if row["Max MB"] < 1000 else 5):
+        return "Needs Extension"
+    return "Normal"
+
+def reference_color(row):
+    if row["Available Extension MB"] < 10000:
+        if row["Max MB"] >= 1000 and row["Percentage Free"] <= 5:
+            return "#ffcccc"
+        elif row["Max MB"] < 1000 and row["Percentage Free"] <= 10:
+            return "#fff5cc"
+    return ""
+
+def make_frame(n=2000, seed=7):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Tablespace Name": [f"TS{i}" for i in range(n)],
+        "Max MB": rng.choice([500.0, 999.99, 1000.0, 32768.0], n),
+        "Percentage Free": rng.choice([0.0, 4.99, 5.0, 5.01, 10.0, 10.01, 60.0], n),
+        "Available Extension MB": rng.choice([0.0, 9999.0, 10000.0, 50000.0], n),
+    })
+    df.loc[0, "Percentage Free"] = np.nan
+    return df
+
+def test_status_matches_row_rule():
+    df = make_frame()
+    expected = df.apply(reference_status, axis=1).to_numpy()
+    assert (tablespace_status(df) == expected).all()
+
+def test_row_styles_match_row_rule():
+    df = make_frame()
+    expected = ("background-color: " + df.apply(reference_color, axis=1)).to_numpy()
+    assert (tablespace_row_styles(df) == expected).all()
+
+def test_highlight_frame_shape():
+    df = make_frame(10)
+    styles = highlight_tablespaces(df)
+    assert styles.shape == df.shape
+    assert (styles.index == df.index).all()
+    assert (styles.nunique(axis=1) == 1).all()
@@ -0,0 +1,72 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+import tablespacepdb
+from tablespace_status import NEEDS_EXTENSION, NORMAL, tablespace_status
+from tablespacepdb import CDB_TABLESPACE_COLUMNS, CDB_TABLESPACE_QUERY, container_summary, fetch_cdb_tablespace_data
+
+def cdb_frame():
+    return pd.DataFrame({
+        "CON_ID": [4, 3, 4, 3, 4],
+        "Container": ["SALESPDB", "HRPDB", "SALESPDB", "HRPDB", "SALESPDB"],
+        "Tablespace Name": ["USERS", "USERS", "SALES_DATA", "HR_DATA", "SALES_IDX"],
+        "Status": [NEEDS_EXTENSION, NORMAL, NEEDS_EXTENSION, NORMAL, NORMAL],
+        "Used MB": [100.0, 10.0, 900.0, 40.0, 50.0],
+        "Max MB": [200.0, 100.0, 1000.0, 400.0, 500.0],
+    })
+
+def test_container_summary_one_row_per_container_in_con_id_order():
+    summary = container_summary(cdb_frame())
+    assert summary.index.tolist() == ["HRPDB", "SALESPDB"]
+    assert summary["CON_ID"].tolist() == [3, 4]
+
+def test_container_summary_counts_and_totals():
+    summary = container_summary(cdb_frame())
+    assert summary.loc["SALESPDB", "Tablespaces"] == 3
+    assert summary.loc["SALESPDB", "Needs Extension"] == 2
+    assert summary.loc["SALESPDB", "Used MB"] == 1050.0
+    assert summary.loc["SALESPDB", "Max MB"] == 1700.0
+    assert summary.loc["HRPDB", "Tablespaces"] == 2
+    assert int(summary.loc["HRPDB", "Needs Extension"]) == 0
+    assert summary.loc["HRPDB", "Used MB"] == 50.0
+
+def test_cdb_query_has_no_binds_and_names_every_column():
+    assert re.search(r"(?<!:):\w", CDB_TABLESPACE_QUERY.replace("'PDB$SEED'", "")) is None
+    for column in CDB_TABLESPACE_COLUMNS:
+        assert f'AS "{column}"' in CDB_TABLESPACE_QUERY
+    # Containers drive the rows, so a PDB without tablespaces is not dropped
+    assert "FROM v$containers c\nLEFT JOIN ts_rows t" in CDB_TABLESPACE_QUERY
+
+def test_fetch_cdb_tablespace_data_runs_the_query_without_binds(monkeypatch):
+    calls = []
+    closed = []
+
+    class Connection:
+        def close(self):
+            closed.append(True)
+
+    def fetch(conn, sql, params=None):
+        calls.append((sql, params))
+        return cdb_frame()
+
+    monkeypatch.setattr(tablespacepdb, "get_oracle_connection", lambda env, db: Connection())
+    monkeypatch.setattr(tablespacepdb, "fetch_dataframe", fetch)
+    fetch_cdb_tablespace_data.clear()
+    df = fetch_cdb_tablespace_data("Production", "CDB1")
+    assert calls == [(CDB_TABLESPACE_QUERY, None)] and closed == [True]
+    assert len(df) == 5
+
+def test_pdb_without_tablespaces_counts_zero():
+    # The query's one row for a container with nothing to report: NULL tablespace columns
+    empty_pdb = pd.DataFrame({"CON_ID": [5], "Container": ["CLOSEDPDB"], "Tablespace Name": [None],
+                              "Used MB": [np.nan], "Max MB": [np.nan], "Percentage Free": [np.nan]})
+    empty_pdb["Status"] = tablespace_status(empty_pdb)
+    assert empty_pdb["Status"].tolist() == [NORMAL]
+    summary = container_summary(pd.concat([cdb_frame(), empty_pdb], ignore_index=True))
+    assert summary.loc["SALESPDB", "Needs Extension"] == 2
+    assert summary.index.tolist() == ["HRPDB", "SALESPDB", "CLOSEDPDB"]
+    assert summary.loc["CLOSEDPDB", "Tablespaces"] == 0
+    assert summary.loc["CLOSEDPDB", "Needs Extension"] == 0
+    assert summary.loc["CLOSEDPDB", "Used MB"] == 0.0